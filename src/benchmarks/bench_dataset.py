@@ -0,0 +1,89 @@
+"""
+Compares the binary training dataset against the CSV files it replaces, on synthetic dynamic samples
+Reports the write throughput when appending one sample at a time (as the Recorder does),
+the time to load the whole set for training and the peak RSS of a process doing only that load
+Run from src/: python -m benchmarks.bench_dataset [samples]
+"""
+
+import csv
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from ml.train.dataset import GestureDataset, dynamic_columns, load_training_data, legacy_csv_path
+
+def _samples(count):
+    rng = np.random.default_rng(0)
+    columns = dynamic_columns()
+    features = rng.uniform(-1, 1, (count, len(columns)))
+    labels = rng.choice(["J", "Z", "noise"], count)
+    return columns, features, labels
+
+def _write_csv(path, columns, features, labels):
+    with open(path, mode='w', newline='') as f:
+        csv.writer(f).writerow(['label'] + columns)
+
+    # one open/append per sample, like the recorder used to
+    for label, row in zip(labels, features):
+        with open(path, mode='a', newline='') as f:
+            csv.writer(f).writerow([label] + row.tolist())
+
+def _write_binary(path, columns, features, labels):
+    dataset = GestureDataset.create(path, columns)
+    for label, row in zip(labels, features):
+        dataset.append(label, row)
+
+def _size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+def _load_in_child(path):
+    """Loads the training set in a fresh process, returns (load seconds, peak RSS in MiB, RSS before the load)"""
+
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_dataset", "--load", path],
+        capture_output=True, text=True, check=True,
+    ).stdout.splitlines()[-1].split()
+    return float(output[0]), float(output[1]), float(output[2])
+
+def _child_load(path):
+    # ru_maxrss is in KiB on Linux
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    start = time.perf_counter()
+    X, y, _ = load_training_data(path)
+    # touch every row, a mapped file is only read when used
+    X.sum()
+    elapsed = time.perf_counter() - start
+    print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, baseline)
+
+def main(count):
+    columns, features, labels = _samples(count)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        binary_path = os.path.join(tmp, "dynamic")
+        csv_path = legacy_csv_path(os.path.join(tmp, "legacy"))
+
+        print(f"{count} dynamic samples of {len(columns)} features")
+        for name, write, path, load_path in (
+            ("csv", _write_csv, csv_path, os.path.join(tmp, "legacy")),
+            ("binary", _write_binary, binary_path, binary_path),
+        ):
+            start = time.perf_counter()
+            write(path, columns, features, labels)
+            write_s = time.perf_counter() - start
+
+            load_s, rss, baseline = _load_in_child(load_path)
+            print(f"  {name:6}: write {count / write_s:8.0f} samples/s | {_size(path) / 2**20:7.1f} MiB"
+                  f" | load {load_s * 1000:8.1f} ms | peak RSS {rss:6.1f} MiB (+{rss - baseline:.1f} for the load)")
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--load":
+        _child_load(sys.argv[2])
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,116 @@
+"""
+Compares the dynamic featurizers (see preprocess/temporal_features.py) against the raw window layout
+Synthetic dynamic gestures: a hand whose fingers bend and move in a gesture specific rhythm, with noise,
+a varying hand size and frames where the hand is lost. The recorded dynamic dataset is added when it has
+enough samples. For every featurizer: features per sample, cross-validated accuracy, training time,
+model size and the single-sample latency of featurizing plus predicting, as the predictor does it
+Run from src/: python -m benchmarks.bench_featurizer [samples per gesture]
+"""
+
+import sys
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold
+
+from ml.forest import CompiledForest
+from ml.train.dataset import load_training_data
+from preprocess import process_batch, make_featurizer, FEATURIZERS
+from utils import GESTURE_WINDOW, DYNAMIC_FEATURE_SEGMENTS, DYNAMIC_PCA_COMPONENTS, DYNAMIC_GESTURE_TRAINING_DATA_PATH
+
+GESTURES = 6
+FOLDS = 5
+LATENCY_RUNS = 300
+
+def _synthetic_windows(per_gesture, rng):
+    n = GESTURES * per_gesture
+    labels = np.repeat(np.arange(GESTURES), per_gesture)
+
+    # the same open hand for every gesture, 21 landmarks around the wrist
+    base = rng.uniform(-0.1, 0.1, (21, 2)) + np.array([0.5, 0.5])
+    # each gesture moves its landmarks with its own amplitude, frequency and phase
+    amplitude = rng.uniform(0, 0.015, (GESTURES, 21, 2))
+    frequency = rng.uniform(0.5, 2.0, GESTURES)
+    phase = rng.uniform(0, 2 * np.pi, (GESTURES, 21, 2))
+
+    t = np.linspace(0, 2 * np.pi, GESTURE_WINDOW)
+    motion = amplitude[labels, None] * np.sin(
+        frequency[labels, None, None, None] * t[None, :, None, None] + phase[labels, None]
+    )
+    scale = rng.uniform(0.7, 1.3, (n, 1, 1, 1))
+    hand = base + (motion + rng.normal(0, 0.01, motion.shape)) * scale
+
+    coords = np.zeros((n, GESTURE_WINDOW, 2, 21, 3))
+    coords[:, :, 0, :, :2] = hand
+    present = np.zeros((n, GESTURE_WINDOW, 2), dtype=bool)
+    present[:, :, 0] = True
+    # the hand is lost for a few frames in a third of the samples
+    for row in rng.choice(n, n // 3, replace=False):
+        start = rng.integers(GESTURE_WINDOW - 5)
+        present[row, start:start + rng.integers(1, 6), 0] = False
+    is_right = np.ones_like(present)
+
+    frames = process_batch(
+        coords.reshape(-1, 2, 21, 3), present.reshape(-1, 2), is_right.reshape(-1, 2)
+    )
+    return frames.reshape(n, -1), np.array([f"gesture_{label}" for label in labels])
+
+def _evaluate(name, X, y):
+    folds = StratifiedKFold(n_splits=min(FOLDS, np.bincount(np.unique(y, return_inverse=True)[1]).min()),
+                            shuffle=True, random_state=0)
+    accuracies, fit_times, latencies, sizes = [], [], [], []
+
+    for train_rows, test_rows in folds.split(X, y):
+        featurizer = make_featurizer(name, GESTURE_WINDOW, DYNAMIC_FEATURE_SEGMENTS, DYNAMIC_PCA_COMPONENTS)
+
+        start = time.perf_counter()
+        featurizer.fit(X[train_rows])
+        model = RandomForestClassifier(n_estimators=100, random_state=0)
+        model.fit(featurizer.transform(X[train_rows]), y[train_rows])
+        fit_times.append(time.perf_counter() - start)
+
+        # the raw layout stays featurizer-less, like the models train.py saves
+        forest = CompiledForest.from_sklearn(model, None if name == "raw" else featurizer)
+        accuracies.append(np.mean(forest.predict(X[test_rows]) == y[test_rows]))
+        sizes.append(forest.nbytes)
+
+        sample = X[test_rows[:1]]
+        forest.predict(sample)
+        runs = []
+        for _ in range(LATENCY_RUNS):
+            start = time.perf_counter()
+            forest.predict(sample)
+            runs.append(time.perf_counter() - start)
+        latencies.append(np.median(runs))
+
+    return {
+        "features": featurizer.n_features,
+        "accuracy": float(np.mean(accuracies)),
+        "fit_s": float(np.mean(fit_times)),
+        "latency_ms": float(np.median(latencies)) * 1000,
+        "size_kib": float(np.mean(sizes)) / 1024,
+    }
+
+def report(title, X, y):
+    print(f"{title}: {len(X)} samples, {len(np.unique(y))} gestures")
+    raw_features = X.shape[1]
+    for name in FEATURIZERS:
+        result = _evaluate(name, X, y)
+        print(f"  {name:13} {result['features']:5} features ({raw_features / result['features']:5.1f}x smaller)"
+              f" | accuracy {result['accuracy'] * 100:6.2f}% | fit {result['fit_s']:6.2f} s"
+              f" | latency {result['latency_ms']:6.3f} ms | {result['size_kib']:7.0f} KiB")
+
+def main(per_gesture):
+    X, y = _synthetic_windows(per_gesture, np.random.default_rng(0))
+    report("synthetic", X, y)
+
+    try:
+        X, y, _ = load_training_data(DYNAMIC_GESTURE_TRAINING_DATA_PATH)
+    except FileNotFoundError:
+        return
+    if len(X) and np.unique(y, return_counts=True)[1].min() >= 2:
+        report("recorded", np.asarray(X), np.asarray(y))
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
@@ -0,0 +1,73 @@
+"""
+Compares the compiled forest evaluator against scikit-learn on forests trained like the shipped models
+Checks the predictions are identical and reports single sample and batch latency, and the artifact load time
+Run from src/: python -m benchmarks.bench_forest
+"""
+
+import os
+import tempfile
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from ml.forest import CompiledForest
+from ml.train.dataset import load_training_data
+from utils import (
+    STATIC_GESTURE_TRAINING_DATA_PATH,
+    DYNAMIC_GESTURE_TRAINING_DATA_PATH,
+)
+
+def _per_call_us(fn, X, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(X[i % len(X)][np.newaxis])
+    return (time.perf_counter() - start) / calls * 1e6
+
+def _batch_ms(fn, X, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(X)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def _load_ms(path, repeat=20):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        CompiledForest.load(path)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def _bench(name, data_path):
+    X, y, _ = load_training_data(data_path)
+    model = RandomForestClassifier(random_state=0).fit(X, y)
+    compiled = CompiledForest.from_sklearn(model)
+
+    # training rows, jittered training rows and uniform noise
+    rng = np.random.default_rng(0)
+    X = np.concatenate([X, X + rng.normal(0, 0.05, X.shape), rng.uniform(-1, 1, (1000, X.shape[1]))])
+
+    same_proba = np.array_equal(model.predict_proba(X), compiled.predict_proba(X))
+    same_labels = np.array_equal(model.predict(X).astype(str), compiled.predict(X).astype(str))
+
+    print(f"{name}: {compiled.n_trees} trees, {len(compiled.feature)} nodes, depth {compiled.max_depth}, "
+          f"{X.shape[1]} features")
+    print(f"  identical probabilities: {same_proba}, identical predictions: {same_labels} ({len(X)} samples)")
+    print(f"  single sample: sklearn {_per_call_us(model.predict, X, 100):9.1f} us"
+          f" | compiled {_per_call_us(compiled.predict, X, 2000):9.1f} us")
+    print(f"  batch of {len(X)}: sklearn {_batch_ms(model.predict, X):9.1f} ms"
+          f" | compiled {_batch_ms(compiled.predict, X):9.1f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"{name}.mira")
+        compiled.save(path, {})
+        print(f"  artifact: {os.path.getsize(path) / 1024:.0f} KiB, mapped in {_load_ms(path):.2f} ms")
+
+def main():
+    _bench("static", STATIC_GESTURE_TRAINING_DATA_PATH)
+    _bench("dynamic", DYNAMIC_GESTURE_TRAINING_DATA_PATH)
+
+if __name__ == "__main__":
+    main()
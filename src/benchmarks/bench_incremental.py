@@ -0,0 +1,78 @@
+"""
+Compares a full retraining of the static model against an incremental update with newly recorded samples
+Synthetic static samples (clustered per gesture) are written to a temporary dataset, a model is fully trained,
+then NEW_FRACTION more samples are appended and the model is updated, and finally fully retrained on everything
+Run from src/: python -m benchmarks.bench_incremental [rows ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+
+import numpy as np
+
+from ml.artifact import read_metadata
+from ml.forest import CompiledForest
+from ml.train.dataset import GestureDataset, static_columns
+from ml.train.train import fit_model
+
+# share of new samples recorded since the last training
+NEW_FRACTION = 0.01
+LABELS = [f"gesture_{i}" for i in range(8)]
+
+def _append(dataset, rng, centers, count):
+    label_ids = rng.integers(len(LABELS), size=count)
+    features = centers[label_ids] + rng.normal(0, 2.0, (count, centers.shape[1]))
+    dataset.append_rows([LABELS[i] for i in label_ids], features)
+
+def _timed_fit(model_path, data_path, full):
+    start = time.perf_counter()
+    # the training prints every step, only the timings matter here
+    with redirect_stdout(StringIO()):
+        score = fit_model(model_path, data_path, "static", 1, full=full)
+    return time.perf_counter() - start, score
+
+def main(row_counts):
+    rng = np.random.default_rng(0)
+    columns = static_columns()
+    centers = rng.normal(0, 1, (len(LABELS), len(columns)))
+
+    for rows in row_counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_path = os.path.join(tmp, "static")
+            model_path = os.path.join(tmp, "static.mira")
+
+            dataset = GestureDataset.create(data_path, columns)
+            _append(dataset, rng, centers, rows)
+            dataset.sync()
+            _timed_fit(model_path, data_path, full=True)
+
+            new_rows = max(1, int(rows * NEW_FRACTION))
+            _append(dataset, rng, centers, new_rows)
+            dataset.close()
+
+            update_s, _ = _timed_fit(model_path, data_path, full=False)
+            metadata = read_metadata(model_path)
+            update_trees = metadata["n_trees"]
+            update_accuracy = _held_out_accuracy(model_path, rng, centers)
+
+            full_s, _ = _timed_fit(model_path, data_path, full=True)
+            full_accuracy = _held_out_accuracy(model_path, rng, centers)
+
+            print(f"{rows} rows + {new_rows} new:"
+                  f" incremental {update_s:7.2f} s ({update_trees} trees, accuracy {update_accuracy * 100:.1f}%)"
+                  f" | full {full_s:7.2f} s (accuracy {full_accuracy * 100:.1f}%)"
+                  f" | {full_s / update_s:.1f}x")
+
+def _held_out_accuracy(model_path, rng, centers, count=2000):
+    forest, _ = CompiledForest.load(model_path)
+    label_ids = rng.integers(len(LABELS), size=count)
+    X = centers[label_ids] + rng.normal(0, 2.0, (count, centers.shape[1]))
+    predicted = forest.predict(X)
+    return float(np.mean(predicted == np.array(LABELS)[label_ids]))
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000])
@@ -0,0 +1,110 @@
+"""
+Compares the vectorized landmark preprocessing against the original pure python implementation
+Run from src/: python -m benchmarks.bench_preprocess
+"""
+
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from benchmarks.landmarks import random_batch
+from preprocess import process_dataset, process_batch, LandmarkFrame
+
+# ---- original implementation, walking mediapipe style results objects one attribute at a time ----
+
+def _reference_zero_wrist(hand_landmarks):
+    wrist_x = hand_landmarks.landmark[0].x
+    wrist_y = hand_landmarks.landmark[0].y
+    return [[lm.x - wrist_x, lm.y - wrist_y] for lm in hand_landmarks.landmark]
+
+def _reference_normalize_size(landmarks):
+    max_val = 0
+    result = []
+    for lm in landmarks:
+        if (abs(lm[0]) > max_val):
+            max_val = abs(lm[0])
+        if (abs(lm[1]) > max_val):
+            max_val = abs(lm[1])
+    if max_val == 0:
+        max_val = 1
+    for lm in landmarks:
+        result.append(lm[0] / max_val)
+        result.append(lm[1] / max_val)
+    return result
+
+def _reference_process_dataset(results):
+    left_hand_data = [0.0] * 42
+    right_hand_data = [0.0] * 42
+
+    if results.multi_hand_landmarks:
+        for landmarks, handedness in zip(results.multi_hand_landmarks, results.multi_handedness):
+            flat_coords = _reference_normalize_size(_reference_zero_wrist(landmarks))
+            if handedness.classification[0].label == "Right":
+                left_hand_data = flat_coords
+            else:
+                right_hand_data = flat_coords
+
+    return left_hand_data + right_hand_data
+
+# ---- synthetic input ----
+
+def _as_results(coords, present, is_right):
+    """mediapipe shaped results object of one frame"""
+
+    hands, handedness = [], []
+    for hand in range(2):
+        if not present[hand]:
+            continue
+        hands.append(SimpleNamespace(landmark=[SimpleNamespace(x=p[0], y=p[1], z=p[2]) for p in coords[hand]]))
+        label = "Right" if is_right[hand] else "Left"
+        handedness.append(SimpleNamespace(classification=[SimpleNamespace(label=label)]))
+    return SimpleNamespace(multi_hand_landmarks=hands or None, multi_handedness=handedness or None)
+
+def _per_call_us(fn, items, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    return best / len(items) * 1e6
+
+def main():
+    rng = np.random.default_rng(0)
+
+    # per frame, the live inference path
+    coords, present, is_right = random_batch(rng, 2000)
+    results = [_as_results(*row) for row in zip(coords, present, is_right)]
+    frames = [LandmarkFrame(*row) for row in zip(coords, present, is_right)]
+
+    for res, frame in zip(results[:200], frames[:200]):
+        assert np.array_equal(_reference_process_dataset(res), process_dataset(frame))
+
+    print("per frame:")
+    print(f"  reference process_dataset(results): {_per_call_us(_reference_process_dataset, results):8.2f} us")
+    print(f"  process_dataset(LandmarkFrame):     {_per_call_us(process_dataset, frames, repeat=1):8.2f} us")
+
+    # whole datasets, the recorder/training path
+    rows = 100_000
+    coords, present, is_right = random_batch(rng, rows)
+    results = [_as_results(*row) for row in zip(coords, present, is_right)]
+
+    start = time.perf_counter()
+    reference = [_reference_process_dataset(res) for res in results]
+    reference_time = time.perf_counter() - start
+
+    batch_time = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        batch = process_batch(coords, present, is_right)
+        batch_time = min(batch_time, time.perf_counter() - start)
+
+    assert np.array_equal(np.array(reference), batch)
+
+    print(f"{rows} rows:")
+    print(f"  reference: {reference_time:8.3f} s ({rows / reference_time:12,.0f} rows/s)")
+    print(f"  batch:     {batch_time:8.3f} s ({rows / batch_time:12,.0f} rows/s)")
+
+if __name__ == "__main__":
+    main()
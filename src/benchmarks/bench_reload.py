@@ -0,0 +1,87 @@
+"""
+Measures the pause in the predictions around a model hot reload, through the live GUI path
+A PredictionsWidget (offscreen) gets a synthetic landmark stream at the camera rate, like MainWindow feeds it,
+so the predictions go through the throttle of predict_and_display and the InferenceWorker. Every few seconds
+the models are reloaded (ModelManager). For each reload: its duration, the gap between the last prediction
+on the old models and the first on the new ones, and that gap against the throttle interval of the widget
+Run from src/: python -m benchmarks.bench_reload [--reloads 5] [--every 3.0]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QApplication
+
+from benchmarks.landmarks import synthetic_stream, fresh_copies, FPS
+from ui.widgets.predictions_widget import PredictionsWidget
+
+def main():
+    parser = argparse.ArgumentParser(description="prediction gap around a model hot reload in the GUI")
+    parser.add_argument("--reloads", type=int, default=5)
+    parser.add_argument("--every", type=float, default=3.0, help="seconds between two reloads")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    widget = PredictionsWidget()
+    predictor = widget._predictor
+    if predictor.static_model is None or predictor.dynamic_model is None:
+        print("ERROR: the models are not trained, run the training first")
+        return 1
+
+    interval_ms = 1000 / PredictionsWidget._MAX_PREDICTIONS_PER_SECOND
+    duration = (args.reloads + 1) * args.every
+    frames = fresh_copies(synthetic_stream("static_hold", int(duration * FPS) + FPS))
+
+    # times the results reach the GUI thread, and the reports of every reload
+    shown, reloads = [], []
+    widget.prediction_ready.connect(lambda *_: shown.append(time.perf_counter()))
+    widget.models_reloaded.connect(lambda report: reloads.append((time.perf_counter(), report, predictor.swap_gap_ms)))
+
+    start = time.perf_counter()
+    position = iter(frames)
+
+    def feed():
+        frame = next(position, None)
+        if frame is None or time.perf_counter() - start > duration:
+            timer.stop()
+            QTimer.singleShot(int(interval_ms * 2), app.quit)
+            return
+        frame.timestamp = time.perf_counter()
+        # the same calls as MainWindow on every camera frame
+        predictor.update(frame)
+        widget.predict_and_display(frame)
+
+    timer = QTimer()
+    timer.timeout.connect(feed)
+    timer.start(1000 // FPS)
+    for i in range(1, args.reloads + 1):
+        QTimer.singleShot(int(i * args.every * 1000), widget.reload_models)
+    app.exec()
+    widget.shutdown()
+
+    shown = np.array(shown)
+    intervals = np.diff(shown) * 1000
+    # the throttle only lets a frame through, so the usual interval is rounded up to the next camera frame
+    usual_ms = np.percentile(intervals, 50)
+    print(f"predictions shown: {len(shown)} | throttle interval {interval_ms:.0f} ms | "
+          f"interval p50 {usual_ms:.1f} ms, max {intervals.max():.1f} ms")
+    # a gap is only known once the first prediction on the new models ran, so each reload reports the one before
+    gaps = [gap_ms for _, _, gap_ms in reloads[1:]] + [widget._model_manager.stats()["gap_ms"]]
+    for (reloaded_at, report, _), gap_ms in zip(reloads, gaps):
+        # the GUI side view: the displayed predictions around the moment the new models were in place
+        before = shown[shown <= reloaded_at]
+        after = shown[shown > reloaded_at]
+        shown_gap = (after[0] - before[-1]) * 1000 if len(before) and len(after) else float("nan")
+        print(f"  reload {report['reload_ms']:6.1f} ms | predictor gap {gap_ms:6.1f} ms "
+              f"({gap_ms - interval_ms:+6.1f} ms against the throttle, {gap_ms - usual_ms:+5.1f} ms against p50) | "
+              f"shown gap {shown_gap:6.1f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
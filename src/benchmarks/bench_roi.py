@@ -0,0 +1,89 @@
+"""
+Compares MediaPipe on a crop around the tracked hands (ROI tracking, see capture/vision.py) with the full frame mode,
+on the images of a recorded session (python main.py --record DIR). Both modes see every frame in order, as the camera
+would give it to them. For each mode: the per frame inference time and the frames with hands, for the ROI mode the
+share of frames run on a crop. The landmarks of the ROI mode are compared with the full frame ones, in pixels
+of the recorded frames, over the hands both modes found (matched by their wrists)
+Run from src/: python -m benchmarks.bench_roi SESSION [--inference-width 480] [--padding 0.5] [--interval 10]
+"""
+
+import argparse
+
+import numpy as np
+
+from capture.session import SessionReader
+from capture.vision import Vision
+from utils import INFERENCE_WIDTH, ROI_PADDING, ROI_FULL_FRAME_INTERVAL
+
+def _run(vision: Vision, session: SessionReader) -> tuple:
+    """:return tuple: (per frame inference ms, LandmarkFrame per frame, None for frames recorded without image)"""
+
+    times, frames = [], []
+    image = np.empty(session.frame_shape, dtype=np.uint8)
+    for i in range(len(session)):
+        if session.image(i, image) is None:
+            frames.append(None)
+            continue
+        frames.append(vision.process_frame(image, session.frames["timestamp"][i]))
+        times.append(vision.last_inference_ms)
+    return np.array(times), frames
+
+def _landmark_errors(full_frames: list, roi_frames: list, width: int, height: int) -> tuple:
+    """:return tuple: (pixel distance of every matched landmark, frames where the modes found a different number of hands)"""
+
+    errors, disagreements = [], 0
+    scale = np.array([width, height])
+    for full, roi in zip(full_frames, roi_frames):
+        if full is None:
+            continue
+        if full.num_hands != roi.num_hands:
+            disagreements += 1
+        for hand in np.flatnonzero(roi.present):
+            candidates = np.flatnonzero(full.present)
+            if not len(candidates):
+                continue
+            wrist_distance = np.linalg.norm(full.coords[candidates, 0, :2] - roi.coords[hand, 0, :2], axis=1)
+            match = candidates[np.argmin(wrist_distance)]
+            errors.extend(np.linalg.norm((full.coords[match, :, :2] - roi.coords[hand, :, :2]) * scale, axis=1))
+    return np.array(errors), disagreements
+
+def _print_mode(name: str, times: np.ndarray, frames: list):
+    with_hands = sum(1 for frame in frames if frame is not None and frame.has_hands)
+    print(f"  {name:10} mean {times.mean():6.2f} ms | p50 {np.percentile(times, 50):6.2f} ms | "
+          f"p95 {np.percentile(times, 95):6.2f} ms | frames with hands {with_hands}")
+
+def main():
+    parser = argparse.ArgumentParser(description="ROI tracking against full frame MediaPipe on a recorded session")
+    parser.add_argument("session")
+    parser.add_argument("--inference-width", type=int, default=INFERENCE_WIDTH, help="0 runs on the full resolution")
+    parser.add_argument("--padding", type=float, default=ROI_PADDING)
+    parser.add_argument("--interval", type=int, default=ROI_FULL_FRAME_INTERVAL)
+    args = parser.parse_args()
+
+    session = SessionReader(args.session)
+    height, width = session.frame_shape[:2]
+    inference_width = args.inference_width or None
+
+    full_times, full_frames = _run(Vision(inference_width, draw=False), session)
+    roi_vision = Vision(inference_width, draw=False, roi_tracking=True,
+                        roi_padding=args.padding, full_frame_interval=args.interval)
+    roi_times, roi_frames = _run(roi_vision, session)
+
+    if not len(full_times):
+        print(f"{args.session} was recorded without images, nothing to compare")
+        return
+
+    print(f"{args.session}: {len(full_times)} frames of {width}x{height}, inference width {inference_width or 'full'}")
+    _print_mode("full", full_times, full_frames)
+    _print_mode("roi", roi_times, roi_frames)
+    print(f"  roi: {roi_vision.roi_share * 100:.0f}% of the MediaPipe runs on a crop, "
+          f"{full_times.mean() / roi_times.mean():.2f}x the full frame speed")
+
+    errors, disagreements = _landmark_errors(full_frames, roi_frames, width, height)
+    if len(errors):
+        print(f"  landmark error against full frame: mean {errors.mean():.2f} px | p95 {np.percentile(errors, 95):.2f} px"
+              f" | max {errors.max():.2f} px")
+    print(f"  frames where the modes found a different number of hands: {disagreements}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+MediaPipe shaped hand landmark streams for the offline benchmarks, synthetic or recorded
+
+A synthetic hand is built from a joint skeleton: fingers are chains of segments that bend towards the palm
+(and the camera, so they shorten on screen like a real curling finger), the whole hand is scaled, rolled
+and placed in normalized image coordinates. Scenarios animate it the way the pipeline sees it live.
+Streams are lists of LandmarkFrame, saved and loaded as .npz files (coords, present, is_right, timestamps),
+recorded sessions (python main.py --record DIR) load as streams too
+"""
+
+import os
+
+import numpy as np
+
+from preprocess import LandmarkFrame
+from preprocess.landmark_frame import MAX_HANDS, NUM_LANDMARKS
+
+FPS = 30
+
+# thumb, index, middle, ring, pinky: first joint relative to the wrist (wrist to middle knuckle = 1),
+# direction in degrees from "up" and segment lengths
+_FINGER_BASES = np.array([[-0.25, -0.15], [-0.3, -0.95], [0.0, -1.0], [0.25, -0.95], [0.45, -0.8]])
+_FINGER_ANGLES = np.radians([-50.0, -10.0, 0.0, 10.0, 22.0])
+_FINGER_SEGMENTS = np.array([
+    [0.35, 0.30, 0.25],
+    [0.45, 0.27, 0.22],
+    [0.50, 0.30, 0.24],
+    [0.45, 0.28, 0.22],
+    [0.35, 0.20, 0.18],
+])
+# bend of each joint of a fully curled finger
+_JOINT_BENDS = np.radians([70.0, 90.0, 60.0])
+
+OPEN_HAND = np.zeros(5)
+FIST = np.ones(5)
+# thumb and index out, the others curled
+POINTING = np.array([0.0, 0.0, 1.0, 1.0, 1.0])
+VICTORY = np.array([0.6, 0.0, 0.0, 1.0, 1.0])
+
+SCENARIOS = ("static_hold", "swipe", "pinch", "finger_wiggle", "missing_hands", "two_hands")
+
+def hand_landmarks(curl, center=(0.5, 0.6), scale=0.1, roll=0.0, mirrored=False) -> np.ndarray:
+    """
+    One hand in MediaPipe layout
+
+    :param curl: (5,) curl of each finger, 0 stretched to 1 fully curled
+    :param center: wrist position in normalized image coordinates
+    :param scale: wrist to middle knuckle distance in normalized image coordinates
+    :param roll: rotation of the hand in the image plane, radians
+    :param mirrored: a left hand instead of a right one
+
+    :return np.ndarray: (21, 3) x, y, z landmarks
+    """
+
+    points = np.zeros((NUM_LANDMARKS, 3))
+    for finger in range(5):
+        position = np.array([*_FINGER_BASES[finger], 0.0])
+        points[1 + 4 * finger] = position
+        bend = 0.0
+        for joint in range(3):
+            bend += curl[finger] * _JOINT_BENDS[joint]
+            angle = _FINGER_ANGLES[finger]
+            direction = np.array([np.sin(angle) * np.cos(bend), -np.cos(angle) * np.cos(bend), -np.sin(bend)])
+            position = position + _FINGER_SEGMENTS[finger, joint] * direction
+            points[2 + 4 * finger + joint] = position
+
+    if mirrored:
+        points[:, 0] = -points[:, 0]
+
+    rotation = np.array([[np.cos(roll), -np.sin(roll)], [np.sin(roll), np.cos(roll)]])
+    points[:, :2] = points[:, :2] @ rotation.T
+    points *= scale
+    points[:, :2] += center
+    return points
+
+def _pinched(landmarks, amount):
+    # thumb and index tips (and the joints before) pulled towards each other
+    middle = (landmarks[4] + landmarks[8]) / 2
+    for thumb, index, weight in ((4, 8, 1.0), (3, 7, 0.5)):
+        landmarks[thumb] += (middle - landmarks[thumb]) * amount * weight
+        landmarks[index] += (middle - landmarks[index]) * amount * weight
+    return landmarks
+
+def _hands_at(scenario, t, rng):
+    """[(landmarks, is_right)] of the frame at t seconds, an empty list for a frame without hands"""
+
+    # landmark detection noise, about half a pixel at 640x480
+    jitter = lambda hand: hand + rng.normal(0, 0.0005, hand.shape)
+
+    if scenario == "static_hold":
+        return [(jitter(hand_landmarks(POINTING, roll=0.1)), True)]
+
+    if scenario == "swipe":
+        # left to right in 0.7 s, then the hand comes back
+        phase = (t % 1.4) / 0.7
+        x = 0.2 + 0.6 * (phase if phase <= 1 else 2 - phase)
+        return [(jitter(hand_landmarks(OPEN_HAND, center=(x, 0.6))), True)]
+
+    if scenario == "pinch":
+        amount = 0.5 - 0.5 * np.cos(2 * np.pi * t)
+        return [(jitter(_pinched(hand_landmarks(VICTORY * 0.3), amount)), True)]
+
+    if scenario == "finger_wiggle":
+        curl = 0.5 + 0.4 * np.sin(2 * np.pi * 3 * t + np.arange(5))
+        return [(jitter(hand_landmarks(curl)), True)]
+
+    if scenario == "missing_hands":
+        # the hand is lost every other half second
+        if int(t * 2) % 2:
+            return []
+        return [(jitter(hand_landmarks(FIST, roll=-0.2)), True)]
+
+    if scenario == "two_hands":
+        spread = 0.1 + 0.15 * (0.5 - 0.5 * np.cos(2 * np.pi * 0.5 * t))
+        return [
+            (jitter(hand_landmarks(POINTING, center=(0.5 + spread, 0.65))), True),
+            (jitter(hand_landmarks(POINTING, center=(0.5 - spread, 0.65), mirrored=True)), False),
+        ]
+
+    raise ValueError(f"Unknown scenario {scenario!r}, expected one of {SCENARIOS}")
+
+def synthetic_stream(scenario: str = "mixed", frames: int = 600, seed: int = 0, segment: int = 2 * FPS) -> list:
+    """
+    A stream of landmark frames at FPS, timestamps starting at 0
+
+    :param scenario: one of SCENARIOS or "mixed", every scenario in turn for segment frames
+    :param frames: length of the stream
+    :param seed: seed of the landmark jitter
+    :param segment: frames per scenario of a mixed stream
+
+    :return list: the LandmarkFrames
+    """
+
+    rng = np.random.default_rng(seed)
+    stream = []
+    for i in range(frames):
+        current = SCENARIOS[(i // segment) % len(SCENARIOS)] if scenario == "mixed" else scenario
+        t = i / FPS
+
+        frame = LandmarkFrame.empty(t)
+        for slot, (landmarks, is_right) in enumerate(_hands_at(current, t, rng)[:MAX_HANDS]):
+            frame.coords[slot] = landmarks
+            frame.present[slot] = True
+            frame.is_right[slot] = is_right
+        stream.append(frame)
+
+    return stream
+
+def random_batch(rng: np.random.Generator, n: int) -> tuple:
+    """
+    Unstructured landmark rows for the preprocessing checks, float32 precision as MediaPipe gives them,
+    no, one or two hands with any handedness
+
+    :return tuple: (n, 2, 21, 3) coords, (n, 2) present and (n, 2) is_right, absent hands zeroed
+    """
+
+    coords = rng.random((n, MAX_HANDS, NUM_LANDMARKS, 3)).astype(np.float32).astype(np.float64)
+    present = np.arange(MAX_HANDS) < rng.integers(0, MAX_HANDS + 1, n)[:, None]
+    is_right = rng.random((n, MAX_HANDS)) < 0.5
+    coords[~present] = 0.0
+    return coords, present, is_right
+
+def fresh_copies(stream: list) -> list:
+    """New frames with the same landmarks, without the values a previous run cached on them"""
+
+    return [LandmarkFrame(frame.coords, frame.present, frame.is_right, frame.timestamp) for frame in stream]
+
+def save_stream(path: str, stream: list):
+    np.savez_compressed(
+        path,
+        coords=np.stack([frame.coords for frame in stream]),
+        present=np.stack([frame.present for frame in stream]),
+        is_right=np.stack([frame.is_right for frame in stream]),
+        timestamps=np.array([frame.timestamp for frame in stream]),
+    )
+
+def load_stream(path: str) -> list:
+    """Loads a stream written by save_stream(), or the landmarks of a recorded session directory"""
+
+    if os.path.isdir(path):
+        from capture.session import SessionReader
+        return SessionReader(path).landmark_frames()
+
+    with np.load(path) as data:
+        coords, present, is_right, timestamps = data["coords"], data["present"], data["is_right"], data["timestamps"]
+
+    return [
+        LandmarkFrame(coords[i].astype(np.float64), present[i].astype(bool), is_right[i].astype(bool), float(timestamps[i]))
+        for i in range(len(timestamps))
+    ]
@@ -0,0 +1,261 @@
+"""
+Offline microbenchmarks of the pipeline after the vision stage, no webcam needed
+Every stage is driven on its own over a landmark stream (synthetic, see benchmarks/landmarks.py, or recorded)
+and timed call by call: latency percentiles in microseconds and throughput in calls per second of stage time
+
+Run from src/:
+    python -m benchmarks.suite [--scenario mixed|static_hold|...] [--frames 3000] [--input stream.npz]
+                               [--stages classifier.update,...] [--json results.json]
+                               [--compare baseline.json] [--tolerance 0.15] [--save-stream stream.npz]
+
+--json writes the results with the commit, python and numpy versions, so runs of different commits
+can be compared: --compare prints the change of every stage against a saved run and exits with 1
+when the p50 latency of a stage grew by more than the tolerance
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.landmarks import synthetic_stream, fresh_copies, load_stream, save_stream, SCENARIOS
+from ml.classifier import Classifier
+from ml.inference_worker import InferenceJob
+from ml.predictor import Predictor
+from preprocess import process_dataset, process_frames
+from utils import STATIC_MODEL_PATH, DYNAMIC_MODEL_PATH, GESTURE_WINDOW
+
+def _timed(fn, items) -> np.ndarray:
+    """ns taken by fn(item) for every item"""
+
+    durations = np.empty(len(items), dtype=np.int64)
+    clock = time.perf_counter_ns
+    for i, item in enumerate(items):
+        start = clock()
+        fn(item)
+        durations[i] = clock() - start
+    return durations
+
+# ---- stages, each takes the stream and returns the per call ns ----
+
+def _preprocess_frame(stream):
+    return _timed(process_dataset, fresh_copies(stream))
+
+def _preprocess_window(stream):
+    # the recorder processes a whole dynamic gesture at once
+    frames = fresh_copies(stream)
+    windows = [frames[i:i + GESTURE_WINDOW] for i in range(0, len(frames) - GESTURE_WINDOW + 1, GESTURE_WINDOW)]
+    return _timed(process_frames, windows)
+
+def _classifier_update(stream):
+    return _timed(Classifier().update, fresh_copies(stream))
+
+def _classifier_step(method):
+    def run(stream):
+        classifier = Classifier()
+        durations = []
+        for frame in fresh_copies(stream):
+            classifier.update(frame)
+            durations.append(_timed(lambda _: getattr(classifier, method)(), [None])[0])
+        return np.array(durations)
+    return run
+
+def _predictor():
+    predictor = Predictor(STATIC_MODEL_PATH, DYNAMIC_MODEL_PATH)
+    if predictor.static_model is None or predictor.dynamic_model is None:
+        raise RuntimeError("the models could not be loaded, train them first")
+    for model in (predictor.static_model, predictor.dynamic_model):
+        if hasattr(model, "warm_up"):
+            model.warm_up()
+    return predictor
+
+def _predictor_update(stream):
+    return _timed(_predictor().update, fresh_copies(stream))
+
+def _predictor_prepare(stream):
+    predictor = _predictor()
+    durations = []
+    for frame in fresh_copies(stream):
+        predictor.update(frame)
+        durations.append(_timed(lambda _: predictor.prepare(frame.timestamp), [None])[0])
+    return np.array(durations)
+
+def _predictor_run_job(stream):
+    # only the frames that make a model run, as the inference worker sees them
+    predictor = _predictor()
+    jobs = []
+    for frame in fresh_copies(stream):
+        predictor.update(frame)
+        job = predictor.prepare(frame.timestamp)
+        if isinstance(job, InferenceJob):
+            jobs.append(job)
+    return _timed(predictor.run_job, jobs)
+
+def _predictor_predict(stream):
+    # the whole per frame path: window update, movement type and model
+    predictor = _predictor()
+
+    def step(frame):
+        predictor.update(frame)
+        predictor.predict(frame)
+
+    return _timed(step, fresh_copies(stream))
+
+class _NullExecutor:
+    """Takes the mapper's OS input commands without doing anything"""
+
+    def __getattr__(self, name):
+        return lambda *args: None
+
+def _command_mapper(stream):
+    from commands.mapper import CommandMapper
+
+    mapper = CommandMapper(_NullExecutor())
+    # as if the activation gesture was done, every frame goes through the mouse/scroll/volume handling
+    mapper.is_active = True
+    try:
+        return _timed(mapper.process_results, fresh_copies(stream))
+    finally:
+        mapper.shutdown()
+
+STAGES = {
+    "preprocess.process_dataset": _preprocess_frame,
+    "preprocess.process_frames": _preprocess_window,
+    "classifier.update": _classifier_update,
+    "classifier.calculate_movement_type": _classifier_step("calculate_movement_type"),
+    "classifier.finger_movement": _classifier_step("finger_movement"),
+    "predictor.update": _predictor_update,
+    "predictor.prepare": _predictor_prepare,
+    "predictor.run_job": _predictor_run_job,
+    "predictor.predict": _predictor_predict,
+    "commands.process_results": _command_mapper,
+}
+
+def summarize(durations: np.ndarray) -> dict:
+    us = durations / 1000
+    total_s = durations.sum() / 1e9
+    return {
+        "calls": int(len(us)),
+        "mean_us": float(us.mean()),
+        "p50_us": float(np.percentile(us, 50)),
+        "p90_us": float(np.percentile(us, 90)),
+        "p99_us": float(np.percentile(us, 99)),
+        "max_us": float(us.max()),
+        "calls_per_s": float(len(us) / total_s) if total_s > 0 else 0.0,
+    }
+
+def run(stream: list, stages: list, repeat: int = 3) -> dict:
+    """
+    Times every stage over the stream, the run with the lowest p50 of repeat runs is kept
+
+    :return dict: stage -> summary (see summarize()), or {"error": message} when the stage could not run
+    """
+
+    results = {}
+    for name in stages:
+        try:
+            runs = [summarize(STAGES[name](stream)) for _ in range(repeat)]
+        except Exception as e:
+            results[name] = {"error": str(e)}
+            continue
+        results[name] = min(runs, key=lambda summary: summary["p50_us"])
+    return results
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def environment() -> dict:
+    return {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+def print_results(results: dict):
+    print(f"{'stage':36} {'calls':>6} {'p50 us':>9} {'p90 us':>9} {'p99 us':>9} {'max us':>9} {'calls/s':>11}")
+    for name, summary in results.items():
+        if "error" in summary:
+            print(f"{name:36} skipped: {summary['error']}")
+            continue
+        print(f"{name:36} {summary['calls']:6} {summary['p50_us']:9.2f} {summary['p90_us']:9.2f} "
+              f"{summary['p99_us']:9.2f} {summary['max_us']:9.1f} {summary['calls_per_s']:11,.0f}")
+
+def compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    """
+    Prints the p50/p99 change of every stage against a baseline run
+
+    :return bool: False when a stage's p50 latency grew by more than tolerance (e.g. 0.15 for 15%)
+    """
+
+    ok = True
+    print(f"against {baseline.get('environment', {}).get('commit')} (tolerance {tolerance * 100:.0f}%):")
+    for name, summary in results.items():
+        before = baseline["stages"].get(name)
+        if "error" in summary or before is None or "error" in before:
+            continue
+        p50 = summary["p50_us"] / before["p50_us"] - 1
+        p99 = summary["p99_us"] / before["p99_us"] - 1
+        slower = p50 > tolerance
+        ok = ok and not slower
+        print(f"  {name:36} p50 {p50 * 100:+7.1f}%  p99 {p99 * 100:+7.1f}%{'  SLOWER' if slower else ''}")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline microbenchmarks of the post-vision pipeline")
+    parser.add_argument("--scenario", default="mixed", choices=("mixed",) + SCENARIOS)
+    parser.add_argument("--frames", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--input", help="recorded landmark stream (.npz) instead of a synthetic one")
+    parser.add_argument("--stages", help="comma separated stages, all by default: " + ", ".join(STAGES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="results of an earlier run (--json) to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    parser.add_argument("--save-stream", help="save the landmark stream used (.npz)")
+    args = parser.parse_args()
+
+    if args.input:
+        stream = load_stream(args.input)
+        source = {"input": os.path.basename(args.input)}
+    else:
+        stream = synthetic_stream(args.scenario, args.frames, args.seed)
+        source = {"scenario": args.scenario, "seed": args.seed}
+    if args.save_stream:
+        save_stream(args.save_stream, stream)
+
+    stages = args.stages.split(",") if args.stages else list(STAGES)
+    unknown = [name for name in stages if name not in STAGES]
+    if unknown:
+        parser.error(f"unknown stages {unknown}")
+
+    print(f"{len(stream)} frames ({', '.join(f'{key} {value}' for key, value in source.items())})")
+    results = run(stream, stages, args.repeat)
+    print_results(results)
+
+    report = {"environment": environment(), "stream": {"frames": len(stream), **source}, "stages": results}
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,15 @@
-from .camera import Camera
-from .vision import Vision
+import importlib
+
+from .frame_pool import FramePool, FrameSlot
+from .grabber import FrameGrabber
+from .session import SessionWriter, SessionReader, ReplaySource, REPLAY_SPEEDS
+from .source import open_source
+
+# the camera thread needs PyQt and the vision stage mediapipe, they are only imported once used,
+# so the headless runner (see headless.py) works without Qt and a landmarks replay without mediapipe
+_LAZY_ATTRIBUTES = {"Camera": ".camera", "Vision": ".vision"}
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
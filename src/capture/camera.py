@@ -1,52 +1,238 @@
-import cv2
-import numpy as np
-
+import threading
+import time
 
 from PyQt6.QtCore import QThread, pyqtSignal
-from .vision import Vision
+from .frame_pool import FrameSlot
+from .grabber import FrameGrabber
+from .idle import IdleController
+from .session import SessionWriter
+from .source import open_source
+from preprocess import LandmarkFrame
+from utils import (
+    Tracer,
+    IDLE_AFTER_FRAMES,
+    MAX_FRAMES_IN_FLIGHT,
+    FRAME_POOL_SIZE,
+)
 
 class Camera(QThread):
     """
-    QThread worker to capture video frames from the webcam using OpenCV
-    Emits the raw numpy array frame for processing and display
+    QThread worker running the capture pipeline in three stages:
+      - grab: a plain thread reading the webcam as fast as the driver delivers, keeping only the newest frame
+        (see grabber.py)
+      - inference: this thread, taking the newest grabbed frame whenever MediaPipe is free
+      - delivery: emitting the processed frame, dropped while the GUI still has MAX_FRAMES_IN_FLIGHT frames pending
+    Every stage counts the frames it dropped, so the camera to cursor latency stays around one frame under load
+
+    Frames live in a preallocated FramePool and travel between the stages and the GUI as FrameSlot references,
+    the receiver of frame_captured owns the slot and has to release() it once the image is no longer displayed,
+    the hand landmarks travel along as a LandmarkFrame built once here
+
+    A recorded session (see session.py) can stand in for the webcam, and the processed frames can be recorded
+
+    Every grabbed frame gets a FrameTrace from the tracer, each stage adds its span to it and counts its drops
+
+    Without a hand in view for a while the camera idles (see idle.py): frames are grabbed but only a few per second
+    are decoded and processed, on a smaller image
     """
-    frame_captured = pyqtSignal(np.ndarray, object)
+    frame_captured = pyqtSignal(object, object)
+    stats_updated = pyqtSignal(dict)
+
+    _STATS_INTERVAL = 1.0
+
+    def __init__(self, camera_index=0, parent=None, replay_path: str | None = None, replay_speed: str = "realtime",
+                 record_path: str | None = None, tracer: Tracer | None = None):
+        """
+        :param camera_index: the webcam to open
+        :param replay_path: a recorded session to play instead of the webcam
+        :param replay_speed: "realtime", "fast" or "landmarks", see ReplaySource
+        :param record_path: the session directory the processed frames are recorded to, None doesn't record
+        :param tracer: collects the latency of every stage of the frames, a new one by default
+        """
 
-    def __init__(self, camera_index=0, parent=None):
         super().__init__(parent)
         self._camera_index = camera_index
+        self._replay_path = replay_path
+        self._replay_speed = replay_speed
+        self._record_path = record_path
+        self._source_name = f"session {replay_path}" if replay_path else f"camera {camera_index}"
+        # a replay handing every frame to the pipeline, nothing is dropped
+        self._lossless = bool(replay_path) and replay_speed != "realtime"
         self._is_running = True
-        self._capture = None
-        self._vision = Vision()
+        self._grabber : FrameGrabber | None = None
+        self._session_writer : SessionWriter | None = None
+        self._tracer = tracer if tracer is not None else Tracer()
+        # created once the source runs, so the time per power mode leaves the startup out
+        self._idle : IdleController | None = None
+        # a landmarks-only replay doesn't need MediaPipe, it is loaded on the camera thread (see run())
+        self._needs_vision = not (replay_path and replay_speed == "landmarks")
+        self._vision = None
+        # MediaPipe input width of the active mode, the idle one is smaller
+        self._inference_width = None
+
+        self._delivery_condition = threading.Condition()
+        self._frames_in_flight = 0
+
+        # startup costs of the last run(): loading MediaPipe, opening the source until its first frame
+        self.vision_load_ms = 0.0
+        self.open_ms = 0.0
+
+        self._processed_count = 0
+        self._delivered_count = 0
+        self._delivery_drop_count = 0
+
+    def _open_source(self):
+        try:
+            return open_source(self._camera_index, self._replay_path, self._replay_speed)
+        except Exception as e:
+            print(f"ERROR: Could not open {self._source_name}: {e}")
+            return None
 
     def run(self):
-        self._capture = cv2.VideoCapture(self._camera_index)
+        if self._needs_vision:
+            # importing mediapipe and loading its models takes a while, the GUI stays responsive meanwhile
+            start = time.perf_counter()
+            from .vision import Vision
+            self._vision = Vision()
+            self._inference_width = self._vision.inference_width
+            self.vision_load_ms = (time.perf_counter() - start) * 1000
 
-        self._capture.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-        self._capture.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+        open_start = time.perf_counter()
+        capture = self._open_source()
+
+        if capture is None or not capture.isOpened():
+            print(f"ERROR: Could not open {self._source_name}")
+            self._is_running = False
+            return
 
-        if not self._capture.isOpened():
-            print(f"ERROR: Could not open camera {self._camera_index}")
+        grabber = FrameGrabber(capture, FRAME_POOL_SIZE, self._tracer, self._source_name)
+        if not grabber.read_first():
             self._is_running = False
             return
 
-        print(f"INFO: Camera {self._camera_index} started.")
+        self.open_ms = (time.perf_counter() - open_start) * 1000
+        self._grabber = grabber
+
+        if self._record_path:
+            self._session_writer = SessionWriter(self._record_path, grabber.frame_shape)
+            self._session_writer.start()
+            print(f"INFO: Recording to {self._record_path}")
+
+        print(f"INFO: {self._source_name.capitalize()} started.")
         self._is_running = True
+        if IDLE_AFTER_FRAMES is not None and not self._lossless:
+            self._idle = IdleController()
+        grabber.start(self._idle)
+
+        last_stats_time = time.perf_counter()
 
-        while self._is_running and self._capture.isOpened():
-            ret, frame = self._capture.read()
+        while self._is_running:
+            slot = grabber.get(timeout=0.5)
+            if slot is None:
+                if grabber.finished:
+                    break
+                continue
 
-            if ret:
-                frame, results = self._vision.process_frame(frame)
-                self.frame_captured.emit(frame, results)
-            else:
-                break
-                
-        self._capture.release()
+            slot.trace.span("grab_queue", slot.timestamp)
+            landmarks = self._process(slot)
+            self._processed_count += 1
+            if self._idle is not None and self._idle.update(landmarks):
+                self._apply_power_mode()
+            self._deliver(slot, landmarks)
+
+            curr_time = time.perf_counter()
+            if curr_time - last_stats_time >= self._STATS_INTERVAL:
+                self.stats_updated.emit(self.stats())
+                last_stats_time = curr_time
+
+        grabber.stop()
+        if self._session_writer is not None:
+            self._session_writer.stop()
         print(f"INFO: Camera stopped.")
-        
+
+    def _process(self, slot: FrameSlot) -> LandmarkFrame:
+        """Inference stage, MediaPipe or the landmarks recorded with the frame, records the frame if asked to."""
+
+        start = time.perf_counter()
+        if self._vision is None:
+            recorded = slot.landmarks
+            landmarks = LandmarkFrame(recorded.coords, recorded.present, recorded.is_right, slot.timestamp)
+            image = None
+        else:
+            # recorded as grabbed, before the landmarks are drawn on it
+            image = slot.image.copy() if self._session_writer is not None else None
+            landmarks = self._vision.process_frame(slot.image, slot.timestamp)
+        slot.trace.span("mediapipe", start)
+        landmarks.trace = slot.trace
+
+        if self._session_writer is not None:
+            self._session_writer.submit(landmarks, image)
+        return landmarks
+
+    def _apply_power_mode(self):
+        idle = self._idle.is_idle
+        if self._vision is not None:
+            self._vision.inference_width = self._idle.idle_inference_width if idle else self._inference_width
+        if idle:
+            print(f"INFO: No hand for {self._idle.idle_after} frames, idling at {1 / self._idle.idle_interval:.0f} fps.")
+        else:
+            print("INFO: Hand in view, back to full rate.")
+
+    def _deliver(self, slot: FrameSlot, landmarks: LandmarkFrame):
+        """Delivery stage, drops the frame if the GUI did not consume the previous ones yet."""
+
+        with self._delivery_condition:
+            # a lossless replay waits for the GUI instead of dropping the frame
+            while self._lossless and self._is_running and self._frames_in_flight >= MAX_FRAMES_IN_FLIGHT:
+                self._delivery_condition.wait(0.1)
+
+            if self._frames_in_flight >= MAX_FRAMES_IN_FLIGHT:
+                self._delivery_drop_count += 1
+                slot.trace.drop("delivery")
+                slot.release()
+                return
+            self._frames_in_flight += 1
+
+        self._delivered_count += 1
+        # closed by the receiver once the GUI thread runs its slot
+        slot.trace.start("delivery")
+        self.frame_captured.emit(slot, landmarks)
+
+    def frame_consumed(self):
+        """Called by the receiver once it handled a delivered frame, making room for the next one."""
+
+        with self._delivery_condition:
+            if self._frames_in_flight > 0:
+                self._frames_in_flight -= 1
+            self._delivery_condition.notify()
+
+    def stats(self) -> dict:
+        """
+        Returns a snapshot of the frame counters of every stage
+
+        :return dict: grabbed/processed/delivered frame counts, the drops of each stage and the inference cost
+        """
+
+        stats = {
+            "grabbed": self._grabber.grabbed_count if self._grabber is not None else 0,
+            "processed": self._processed_count,
+            "delivered": self._delivered_count,
+            "grab_dropped": self._grabber.drop_count if self._grabber is not None else 0,
+            "delivery_dropped": self._delivery_drop_count,
+            "inference_ms": self._vision.avg_inference_ms if self._vision is not None else 0.0,
+            "inference_width": self._vision.inference_width if self._vision is not None else None,
+            "roi_share": self._vision.roi_share if self._vision is not None else None,
+        }
+        if self._idle is not None:
+            stats["power"] = self._idle.stats()
+        if self._session_writer is not None:
+            stats["recording"] = self._session_writer.stats()
+        return stats
+
     def stop(self):
         """Safely stops the thread loop and waits for termination."""
-        
+
         self._is_running = False
-        self.wait()
\ No newline at end of file
+        if self._grabber is not None:
+            self._grabber.close()
+        self.wait()
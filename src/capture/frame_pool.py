@@ -0,0 +1,66 @@
+import threading
+
+import numpy as np
+
+class FrameSlot:
+    """
+    One preallocated frame buffer of a FramePool
+    Whoever holds the slot owns the image until it calls release()
+    """
+
+    __slots__ = ("index", "image", "timestamp", "landmarks", "trace", "_pool")
+
+    def __init__(self, pool, index: int, image: np.ndarray):
+        self._pool = pool
+        self.index = index
+        self.image = image
+
+        # time.perf_counter() of the moment the frame in the buffer was grabbed
+        self.timestamp = 0.0
+        # LandmarkFrame recorded with the frame, set when it comes from a replayed session
+        self.landmarks = None
+        # FrameTrace of the frame in the buffer
+        self.trace = None
+
+    def release(self):
+        """Gives the buffer back to its pool so the camera can write the next frame into it."""
+
+        self._pool._release(self)
+
+class FramePool:
+    """
+    Fixed set of BGR frame buffers shared between the Camera stages and the preview widget
+    Frames are read straight into a free buffer and handed around by reference,
+    so no stage allocates or copies a full frame
+    """
+
+    def __init__(self, slot_count: int, shape: tuple):
+        self.shape = tuple(shape)
+        self._lock = threading.Lock()
+        # zeroed, a landmarks-only replay never writes the images and shows black frames
+        self._slots = [FrameSlot(self, i, np.zeros(self.shape, dtype=np.uint8)) for i in range(slot_count)]
+        self._free = list(range(slot_count))
+
+        self.exhausted_count = 0
+
+    def acquire(self) -> FrameSlot | None:
+        """
+        Takes a free buffer out of the pool
+
+        :return FrameSlot: the free slot or None if all buffers are in use
+        """
+
+        with self._lock:
+            if not self._free:
+                self.exhausted_count += 1
+                return None
+            return self._slots[self._free.pop()]
+
+    def _release(self, slot: FrameSlot):
+        with self._lock:
+            if slot.index not in self._free:
+                self._free.append(slot.index)
+
+    def free_count(self) -> int:
+        with self._lock:
+            return len(self._free)
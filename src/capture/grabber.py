@@ -0,0 +1,201 @@
+import threading
+import time
+
+import numpy as np
+
+from .frame_pool import FramePool, FrameSlot
+from .session import ReplaySource
+from utils import LatestBuffer, Tracer
+
+class FrameGrabber:
+    """
+    Grab stage of the capture pipeline, shared by the Camera and the headless runner (no Qt involved)
+
+    A plain thread reads the source into a preallocated FramePool as fast as it delivers, so a slow inference
+    never stalls the driver queue. Only the newest frame waits for the next stage, which takes it with get();
+    a lossless replay instead waits for every frame to be taken. Every grabbed frame gets a FrameTrace,
+    frames dropped for lack of a free buffer or replaced before being taken are counted
+
+    With an IdleController the frames that aren't due are taken from the driver without decoding them
+    """
+
+    def __init__(self, source, pool_size: int, tracer: Tracer, source_name: str = "the frame source",
+                 thread_name: str = "CameraGrab"):
+        """
+        :param source: an opened cv2.VideoCapture or ReplaySource (see open_source())
+        :param pool_size: frame buffers of the pool, including the ones the later stages hold
+        :param tracer: starts the trace of every grabbed frame
+        :param source_name: how the log names the source, e.g. "camera 0"
+        :param thread_name: name of the grab thread
+        """
+
+        self.source = source
+        self.source_name = source_name
+        self._pool_size = pool_size
+        self._tracer = tracer
+        self._thread_name = thread_name
+
+        # a replay handing every frame to the pipeline, nothing is dropped
+        self.lossless = getattr(source, "lossless", False)
+        self.idle = None
+
+        self._buffer = LatestBuffer()
+        self._pool : FramePool | None = None
+        self._thread : threading.Thread | None = None
+        self._is_running = False
+
+        # set once the source has no more frames, the frame still pending can be taken before stopping
+        self.finished = False
+        self.pool_drop_count = 0
+
+    @property
+    def frame_shape(self) -> tuple:
+        return self._pool.shape
+
+    @property
+    def grabbed_count(self) -> int:
+        return self._buffer.put_count
+
+    @property
+    def drop_count(self) -> int:
+        """Frames dropped by the grab stage: no free buffer to read them into or replaced before being taken"""
+
+        return self._buffer.drop_count + self.pool_drop_count
+
+    def read_first(self) -> bool:
+        """
+        Reads the first frame, it tells the real resolution the driver agreed to and the pool is sized after it.
+        The frame waits in the buffer for the next stage
+
+        :return bool: whether the source delivered a frame, it is released when it didn't
+        """
+
+        grab_start = time.perf_counter()
+        ret, first_frame = self.source.read()
+        if not ret:
+            print(f"ERROR: Could not read from {self.source_name}")
+            self.source.release()
+            return False
+
+        self._pool = FramePool(self._pool_size, first_frame.shape)
+        slot = self._pool.acquire()
+        np.copyto(slot.image, first_frame)
+        self._fill_slot(slot, grab_start)
+        self._buffer.put(slot)
+        return True
+
+    def start(self, idle=None):
+        """
+        Starts the grab thread, once read_first() succeeded
+
+        :param idle: IdleController deciding which frames are decoded, None decodes every frame
+        """
+
+        self.idle = idle
+        self._is_running = True
+        self._thread = threading.Thread(target=self._grab_loop, name=self._thread_name, daemon=True)
+        self._thread.start()
+
+    def get(self, timeout: float | None = None) -> FrameSlot | None:
+        """
+        Takes the newest grabbed frame, the caller owns the slot and has to release() it
+
+        :return FrameSlot: the frame or None on timeout or once closed
+        """
+
+        return self._buffer.get(timeout)
+
+    def close(self):
+        """Ends the grab loop and wakes a get() waiting for a frame, without waiting for the thread"""
+
+        self._is_running = False
+        self._buffer.close()
+
+    def stop(self):
+        """Ends the grab thread, gives back the frame still pending and releases the source"""
+
+        self.close()
+        if self._thread is None:
+            return
+
+        self._thread.join()
+        self._thread = None
+
+        pending = self._buffer.clear()
+        if pending is not None:
+            pending.release()
+        self.source.release()
+
+    def _fill_slot(self, slot: FrameSlot, grab_start: float):
+        slot.timestamp = time.perf_counter()
+        slot.landmarks = getattr(self.source, "last_landmarks", None)
+        slot.trace = self._tracer.begin(grab_start, slot.timestamp)
+
+    def _grab_loop(self):
+        while self._is_running and self.source.isOpened():
+            if self.idle is not None and not self.idle.frame_due():
+                # idle, the frames in between are taken from the driver without decoding them,
+                # so the next decoded frame is a fresh one
+                if not self.source.grab():
+                    self._finish()
+                    break
+                continue
+
+            slot = self._pool.acquire()
+
+            if slot is None and self.lossless:
+                # a replay waits for a free buffer instead of skipping the frame
+                time.sleep(0.001)
+                continue
+
+            if slot is None:
+                # every buffer is still in use downstream, keep the driver queue drained without decoding
+                ret = self.source.grab()
+                self.pool_drop_count += 1
+                self._tracer.drop("grab")
+            else:
+                grab_start = time.perf_counter()
+                ret, frame = self.source.read(slot.image)
+                if ret and frame is not slot.image:
+                    ret = self._adopt_resized_frame(slot, frame)
+
+                if ret:
+                    self._fill_slot(slot, grab_start)
+                    if self.lossless:
+                        # the previous frame has to be taken by the next stage first
+                        while self._is_running and not self._buffer.wait_taken(0.5):
+                            pass
+
+                    replaced = self._buffer.put(slot)
+                    if replaced is not None:
+                        replaced.trace.drop("grab_queue")
+                        replaced.release()
+                else:
+                    slot.release()
+
+            if not ret:
+                self._finish()
+                break
+
+    def _finish(self):
+        if isinstance(self.source, ReplaySource):
+            print(f"INFO: Replay of {self.source.path} finished.")
+        else:
+            print(f"ERROR: {self.source_name.capitalize()} stopped delivering frames.")
+        self.finished = True
+        self._buffer.close()
+
+    def _adopt_resized_frame(self, slot: FrameSlot, frame: np.ndarray) -> bool:
+        """
+        OpenCV allocates a new array when the frame doesn't fit the slot, copy it back
+        or reject it if the driver switched resolution mid stream
+
+        :return bool: whether the slot now holds the frame
+        """
+
+        if frame.shape != slot.image.shape:
+            print(f"ERROR: {self.source_name.capitalize()} changed resolution to {frame.shape[1]}x{frame.shape[0]}.")
+            return False
+
+        np.copyto(slot.image, frame)
+        return True
@@ -0,0 +1,108 @@
+import time
+
+from preprocess import LandmarkFrame
+from utils import IDLE_AFTER_FRAMES, IDLE_FPS, IDLE_INFERENCE_WIDTH
+
+class IdleController:
+    """
+    Decides when the camera idles: after idle_after processed frames without a hand only idle_fps frames
+    per second are decoded and given to MediaPipe, on an image idle_inference_width wide.
+    The first idle frame showing a hand switches back to full rate, the next grabbed frame is processed
+
+    Time and process CPU time (every thread, GUI included) are counted per mode, the CPU saved is the idle time
+    at the CPU rate of the active mode minus the CPU actually used while idle
+    """
+
+    def __init__(self, idle_after: int = IDLE_AFTER_FRAMES, idle_fps: float = IDLE_FPS,
+                 idle_inference_width: int = IDLE_INFERENCE_WIDTH):
+        self.idle_after = idle_after
+        self.idle_interval = 1.0 / idle_fps
+        self.idle_inference_width = idle_inference_width
+
+        self.is_idle = False
+        self._frames_without_hand = 0
+        self._next_idle_frame = 0.0
+
+        # mode -> [wall seconds, CPU seconds] spent in it
+        self._totals = {"active": [0.0, 0.0], "idle": [0.0, 0.0]}
+        self._mode_wall = time.perf_counter()
+        self._mode_cpu = time.process_time()
+
+        self.wake_count = 0
+        self.skipped_count = 0
+
+    def frame_due(self) -> bool:
+        """
+        Called by the grab stage before each frame, counts the skipped ones
+
+        :return bool: whether the frame should be decoded and processed, always while active
+        """
+
+        if not self.is_idle:
+            return True
+
+        now = time.perf_counter()
+        if now < self._next_idle_frame:
+            self.skipped_count += 1
+            return False
+        self._next_idle_frame = now + self.idle_interval
+        return True
+
+    def update(self, landmarks: LandmarkFrame) -> bool:
+        """
+        Follows the processed frames
+
+        :return bool: whether the mode changed with this frame
+        """
+
+        if landmarks.has_hands:
+            self._frames_without_hand = 0
+            if self.is_idle:
+                self._switch(False)
+                self.wake_count += 1
+                return True
+            return False
+
+        self._frames_without_hand += 1
+        if not self.is_idle and self._frames_without_hand >= self.idle_after:
+            self._switch(True)
+            return True
+        return False
+
+    def _switch(self, idle: bool):
+        self._account()
+        self.is_idle = idle
+        self._next_idle_frame = 0.0
+
+    def _account(self):
+        # adds the time since the last switch to the current mode
+        wall, cpu = time.perf_counter(), time.process_time()
+        totals = self._totals["idle" if self.is_idle else "active"]
+        totals[0] += wall - self._mode_wall
+        totals[1] += cpu - self._mode_cpu
+        self._mode_wall, self._mode_cpu = wall, cpu
+
+    def stats(self) -> dict:
+        """
+        Returns the time spent in each mode and the CPU use
+
+        :return dict: current mode, seconds and CPU % (of one core) per mode, CPU seconds saved, wake-ups
+            and frames skipped while idle
+        """
+
+        self._account()
+        (active_s, active_cpu), (idle_s, idle_cpu) = self._totals["active"], self._totals["idle"]
+        active_rate = active_cpu / active_s if active_s > 0 else 0.0
+        idle_rate = idle_cpu / idle_s if idle_s > 0 else 0.0
+
+        return {
+            "mode": "idle" if self.is_idle else "active",
+            "active_s": active_s,
+            "idle_s": idle_s,
+            "active_cpu_pct": active_rate * 100,
+            "idle_cpu_pct": idle_rate * 100,
+            # unknown until some time was spent active
+            "cpu_saved_s": max(0.0, idle_s * active_rate - idle_cpu) if active_s > 0 else 0.0,
+            "wakeups": self.wake_count,
+            "skipped": self.skipped_count,
+        }
@@ -0,0 +1,355 @@
+"""
+Recorded camera session, a directory holding:
+
+    session.json    format version, frame size, image encoding and the time the recording started
+    frames.rec      one fixed size record per frame: timestamp, MediaPipe landmarks and where its image is,
+                    memory-mappable as a numpy structured array
+    images.bin      the encoded images one after the other, memory-mapped when replayed
+
+Both files are only appended to, the image of a frame is written before its record,
+so the records decide how many frames are complete.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from preprocess import LandmarkFrame
+from preprocess.landmark_frame import MAX_HANDS, NUM_LANDMARKS
+from utils import SESSION_IMAGE_FORMAT, SESSION_JPEG_QUALITY, SESSION_MAX_BACKLOG
+
+FORMAT_VERSION = 1
+
+# "jpg" and "png" are encoded with OpenCV, "raw" stores the BGR pixels, None only the landmarks
+IMAGE_FORMATS = ("jpg", "png", "raw", None)
+REPLAY_SPEEDS = ("realtime", "fast", "landmarks")
+
+_META_FILE = "session.json"
+_FRAMES_FILE = "frames.rec"
+_IMAGES_FILE = "images.bin"
+
+FRAME_DTYPE = np.dtype([
+    # seconds since the first frame
+    ("timestamp", "<f8"),
+    # MediaPipe gives float32 landmarks, stored as such they replay bit for bit
+    ("coords", "<f4", (MAX_HANDS, NUM_LANDMARKS, 3)),
+    ("present", "?", (MAX_HANDS,)),
+    ("is_right", "?", (MAX_HANDS,)),
+    ("image_offset", "<u8"),
+    # 0 when the frame has no image (landmarks only, or dropped by a slow writer)
+    ("image_size", "<u4"),
+])
+
+class SessionWriter:
+    """
+    Records frames with their landmarks on a background thread, so encoding never slows the camera down
+
+    When more than max_backlog frames wait for the disk, the images of the new ones are dropped,
+    their landmarks are still recorded
+    """
+
+    def __init__(self, path: str, frame_shape: tuple, image_format: str | None = SESSION_IMAGE_FORMAT,
+                 jpeg_quality: int = SESSION_JPEG_QUALITY, max_backlog: int = SESSION_MAX_BACKLOG):
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unknown image format {image_format!r}, expected one of {IMAGE_FORMATS}")
+
+        self.path = path
+        self.frame_shape = tuple(frame_shape)
+        self.image_format = image_format
+        self.max_backlog = max_backlog
+        self._encode_params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality] if image_format == "jpg" else []
+
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, _META_FILE), "w") as f:
+            json.dump({
+                "format_version": FORMAT_VERSION,
+                "height": self.frame_shape[0],
+                "width": self.frame_shape[1],
+                "image_format": image_format,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            }, f, indent=2)
+        self._frames_file = open(os.path.join(path, _FRAMES_FILE), "wb")
+        self._images_file = open(os.path.join(path, _IMAGES_FILE), "wb")
+        self._image_offset = 0
+
+        # (timestamp, landmarks, image or None) of the frames not written yet
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._is_running = False
+        self._thread : threading.Thread | None = None
+        self._first_timestamp = None
+
+        self.frame_count = 0
+        self.dropped_images = 0
+        self.bytes_written = 0
+
+    def start(self):
+        if self._thread is not None:
+            return
+
+        self._is_running = True
+        self._thread = threading.Thread(target=self._run, name="SessionWriter", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Writes the queued frames and closes the session files."""
+
+        if self._thread is None:
+            return
+
+        with self._condition:
+            self._is_running = False
+            self._condition.notify()
+        self._thread.join()
+        self._thread = None
+        atexit.unregister(self.stop)
+
+        self._frames_file.close()
+        self._images_file.close()
+        print(f"INFO: Recorded {self.frame_count} frames to {self.path} "
+              f"({self.bytes_written / 2**20:.1f} MiB, {self.dropped_images} images dropped)")
+
+    def submit(self, landmarks: LandmarkFrame, image: np.ndarray | None = None):
+        """
+        Queues one frame, the image has to be a copy the caller no longer writes to
+
+        :param landmarks: the MediaPipe landmarks of the frame, its timestamp is the grab time
+        :param image: the BGR frame as grabbed (before anything is drawn on it)
+        """
+
+        with self._condition:
+            if self._first_timestamp is None:
+                self._first_timestamp = landmarks.timestamp
+            if image is not None and (self.image_format is None or len(self._queue) >= self.max_backlog):
+                if self.image_format is not None:
+                    self.dropped_images += 1
+                image = None
+            self._queue.append((landmarks.timestamp - self._first_timestamp, landmarks, image))
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue and self._is_running:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                timestamp, landmarks, image = self._queue.popleft()
+
+            try:
+                self._write(timestamp, landmarks, image)
+            except Exception as e:
+                print(f"ERROR: Failed to record a frame to {self.path}: {e}")
+
+    def _encode(self, image: np.ndarray) -> bytes:
+        if self.image_format == "raw":
+            return image.tobytes()
+        ok, encoded = cv2.imencode("." + self.image_format, image, self._encode_params)
+        if not ok:
+            raise ValueError(f"could not encode the frame as {self.image_format}")
+        return encoded.tobytes()
+
+    def _write(self, timestamp: float, landmarks: LandmarkFrame, image: np.ndarray | None):
+        record = np.zeros(1, dtype=FRAME_DTYPE)
+        record["timestamp"] = timestamp
+        record["coords"] = landmarks.coords
+        record["present"] = landmarks.present
+        record["is_right"] = landmarks.is_right
+
+        if image is not None:
+            encoded = self._encode(image)
+            self._images_file.write(encoded)
+            self._images_file.flush()
+            record["image_offset"] = self._image_offset
+            record["image_size"] = len(encoded)
+            self._image_offset += len(encoded)
+            self.bytes_written += len(encoded)
+
+        self._frames_file.write(record.tobytes())
+        self._frames_file.flush()
+        self.bytes_written += FRAME_DTYPE.itemsize
+        self.frame_count += 1
+
+    def stats(self) -> dict:
+        with self._condition:
+            backlog = len(self._queue)
+        return {
+            "frames": self.frame_count,
+            "backlog": backlog,
+            "dropped_images": self.dropped_images,
+            "mib": self.bytes_written / 2**20,
+        }
+
+class SessionReader:
+    """Memory-maps a recorded session, frames are decoded on demand"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, _META_FILE)) as f:
+            meta = json.load(f)
+
+        if meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported session format version {meta.get('format_version')} in {path}")
+
+        self.frame_shape = (meta["height"], meta["width"], 3)
+        self.image_format = meta["image_format"]
+
+        # a record torn by a crash is ignored
+        frames_path = os.path.join(path, _FRAMES_FILE)
+        count = os.path.getsize(frames_path) // FRAME_DTYPE.itemsize
+        self.frames = np.memmap(frames_path, dtype=FRAME_DTYPE, mode="r", shape=(count,)) if count else \
+            np.zeros(0, dtype=FRAME_DTYPE)
+
+        images_path = os.path.join(path, _IMAGES_FILE)
+        self._images = np.memmap(images_path, dtype=np.uint8, mode="r") if os.path.getsize(images_path) else None
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    @property
+    def duration(self) -> float:
+        return float(self.frames["timestamp"][-1]) if len(self.frames) else 0.0
+
+    def landmarks(self, index: int, timestamp: float | None = None) -> LandmarkFrame:
+        """
+        The landmarks of a frame
+
+        :param timestamp: timestamp of the returned frame, by default the recorded one (seconds since the first frame)
+        """
+
+        record = self.frames[index]
+        return LandmarkFrame(
+            record["coords"].astype(np.float64),
+            record["present"].copy(),
+            record["is_right"].copy(),
+            float(record["timestamp"]) if timestamp is None else timestamp,
+        )
+
+    def landmark_frames(self) -> list:
+        """Every recorded frame's landmarks, with the recorded timestamps"""
+
+        return [self.landmarks(i) for i in range(len(self))]
+
+    def image(self, index: int, out: np.ndarray | None = None) -> np.ndarray | None:
+        """
+        Decodes the image of a frame
+
+        :param out: buffer of frame_shape to decode into, a new array by default
+
+        :return np.ndarray | None: the BGR image or None when the frame was recorded without it
+        """
+
+        record = self.frames[index]
+        size = int(record["image_size"])
+        if size == 0 or self._images is None:
+            return None
+
+        data = self._images[int(record["image_offset"]):int(record["image_offset"]) + size]
+        if self.image_format == "raw":
+            image = np.frombuffer(data, dtype=np.uint8).reshape(self.frame_shape)
+        else:
+            image = cv2.imdecode(np.asarray(data), cv2.IMREAD_COLOR)
+        if out is None:
+            return image.copy() if self.image_format == "raw" else image
+        np.copyto(out, image)
+        return out
+
+class ReplaySource:
+    """
+    Plays a recorded session back through the cv2.VideoCapture calls the Camera makes, in place of the webcam
+
+    Speeds:
+      - realtime: frames come at their recorded pace
+      - fast: frames come as soon as the camera asks for them
+      - landmarks: like fast, without decoding the images, the camera takes the recorded landmarks instead of
+        running MediaPipe
+    In fast and landmarks modes the camera processes and delivers every frame (lossless), so a replay
+    always feeds the same frames to the pipeline
+    """
+
+    def __init__(self, path: str, speed: str = "realtime"):
+        if speed not in REPLAY_SPEEDS:
+            raise ValueError(f"Unknown replay speed {speed!r}, expected one of {REPLAY_SPEEDS}")
+
+        self.path = path
+        self.speed = speed
+        self.session = SessionReader(path)
+        self._next = 0
+        self._start_time = None
+        self._is_open = True
+
+        # landmarks of the frame last read
+        self.last_landmarks : LandmarkFrame | None = None
+
+    @property
+    def lossless(self) -> bool:
+        return self.speed != "realtime"
+
+    @property
+    def landmarks_only(self) -> bool:
+        return self.speed == "landmarks"
+
+    def isOpened(self) -> bool:
+        return self._is_open
+
+    def set(self, prop, value) -> bool:
+        # the recorded resolution is fixed
+        return False
+
+    def release(self):
+        self._is_open = False
+
+    def grab(self) -> bool:
+        """Skips a frame, as a webcam grab() without retrieve() does"""
+
+        ret, _ = self._advance()
+        return ret
+
+    def read(self, image: np.ndarray | None = None):
+        """
+        :param image: buffer the frame is decoded into, as with cv2.VideoCapture.read()
+
+        :return tuple: (whether a frame was read, the frame), (False, None) at the end of the session
+        """
+
+        ret, index = self._advance()
+        if not ret:
+            return False, None
+
+        if self.landmarks_only:
+            # the buffer keeps whatever it holds, the recorded landmarks are what matters
+            if image is None:
+                image = np.zeros(self.session.frame_shape, dtype=np.uint8)
+            return True, image
+
+        frame = self.session.image(index, image)
+        if frame is None:
+            # frame recorded without its image
+            frame = image if image is not None else np.zeros(self.session.frame_shape, dtype=np.uint8)
+            frame[:] = 0
+        return True, frame
+
+    def _advance(self):
+        if not self._is_open or self._next >= len(self.session):
+            return False, None
+
+        index = self._next
+        self._next += 1
+
+        if self.speed == "realtime":
+            now = time.perf_counter()
+            if self._start_time is None:
+                self._start_time = now
+            delay = self._start_time + float(self.session.frames["timestamp"][index]) - now
+            if delay > 0:
+                time.sleep(delay)
+
+        self.last_landmarks = self.session.landmarks(index)
+        return True, index
@@ -0,0 +1,23 @@
+import cv2
+
+from .session import ReplaySource
+from utils import CAPTURE_WIDTH, CAPTURE_HEIGHT
+
+def open_source(camera_index: int = 0, replay_path: str | None = None, replay_speed: str = "realtime"):
+    """
+    Opens where the frames of the pipeline come from: the webcam at the capture resolution or a recorded session
+
+    :param camera_index: the webcam to open
+    :param replay_path: a recorded session to play instead of the webcam
+    :param replay_speed: "realtime", "fast" or "landmarks", see ReplaySource
+
+    :return: a cv2.VideoCapture or a ReplaySource, isOpened() tells whether it worked
+    """
+
+    if replay_path:
+        return ReplaySource(replay_path, replay_speed)
+
+    capture = cv2.VideoCapture(camera_index)
+    capture.set(cv2.CAP_PROP_FRAME_WIDTH, CAPTURE_WIDTH)
+    capture.set(cv2.CAP_PROP_FRAME_HEIGHT, CAPTURE_HEIGHT)
+    return capture
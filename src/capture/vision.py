@@ -1,34 +1,209 @@
+import time
+
 import mediapipe as mp
 import numpy as np
 import cv2
-from PyQt6.QtGui import QImage, QPixmap
+
+from preprocess import LandmarkFrame
+from preprocess.landmark_frame import MAX_HANDS
+from utils import INFERENCE_WIDTH, ROI_TRACKING, ROI_PADDING, ROI_FULL_FRAME_INTERVAL
 
 # object responsible for everything image-related
 class Vision:
-    def __init__(self):
+    # weight of the newest sample in the running inference cost average
+    _COST_SMOOTHING = 0.1
+    # smallest crop side in pixels, MediaPipe needs some context around a small hand
+    _ROI_MIN_SIZE = 128
+    # crops covering more of the frame than this save too little, the full frame is used instead
+    _ROI_MAX_AREA = 0.6
+
+    def __init__(self, inference_width: int | None = INFERENCE_WIDTH, draw: bool = True,
+                 roi_tracking: bool = ROI_TRACKING, roi_padding: float = ROI_PADDING,
+                 full_frame_interval: int = ROI_FULL_FRAME_INTERVAL):
+        """
+        :param inference_width: width of the downscaled copy MediaPipe runs on, None runs on the full frame
+        :param draw: whether the landmarks are drawn on the frames, not needed when nothing shows them
+        :param roi_tracking: run MediaPipe on a crop around the hands of the previous frame
+        :param roi_padding: crop margin on every side, times the size of the box around the hands
+        :param full_frame_interval: crops in a row before the whole frame is searched for a hand entering the view
+        """
+
         # initialize mediapipe hands
         self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
+        self.hands = self._create_hands()
+        # MediaPipe tracks the hands from one image to the next, the crops get their own instance
+        # so the full frame searches in between don't disturb it
+        self.roi_hands = self._create_hands() if roi_tracking else None
+        self.mp_draw = mp.solutions.drawing_utils
+        self.mp_styles = mp.solutions.drawing_styles
+
+        self.inference_width = inference_width
+        self.draw = draw
+
+        self.roi_tracking = roi_tracking
+        self.roi_padding = roi_padding
+        self.full_frame_interval = full_frame_interval
+        # (x0, y0, x1, y1) pixel box the next frame is cropped to, None runs it on the full frame
+        self._roi : tuple | None = None
+        self._roi_hand_count = 0
+        self._crops_in_a_row = 0
+        self.roi_frame_count = 0
+        self.full_frame_count = 0
+
+        # reused between frames so the downscale and color conversion don't allocate
+        self._small_bgr : np.ndarray | None = None
+        self._small_rgb : np.ndarray | None = None
+
+        # per frame cost of the downscale, color conversion and mediapipe, in milliseconds
+        self.last_inference_ms = 0.0
+        self.avg_inference_ms = 0.0
+
+    def _create_hands(self):
+        return self.mp_hands.Hands(
             static_image_mode=False,
-            max_num_hands=2,
+            max_num_hands=MAX_HANDS,
             min_detection_confidence=0.5,
             min_tracking_confidence=0.5
         )
-        self.mp_draw = mp.solutions.drawing_utils
-        self.mp_styles = mp.solutions.drawing_styles
-        
-    # function called every frame to create the ui return image and the mediapipe results
-    def process_frame(self, frame:np.ndarray):
-        # bgr->rgb for mediapipe
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
 
-        results = self.hands.process(frame_rgb)
-        if results.multi_hand_landmarks:
-            self.draw_landmarks(frame, results)
+    def inference_size(self, frame_width: int, frame_height: int) -> tuple[int, int]:
+        """
+        Computes the size of the image mediapipe runs on, keeping the aspect ratio of the frame
+
+        :return tuple: (width, height) of the inference image, the frame size if no downscale is needed
+        """
+
+        if not self.inference_width or frame_width <= self.inference_width:
+            return frame_width, frame_height
+
+        height = max(1, round(frame_height * self.inference_width / frame_width))
+        return self.inference_width, height
+
+    def _prepare_inference_image(self, frame: np.ndarray) -> np.ndarray:
+        # bgr->rgb for mediapipe, on the downscaled copy when one is configured
+        h, w = frame.shape[:2]
+        size = self.inference_size(w, h)
+
+        if size == (w, h):
+            source = frame
+        else:
+            if self._small_bgr is None or self._small_bgr.shape[:2] != (size[1], size[0]):
+                self._small_bgr = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            source = cv2.resize(frame, size, dst=self._small_bgr, interpolation=cv2.INTER_AREA)
+
+        if self._small_rgb is None or self._small_rgb.shape != source.shape:
+            self._small_rgb = np.empty_like(source)
+        return cv2.cvtColor(source, cv2.COLOR_BGR2RGB, dst=self._small_rgb)
+
+    # function called every frame to get the hand landmarks and draw them onto the frame in place
+    # the frame is not mirrored here anymore, the preview mirrors it while painting
+    def process_frame(self, frame:np.ndarray, timestamp: float = 0.0) -> LandmarkFrame:
+        start = time.perf_counter()
 
-        # mirror the image
-        frame = cv2.flip(frame, 1)
-        return frame, results
+        box = self._roi if self._roi_due() else None
+        results = self._detect(frame, box)
+        if box is not None and not results.multi_hand_landmarks:
+            # the hands left the crop, searched for on the whole frame right away
+            box = None
+            results = self._detect(frame, None)
+
+        self._record_cost((time.perf_counter() - start) * 1000)
+
+        # the crop is a view of the frame, landmarks drawn on it land in place
+        image = frame if box is None else frame[box[1]:box[3], box[0]:box[2]]
+        if self.draw and results.multi_hand_landmarks:
+            self.draw_landmarks(image, results)
+
+        # the only place the mediapipe results are walked, everything downstream uses the compact frame
+        landmarks = LandmarkFrame.from_results(results, timestamp)
+        if box is not None:
+            self._to_frame_coordinates(landmarks, box, frame.shape)
+        if self.roi_tracking:
+            self._roi = self._track(landmarks, frame.shape)
+        return landmarks
+
+    def _roi_due(self) -> bool:
+        if self._roi is None:
+            return False
+        # with every hand slot tracked no other hand can be added, the full frame can wait
+        return self._roi_hand_count >= MAX_HANDS or self._crops_in_a_row < self.full_frame_interval
+
+    def _detect(self, frame: np.ndarray, box: tuple | None):
+        # landmarks are normalized to the image size, so the ones found on the downscaled copy
+        # already map back onto the full resolution frame (or crop)
+        if box is None:
+            self.full_frame_count += 1
+            self._crops_in_a_row = 0
+            return self.hands.process(self._prepare_inference_image(frame))
+
+        self.roi_frame_count += 1
+        self._crops_in_a_row += 1
+        x0, y0, x1, y1 = box
+        return self.roi_hands.process(self._prepare_inference_image(frame[y0:y1, x0:x1]))
+
+    @staticmethod
+    def _to_frame_coordinates(landmarks: LandmarkFrame, box: tuple, frame_shape: tuple):
+        # normalized to the crop -> normalized to the frame, missing hands stay zeros
+        x0, y0, x1, y1 = box
+        height, width = frame_shape[:2]
+        hands = landmarks.coords[landmarks.present]
+        hands[..., 0] = (x0 + hands[..., 0] * (x1 - x0)) / width
+        hands[..., 1] = (y0 + hands[..., 1] * (y1 - y0)) / height
+        # depth has the scale of x
+        hands[..., 2] *= (x1 - x0) / width
+        landmarks.coords[landmarks.present] = hands
+
+    @property
+    def roi_share(self) -> float | None:
+        """Share of the MediaPipe runs made on a crop, None when not tracking"""
+
+        if not self.roi_tracking:
+            return None
+        runs = self.roi_frame_count + self.full_frame_count
+        return self.roi_frame_count / runs if runs else 0.0
+
+    def _track(self, landmarks: LandmarkFrame, frame_shape: tuple) -> tuple | None:
+        """
+        Picks the crop of the next frame around the hands of this one
+
+        :return tuple | None: (x0, y0, x1, y1) in pixels, None for the full frame
+        """
+
+        if not landmarks.has_hands:
+            return None
+
+        height, width = frame_shape[:2]
+        points = landmarks.coords[landmarks.present, :, :2].reshape(-1, 2) * (width, height)
+        (left, top), (right, bottom) = points.min(axis=0), points.max(axis=0)
+        self._roi_hand_count = landmarks.num_hands
+
+        padding = max(right - left, bottom - top) * self.roi_padding
+        current = self._roi
+        if current is not None:
+            # kept while the hands stay well inside, a steady crop keeps MediaPipe's tracking steady too
+            margin = padding / 4
+            inside = (current[0] <= left - margin and current[1] <= top - margin
+                      and right + margin <= current[2] and bottom + margin <= current[3])
+            hand_area = (right - left + 2 * padding) * (bottom - top + 2 * padding)
+            if inside and (current[2] - current[0]) * (current[3] - current[1]) <= 2 * hand_area:
+                return current
+
+        center_x, center_y = (left + right) / 2, (top + bottom) / 2
+        half_w = max(right - left + 2 * padding, self._ROI_MIN_SIZE) / 2
+        half_h = max(bottom - top + 2 * padding, self._ROI_MIN_SIZE) / 2
+        x0, x1 = int(max(0, center_x - half_w)), int(min(width, center_x + half_w))
+        y0, y1 = int(max(0, center_y - half_h)), int(min(height, center_y + half_h))
+
+        if x1 <= x0 or y1 <= y0 or (x1 - x0) * (y1 - y0) > self._ROI_MAX_AREA * width * height:
+            return None
+        return x0, y0, x1, y1
+
+    def _record_cost(self, cost_ms: float):
+        self.last_inference_ms = cost_ms
+        if self.avg_inference_ms == 0.0:
+            self.avg_inference_ms = cost_ms
+        else:
+            self.avg_inference_ms += self._COST_SMOOTHING * (cost_ms - self.avg_inference_ms)
 
     # genuinley just draws the landmarks on the frame it gets called to
     def draw_landmarks(self, frame, results):
@@ -40,12 +215,3 @@ class Vision:
                 self.mp_styles.get_default_hand_landmarks_style(),
                 self.mp_styles.get_default_hand_connections_style()
             )
-
-    # translator so that it can actually be in the ui
-    def convert_cv_to_pixmap(self, frame: np.ndarray, width: int, height: int) -> QPixmap:
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        h, w, ch = frame_rgb.shape
-        q_img = QImage(frame_rgb.data, w, h, ch * w, QImage.Format.Format_RGB888)
-        
-        return QPixmap.fromImage(q_img)
-
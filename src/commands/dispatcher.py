@@ -0,0 +1,176 @@
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .executor import Executor
+
+class CommandDispatcher:
+    """
+    Drop-in replacement for the Executor that runs the OS input calls on a dedicated thread
+
+    Commands are queued and executed in order, except consecutive mouse moves: a move queued right
+    after another one replaces its target, so only the latest cursor position is sent to the OS.
+    Clicks, drags, scrolls and hotkeys are never merged or reordered.
+    A command is added as "os_dispatch" to the trace of the frame it came from, set by the caller in trace,
+    the frame isn't finished until its queued commands are sent or dropped
+    """
+
+    # weight of the newest sample in the running latency average
+    _LATENCY_SMOOTHING = 0.1
+
+    def __init__(self, executor: "Executor | None" = None):
+        """
+        :param executor: performs the OS input, by default an Executor created on the dispatcher thread,
+            so importing pyautogui (which needs a display) never holds up the caller
+        """
+
+        self.executor = executor
+
+        # [command name, args, time the event was queued, FrameTrace or None]
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._is_running = False
+        self._thread : threading.Thread | None = None
+        # FrameTrace of the frame the next commands come from
+        self.trace = None
+
+        self.dispatched_count = 0
+        self.coalesced_count = 0
+        self.last_latency_ms = 0.0
+        self.avg_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+
+    def start(self):
+        if self._thread is not None:
+            return
+
+        self._is_running = True
+        self._thread = threading.Thread(target=self._run, name="CommandDispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the dispatcher thread once the already queued commands are sent."""
+
+        if self._thread is None:
+            return
+
+        with self._condition:
+            self._is_running = False
+            self._condition.notify()
+        self._thread.join()
+        self._thread = None
+
+    def _enqueue(self, name: str, *args):
+        if self.trace is not None:
+            self.trace.hold()
+
+        with self._condition:
+            if name == "move_mouse" and self._queue and self._queue[-1][0] == "move_mouse":
+                if self._queue[-1][3] is not None:
+                    self._queue[-1][3].drop("os_dispatch")
+                    self._queue[-1][3].finish()
+                self._queue[-1][1:] = [args, time.perf_counter(), self.trace]
+                self.coalesced_count += 1
+            else:
+                self._queue.append([name, args, time.perf_counter(), self.trace])
+            self._condition.notify()
+
+    def _run(self):
+        if self.executor is None:
+            try:
+                from .executor import Executor
+                self.executor = Executor()
+            except Exception as e:
+                print(f"ERROR: OS input is unavailable: {e}")
+                self._discard_commands()
+                return
+
+        while True:
+            with self._condition:
+                while not self._queue and self._is_running:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                name, args, event_time, trace = self._queue.popleft()
+
+            try:
+                getattr(self.executor, name)(*args)
+            except Exception as e:
+                print(f"ERROR: Input command {name} failed: {e}")
+                if trace is not None:
+                    trace.finish()
+                continue
+
+            done = time.perf_counter()
+            if trace is not None:
+                trace.span("os_dispatch", event_time, done)
+                trace.finish()
+            self._record_latency((done - event_time) * 1000)
+            self.dispatched_count += 1
+
+    def _discard_commands(self):
+        """Without an executor the commands are dropped as they come, until stop()"""
+
+        while True:
+            with self._condition:
+                for _, _, _, trace in self._queue:
+                    if trace is not None:
+                        trace.finish()
+                self._queue.clear()
+                if not self._is_running:
+                    return
+                self._condition.wait()
+
+    def _record_latency(self, latency_ms: float):
+        self.last_latency_ms = latency_ms
+        self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+        if self.avg_latency_ms == 0.0:
+            self.avg_latency_ms = latency_ms
+        else:
+            self.avg_latency_ms += self._LATENCY_SMOOTHING * (latency_ms - self.avg_latency_ms)
+
+    def stats(self) -> dict:
+        """
+        Returns a snapshot of the dispatcher state
+
+        :return dict: queued/dispatched/coalesced command counts and the event to OS latency in ms
+        """
+
+        with self._condition:
+            queued = len(self._queue)
+
+        return {
+            "queued": queued,
+            "dispatched": self.dispatched_count,
+            "coalesced": self.coalesced_count,
+            "latency_ms": self.avg_latency_ms,
+            "max_latency_ms": self.max_latency_ms,
+        }
+
+    # ---- Executor interface ----
+
+    def move_mouse(self, x_ratio: float, y_ratio: float):
+        self._enqueue("move_mouse", x_ratio, y_ratio)
+
+    def left_click(self):
+        self._enqueue("left_click")
+
+    def right_click(self):
+        self._enqueue("right_click")
+
+    def start_drag(self):
+        self._enqueue("start_drag")
+
+    def stop_drag(self):
+        self._enqueue("stop_drag")
+
+    def scroll(self, distance):
+        self._enqueue("scroll", distance)
+
+    def change_volume(self, direction: str):
+        self._enqueue("change_volume", direction)
+
+    def switch_window(self):
+        self._enqueue("switch_window")
@@ -1,10 +1,17 @@
 import math
 import numpy as np
-from .executor import Executor
+from .dispatcher import CommandDispatcher
+from preprocess import LandmarkFrame
 
 class CommandMapper:
-    def __init__(self):
-        self.executor = Executor()
+    def __init__(self, executor=None):
+        """
+        :param executor: what performs the OS input (mouse, keys, volume), an Executor by default
+        """
+
+        # OS input calls can block for milliseconds, they run on the dispatcher thread instead of the caller's
+        self.executor = CommandDispatcher(executor)
+        self.executor.start()
         
         self.is_active = False  
         self.is_pinching_left = False
@@ -19,28 +26,35 @@ class CommandMapper:
         self.FREEZE_THRESHOLD = 0.10 
         self.FRAME_MARGIN = 0.2 
 
-    def process_results(self, results):
-        if not results.multi_hand_landmarks:
+    def shutdown(self):
+        """Sends the still queued commands and stops the dispatcher thread."""
+        self.executor.stop()
+
+    def process_results(self, frame: LandmarkFrame):
+        # the OS input the frame leads to is added to its trace
+        self.executor.trace = frame.trace
+
+        if not frame.has_hands:
             return
 
-        hand_landmarks_list = results.multi_hand_landmarks
-        first_hand = hand_landmarks_list[0]
+        # (21, 3) arrays of x, y, z landmarks, in mediapipe detection order
+        first_hand = frame.coords[0]
 
         self._handle_state_switching(first_hand)
 
         if not self.is_active:
             return
 
-        if len(hand_landmarks_list) == 2:
-            self._handle_volume_control(hand_landmarks_list[0], hand_landmarks_list[1])
+        if frame.num_hands == 2:
+            self._handle_volume_control(frame.coords[0], frame.coords[1])
             return 
 
         self._handle_mouse_and_scroll(first_hand)
 
     def _is_finger_curled(self, landmarks, tip_idx, pip_idx):
-        wrist = landmarks.landmark[0]
-        tip = landmarks.landmark[tip_idx]
-        pip = landmarks.landmark[pip_idx]
+        wrist = landmarks[0]
+        tip = landmarks[tip_idx]
+        pip = landmarks[pip_idx]
 
         dist_tip_wrist = self._calculate_distance(tip, wrist)
         dist_pip_wrist = self._calculate_distance(pip, wrist)
@@ -48,9 +62,9 @@ class CommandMapper:
         return dist_tip_wrist < dist_pip_wrist
 
     def _handle_state_switching(self, landmarks):
-        thumb_tip = landmarks.landmark[4]
-        index_mcp = landmarks.landmark[5] 
-        wrist = landmarks.landmark[0]
+        thumb_tip = landmarks[4]
+        index_mcp = landmarks[5] 
+        wrist = landmarks[0]
 
         index_curled = self._is_finger_curled(landmarks, 8, 6)
         middle_curled = self._is_finger_curled(landmarks, 12, 10)
@@ -58,7 +72,7 @@ class CommandMapper:
         pinky_curled = self._is_finger_curled(landmarks, 20, 18)
 
         fingers_folded = middle_curled and ring_curled and pinky_curled and index_curled
-        thumb_is_high = thumb_tip.y < (index_mcp.y - 0.02)
+        thumb_is_high = thumb_tip[1] < (index_mcp[1] - 0.02)
         
         if fingers_folded:
             if thumb_is_high:
@@ -83,10 +97,10 @@ class CommandMapper:
             self.deactivation_counter = 0
 
     def _handle_mouse_and_scroll(self, landmarks):
-        thumb = landmarks.landmark[4]
-        index_tip = landmarks.landmark[8]  
-        index_mcp = landmarks.landmark[5]  
-        middle = landmarks.landmark[12]
+        thumb = landmarks[4]
+        index_tip = landmarks[8]  
+        index_mcp = landmarks[5]  
+        middle = landmarks[12]
         
         index_curled = self._is_finger_curled(landmarks, 8, 6)
         middle_curled = self._is_finger_curled(landmarks, 12, 10)
@@ -105,7 +119,7 @@ class CommandMapper:
         is_victory_sign = (not index_curled) and (not middle_curled) and ring_curled and pinky_curled
 
         if is_victory_sign:
-            hand_y = landmarks.landmark[9].y 
+            hand_y = landmarks[9][1] 
             if hand_y < 0.4:
                 self.executor.scroll(1) 
             elif hand_y > 0.6:
@@ -116,8 +130,8 @@ class CommandMapper:
         should_move = (dist_left > self.FREEZE_THRESHOLD) or self.is_pinching_left
 
         if should_move:
-            raw_x = index_mcp.x
-            raw_y = index_mcp.y
+            raw_x = index_mcp[0]
+            raw_y = index_mcp[1]
             x_mapped = np.interp(raw_x, [self.FRAME_MARGIN, 1.0 - self.FRAME_MARGIN], [0, 1])
             y_mapped = np.interp(raw_y, [self.FRAME_MARGIN, 1.0 - self.FRAME_MARGIN], [0, 1])
             self.executor.move_mouse(1.0 - x_mapped, y_mapped)
@@ -140,8 +154,8 @@ class CommandMapper:
             self.is_pinching_right = False
 
     def _handle_volume_control(self, hand1, hand2):
-        idx1 = hand1.landmark[8]
-        idx2 = hand2.landmark[8]
+        idx1 = hand1[8]
+        idx2 = hand2[8]
         current_dist = self._calculate_distance(idx1, idx2)
 
         if self.last_volume_dist is None:
@@ -157,4 +171,4 @@ class CommandMapper:
             self.last_volume_dist = current_dist
 
     def _calculate_distance(self, p1, p2):
-        return math.hypot(p1.x - p2.x, p1.y - p2.y)
\ No newline at end of file
+        return math.hypot(p1[0] - p2[0], p1[1] - p2[1])
\ No newline at end of file
@@ -0,0 +1,292 @@
+"""
+Runs the recognition pipeline without the GUI and without PyQt, for services, displayless machines and throughput tests
+Predictions are written as JSON lines, one per prediction:
+    {"frame": 42, "time": 1.4, "hands": 1, "gesture": "static", "label": "thumbs_up", "latency_ms": 31.2}
+frame is the frame number, time the seconds since the first frame (recorded time for a replay), gesture the model
+that ran (static, dynamic or null when none had to) and latency_ms the time from the grab to the prediction.
+A line with the label "No Hand" follows the last frame with hands
+
+Run from src/:
+    python -m headless [--camera 0 | --replay SESSION [--speed realtime|fast|landmarks]]
+                       [--output -|tcp://HOST:PORT|unix://PATH] [--rate 2] [--control]
+                       [--max-frames N] [--stats stats.json] [--trace trace.json]
+
+--rate 0 predicts on every frame, with a fast or landmarks replay the output is then the same on every run.
+--control performs the OS input of the gestures (mouse, scroll, volume) like the GUI does.
+The log goes to stderr, a summary with the per stage latencies (see utils/tracing.py) is printed at the end
+"""
+
+import argparse
+import json
+import signal
+import socket
+import sys
+import time
+
+from capture import FrameGrabber, FrameSlot, open_source, REPLAY_SPEEDS
+from ml import Predictor, InferenceJob
+from preprocess import LandmarkFrame
+from utils import Tracer, STATIC_MODEL_PATH, DYNAMIC_MODEL_PATH
+
+class HeadlessPipeline:
+    """
+    The capture and recognition pipeline on plain threads:
+      - grab: the FrameGrabber of the Camera, reading the source into a small FramePool on its own thread,
+        only the newest frame waits for the pipeline (every frame of a fast or landmarks replay)
+      - the thread calling run(): MediaPipe or the recorded landmarks, the classifier, the models and the
+        optional command mapper, frame after frame. Without a GUI to keep responsive the models run inline,
+        no prediction is dropped
+    """
+
+    # one buffer being grabbed, one waiting and one in the pipeline
+    _POOL_SIZE = 3
+
+    def __init__(self, source, vision, predictor: Predictor, output, mapper=None, prediction_rate: float = 2.0,
+                 tracer: Tracer | None = None):
+        """
+        :param source: an opened cv2.VideoCapture or ReplaySource (see capture.open_source())
+        :param vision: the Vision running MediaPipe, None for a landmarks replay
+        :param predictor: the Predictor with its models loaded
+        :param output: text stream the JSON lines are written to
+        :param mapper: CommandMapper turning the landmarks into OS input, None doesn't control anything
+        :param prediction_rate: most predictions per second of frames, 0 predicts on every frame
+        :param tracer: collects the stage latencies, a new one by default
+        """
+
+        self._vision = vision
+        self._predictor = predictor
+        self._output = output
+        self._mapper = mapper
+        self._prediction_interval = 1.0 / prediction_rate if prediction_rate > 0 else 0.0
+        self.tracer = tracer if tracer is not None else Tracer()
+
+        self._grabber = FrameGrabber(source, self._POOL_SIZE, self.tracer, thread_name="HeadlessGrab")
+        self._is_running = False
+
+        self._first_time = None
+        self._last_prediction_time = None
+        self._hands_seen = False
+
+        self.processed_count = 0
+        self.prediction_count = 0
+        self.elapsed_s = 0.0
+
+    def run(self, max_frames: int | None = None):
+        """Processes frames until the source ends, stop() is called or max_frames were processed"""
+
+        if not self._grabber.read_first():
+            return
+
+        self._is_running = True
+        self._grabber.start()
+        start = time.perf_counter()
+
+        try:
+            while self._is_running:
+                slot = self._grabber.get(timeout=0.5)
+                if slot is None:
+                    if self._grabber.finished:
+                        break
+                    continue
+
+                try:
+                    self._handle(slot)
+                finally:
+                    slot.release()
+
+                if max_frames and self.processed_count >= max_frames:
+                    break
+        finally:
+            self.elapsed_s = time.perf_counter() - start
+            self.stop()
+
+    def stop(self):
+        """Stops the grab thread and releases the source"""
+
+        self._is_running = False
+        self._grabber.stop()
+
+    def _handle(self, slot: FrameSlot):
+        trace = slot.trace
+        trace.span("grab_queue", slot.timestamp)
+
+        start = time.perf_counter()
+        if self._vision is None:
+            recorded = slot.landmarks
+            frame = LandmarkFrame(recorded.coords, recorded.present, recorded.is_right, slot.timestamp)
+        else:
+            frame = self._vision.process_frame(slot.image, slot.timestamp)
+        trace.span("mediapipe", start)
+        frame.trace = trace
+        self.processed_count += 1
+
+        # a replay is rated on its recorded time, so any replay speed predicts on the same frames
+        frame_time = slot.landmarks.timestamp if slot.landmarks is not None else slot.timestamp
+        if self._first_time is None:
+            self._first_time = frame_time
+
+        start = time.perf_counter()
+        self._predictor.update(frame)
+        job = self._prepare(frame, frame_time)
+        trace.span("recognition", start)
+
+        if job is not None:
+            if isinstance(job, InferenceJob):
+                start = time.perf_counter()
+                label = self._predictor.run_job(job)
+                trace.span("predictor", start)
+            else:
+                label = job
+            self._emit(frame, frame_time, job, label)
+
+        if self._mapper is not None:
+            start = time.perf_counter()
+            self._mapper.process_results(frame)
+            trace.span("mapper", start)
+
+        trace.finish()
+
+    def _prepare(self, frame: LandmarkFrame, frame_time: float):
+        """
+        :return: an InferenceJob or a label when a prediction is due, None otherwise
+        """
+
+        if not frame.has_hands:
+            if not self._hands_seen:
+                return None
+            self._hands_seen = False
+            return "No Hand"
+
+        self._hands_seen = True
+        if self._last_prediction_time is not None and \
+                frame_time - self._last_prediction_time < self._prediction_interval:
+            return None
+        self._last_prediction_time = frame_time
+
+        return self._predictor.prepare(frame.timestamp)
+
+    def _emit(self, frame: LandmarkFrame, frame_time: float, job, label):
+        line = {
+            "frame": frame.trace.frame_id,
+            "time": round(frame_time - self._first_time, 4),
+            "hands": frame.num_hands,
+            "gesture": job.gesture.name.lower() if isinstance(job, InferenceJob) else None,
+            "label": str(label),
+            "latency_ms": round((time.perf_counter() - frame.trace.grab_time) * 1000, 3),
+        }
+        try:
+            self._output.write(json.dumps(line) + "\n")
+            self._output.flush()
+        except OSError as e:
+            print(f"ERROR: Could not write the prediction: {e}")
+            self._is_running = False
+            return
+        self.prediction_count += 1
+
+    def stats(self) -> dict:
+        """
+        Returns the counters of the run
+
+        :return dict: processed frames, predictions, dropped frames, frames per second and the per stage latencies
+        """
+
+        stages = self.tracer.stats()
+        return {
+            "processed": self.processed_count,
+            "predictions": self.prediction_count,
+            "dropped": self._grabber.drop_count,
+            "elapsed_s": self.elapsed_s,
+            "fps": self.processed_count / self.elapsed_s if self.elapsed_s > 0 else 0.0,
+            "stages": {stage: s for stage, s in stages.items() if s["count"] or s["dropped"]},
+        }
+
+def open_output(spec: str):
+    """
+    :param spec: "-" for stdout, tcp://HOST:PORT or unix://PATH for a socket the runner connects to
+
+    :return: a line buffered text stream
+    """
+
+    if spec == "-":
+        return sys.stdout
+    if spec.startswith("tcp://"):
+        host, _, port = spec[len("tcp://"):].rpartition(":")
+        connection = socket.create_connection((host, int(port)))
+    elif spec.startswith("unix://"):
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(spec[len("unix://"):])
+    else:
+        raise ValueError(f"Unknown output {spec!r}, expected -, tcp://HOST:PORT or unix://PATH")
+    return connection.makefile("w", buffering=1)
+
+def print_summary(stats: dict):
+    print(f"INFO: {stats['processed']} frames in {stats['elapsed_s']:.1f} s ({stats['fps']:.1f} fps), "
+          f"{stats['predictions']} predictions, {stats['dropped']} frames dropped")
+    for stage, s in stats["stages"].items():
+        print(f"INFO:   {stage:12} p50 {s['p50_ms']:8.2f} / p95 {s['p95_ms']:8.2f} / p99 {s['p99_ms']:8.2f} ms,"
+              f" dropped {s['dropped']}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="MIRA recognition pipeline without the GUI")
+    parser.add_argument("--camera", type=int, default=0, help="webcam index")
+    parser.add_argument("--replay", metavar="SESSION", help="play a recorded session instead of the webcam")
+    parser.add_argument("--speed", default="realtime", choices=REPLAY_SPEEDS)
+    parser.add_argument("--output", default="-", help="-, tcp://HOST:PORT or unix://PATH")
+    parser.add_argument("--rate", type=float, default=2.0, help="most predictions per second, 0 for every frame")
+    parser.add_argument("--control", action="store_true", help="perform the OS input of the gestures")
+    parser.add_argument("--max-frames", type=int, help="stop after this many frames")
+    parser.add_argument("--stats", metavar="FILE", help="write the run statistics to this JSON file")
+    parser.add_argument("--trace", metavar="FILE", help="write the stage latencies as a Chrome trace JSON file")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+
+    output = open_output(args.output)
+    # stdout carries the predictions, the log goes to stderr
+    sys.stdout = sys.stderr
+
+    source = open_source(args.camera, args.replay, args.speed)
+    if not source.isOpened():
+        print(f"ERROR: Could not open {args.replay or f'camera {args.camera}'}")
+        sys.exit(1)
+
+    vision = None
+    if not getattr(source, "landmarks_only", False):
+        # imports mediapipe, a landmarks replay goes without it
+        from capture import Vision
+        vision = Vision(draw=False)
+
+    predictor = Predictor(STATIC_MODEL_PATH, DYNAMIC_MODEL_PATH)
+    for model in (predictor.static_model, predictor.dynamic_model):
+        if hasattr(model, "warm_up"):
+            model.warm_up()
+
+    mapper = None
+    if args.control:
+        from commands.mapper import CommandMapper
+        mapper = CommandMapper()
+
+    pipeline = HeadlessPipeline(source, vision, predictor, output, mapper, args.rate)
+    # a service is stopped with SIGTERM, a terminal with Ctrl+C, both end the run cleanly
+    signal.signal(signal.SIGTERM, lambda *_: pipeline.stop())
+
+    try:
+        pipeline.run(args.max_frames)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if mapper is not None:
+            mapper.shutdown()
+
+    stats = pipeline.stats()
+    print_summary(stats)
+    if args.stats:
+        with open(args.stats, "w") as f:
+            json.dump(stats, f, indent=2)
+    if args.trace:
+        count = pipeline.tracer.export_chrome_trace(args.trace)
+        print(f"INFO: Wrote {count} trace events to {args.trace}")
+
+if __name__ == "__main__":
+    main()
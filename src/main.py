@@ -1,21 +1,24 @@
 import sys
 import os
+import argparse
 import warnings
 
-from PyQt6.QtWidgets import QApplication
-
-from ui import MainWindow
+# the startup clock starts here, the GUI imports in main() are timed phase by phase
 from utils import (
     STYLESHEET_PATH,
+    startup_timer,
 )
 
+# imported in the background once the window is up, the first camera start needs them
+PRELOADED_MODULES = ["capture.vision"]
+
 # Silence protobuf deprecation
 warnings.filterwarnings(
     "ignore",
     message="SymbolDatabase.GetPrototype\\(\\) is deprecated"
 )
 
-def load_styles(app : QApplication):
+def load_styles(app : "QApplication"):
     try:
         with open(STYLESHEET_PATH, "r") as f:
             app.setStyleSheet(f.read())
@@ -27,13 +30,70 @@ def load_styles(app : QApplication):
     except Exception as e:
         print(f"Warning: failed to load styles due to an unexpected error: {e}")
 
+def install_crash_handler(app : "QApplication", window):
+    """
+    An unhandled exception in a Qt slot aborts the process without running the atexit handlers,
+    so the recorded samples still queued would be lost. With this hook they are written first,
+    the traceback is printed and the application quits with exit code 1
+    """
+
+    def handle_exception(exc_type, exc_value, exc_traceback):
+        sys.excepthook = sys.__excepthook__
+        try:
+            window.widgetControlPanel.shutdown()
+        finally:
+            sys.__excepthook__(exc_type, exc_value, exc_traceback)
+            window.close()
+            app.exit(1)
+
+    sys.excepthook = handle_exception
+
+def parse_args():
+    from capture import REPLAY_SPEEDS
+
+    parser = argparse.ArgumentParser(description="MIRA hand gesture control")
+    parser.add_argument("--record", metavar="SESSION", help="record the camera frames and landmarks to this directory")
+    parser.add_argument("--replay", metavar="SESSION", help="play a recorded session instead of the webcam")
+    parser.add_argument("--speed", default="realtime", choices=REPLAY_SPEEDS,
+                        help="replay pace: as recorded, as fast as the pipeline goes, or recorded landmarks only")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="write the per stage latency of the frames to this Chrome trace JSON file on exit")
+    return parser.parse_args()
+
 def main():
+    # only imported here: the training processes are spawned, each one runs this module again (as __mp_main__)
+    # and must not load Qt and the GUI
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import QTimer
+    startup_timer.mark("import Qt")
+
+    from ui import MainWindow
+    startup_timer.mark("import ui")
+
+    args = parse_args()
+
     app = QApplication([])
     load_styles(app)
+    startup_timer.mark("QApplication")
     
     window = MainWindow()
+    window.widgetCameraFeed.configure_capture(args.replay, args.speed, args.record)
+    install_crash_handler(app, window)
+    startup_timer.mark("main window")
     window.show()
-    sys.exit(app.exec())
+
+    def window_shown():
+        startup_timer.mark("show")
+        startup_timer.print_phases()
+        startup_timer.preload(PRELOADED_MODULES)
+
+    # runs once the event loop painted the window
+    QTimer.singleShot(0, window_shown)
+    exit_code = app.exec()
+
+    if args.trace:
+        window.widgetCameraFeed.export_trace(args.trace)
+    sys.exit(exit_code)
 
 if __name__ == "__main__":
     main()
@@ -1,2 +1,16 @@
-from .classifier import Classifier
-from .predictor import Predictor
\ No newline at end of file
+import importlib
+
+# the runtime classes are only imported once used, so the training processes (see ml/train)
+# load the models and training code without the predictor and its classifier
+_LAZY_ATTRIBUTES = {
+    "Classifier": ".classifier",
+    "Predictor": ".predictor",
+    "InferenceWorker": ".inference_worker",
+    "InferenceJob": ".inference_worker",
+    "ModelManager": ".model_manager",
+}
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
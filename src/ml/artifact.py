@@ -0,0 +1,159 @@
+"""
+Model artifact format (.mira), a single memory-mappable file:
+
+    magic (8 bytes) | format version (uint32) | header length (uint32) | JSON header | padding | raw arrays
+
+The JSON header holds the metadata of the model and a table of the stored arrays (dtype, shape, byte offset).
+Every array starts on an ALIGNMENT byte boundary, so loading only maps the file and creates read-only views:
+nothing is parsed or copied, and processes loading the same file share its pages.
+"""
+
+import hashlib
+import json
+import os
+import struct
+from datetime import datetime, timezone
+
+import numpy as np
+
+from preprocess import FEATURE_SCHEMA, FEATURES_PER_FRAME
+
+MAGIC = b"MIRAMDL\0"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+_PREAMBLE = struct.Struct("<8sII")
+
+class ArtifactError(ValueError):
+    """Raised when a model artifact is malformed or doesn't match what the caller expects."""
+
+def input_schema(window: int) -> dict:
+    """
+    Describes the model input the current preprocessing produces, stored in every trained model
+
+    :param window: frames per sample, 1 for the static model, GESTURE_WINDOW for the dynamic one
+    """
+
+    return {
+        "feature_schema": FEATURE_SCHEMA,
+        "features_per_frame": FEATURES_PER_FRAME,
+        "window": window,
+    }
+
+def legacy_model_path(path: str) -> str:
+    """Pickled model older versions saved in place of an artifact, e.g. static_model.mira -> static_model.p"""
+
+    return os.path.splitext(path)[0] + ".p"
+
+def fingerprint_file(path: str) -> str:
+    """sha256 of the file contents, identifies the training data a model was built from"""
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def creation_time() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def save_artifact(path: str, arrays: dict, metadata: dict):
+    """
+    Writes the arrays and metadata as a model artifact, atomically (readers never see a half written file)
+
+    :param path: destination file
+    :param arrays: name -> numpy array (numeric dtypes only)
+    :param metadata: JSON serializable model description
+    """
+
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    for name, array in arrays.items():
+        if array.dtype.hasobject:
+            raise ArtifactError(f"Array '{name}' has dtype {array.dtype}, only plain dtypes can be mapped")
+
+    # offsets are relative to the start of the data section
+    table = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = _align(offset)
+        table[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += array.nbytes
+
+    header = json.dumps({"metadata": metadata, "arrays": table}).encode("utf-8")
+    data_start = _align(_PREAMBLE.size + len(header))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + table[name]["offset"])
+            f.write(array.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
+
+def read_metadata(path: str) -> dict:
+    """Reads only the header of an artifact, without mapping the arrays."""
+
+    with open(path, "rb") as f:
+        header, _ = _read_header(f)
+    return header["metadata"]
+
+def _read_header(f):
+    preamble = f.read(_PREAMBLE.size)
+    if len(preamble) < _PREAMBLE.size:
+        raise ArtifactError("File is too short to be a model artifact")
+
+    magic, version, header_length = _PREAMBLE.unpack(preamble)
+    if magic != MAGIC:
+        raise ArtifactError("Not a model artifact (bad magic)")
+    if version != FORMAT_VERSION:
+        raise ArtifactError(f"Unsupported artifact format version {version}, expected {FORMAT_VERSION}")
+
+    header = json.loads(f.read(header_length).decode("utf-8"))
+    return header, _align(_PREAMBLE.size + header_length)
+
+def load_artifact(path: str) -> tuple[dict, dict]:
+    """
+    Maps a model artifact into memory
+
+    :param path: the artifact file
+
+    :return tuple: (name -> read-only array view of the mapped file, metadata)
+    """
+
+    with open(path, "rb") as f:
+        header, data_start = _read_header(f)
+
+    mapped = np.memmap(path, dtype=np.uint8, mode="r")
+
+    arrays = {}
+    for name, entry in header["arrays"].items():
+        dtype = np.dtype(entry["dtype"])
+        shape = tuple(entry["shape"])
+        start = data_start + entry["offset"]
+        count = int(np.prod(shape, dtype=np.int64))
+
+        if start + count * dtype.itemsize > len(mapped):
+            raise ArtifactError(f"Array '{name}' runs past the end of the file")
+        # plain ndarray views on the mapping, memmap subclass overhead stays out of the hot path
+        arrays[name] = np.frombuffer(mapped, dtype=dtype, count=count, offset=start).reshape(shape)
+
+    return arrays, header["metadata"]
+
+def check_schema(metadata: dict, expected: dict):
+    """
+    Refuses models built for a different input than the current preprocessor produces
+
+    :param metadata: metadata of the loaded artifact
+    :param expected: key -> value every model input description must match (e.g. feature schema, window)
+    """
+
+    for key, value in expected.items():
+        if metadata.get(key) != value:
+            raise ArtifactError(f"Model {key} is {metadata.get(key)!r}, the current pipeline expects {value!r}")
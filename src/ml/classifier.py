@@ -1,6 +1,17 @@
 import math
 from enum import Enum, auto
 
+import numpy as np
+
+from preprocess import LandmarkFrame
+
+from utils import CLASSIFIER_WINDOW
+
+# landmark indices of the index, middle, ring and pinky fingertips
+FINGERTIPS = [8, 12, 16, 20]
+# landmarks whose movement over the window is tracked: wrist and middle finger knuckle
+TRACKED_POINTS = [0, 9]
+
 class Gesture(Enum):
     NONE = auto()
     NOISE = auto()
@@ -9,30 +20,126 @@ class Gesture(Enum):
 
 class Classifier:
     # calculates a score that allows it to decide whether or not a movement is noise or a gesture
-    def __init__(self):
+    # the per frame values are kept in fixed size numpy ring buffers with running sums,
+    # so deciding the movement type costs the same for any window length
+    def __init__(self, window_size: int = CLASSIFIER_WINDOW):
         self.score = 0
-        self.past_30_frames = []
-        self.past_frame_count = 0
         self.last_classification = 0
         self.crt_gesture = Gesture.NONE
 
-    # called every frame, gathers the past 20 frames at all times
-    def update(self, results):
-        self.past_30_frames.append(results)
-        self.past_frame_count += 1
+        self.window_size = window_size
+
+        # index of the slot the next frame is written to, and how many frames the window holds
+        self._head = 0
+        self._count = 0
+
+        # ring buffers, one row per frame, all about the first hand
+        self._frames = np.empty(window_size, dtype=object)
+        self._present = np.zeros(window_size, dtype=bool)
+        self._points = np.zeros((window_size, len(TRACKED_POINTS), 2))
+        # distance each tracked point moved since the previous frame, 0 if either frame has no hand
+        self._steps = np.zeros((window_size, len(TRACKED_POINTS)))
+        self._finger_dist = np.zeros((window_size, len(FINGERTIPS)))
+
+        # running sums over the window
+        self._step_sum = np.zeros(len(TRACKED_POINTS))
+        self._hand_count = 0
+        self._dist_sum = np.zeros(len(FINGERTIPS))
+        self._dist_sq_sum = np.zeros(len(FINGERTIPS))
+
+        # running sums drift with every add/subtract, they get recomputed once per window
+        self._updates_since_resync = 0
+
+    # called every frame, keeps the past window_size frames at all times
+    def update(self, frame: LandmarkFrame):
+        slot = self._head
+        prev = (slot - 1) % self.window_size
+
+        if self._count == self.window_size:
+            self._evict(slot)
+        else:
+            self._count += 1
+
+        present = frame.has_hands
+        self._frames[slot] = frame
+        self._present[slot] = present
+
+        if present:
+            self._points[slot] = frame.coords[0, TRACKED_POINTS, :2]
+
+            # fingertips relative to the wrist of the first hand
+            tips = frame.wrist_relative[0, FINGERTIPS]
+            distances = np.sqrt(tips[:, 0] * tips[:, 0] + tips[:, 1] * tips[:, 1])
+            self._finger_dist[slot] = distances
+            self._hand_count += 1
+            self._dist_sum += distances
+            self._dist_sq_sum += distances * distances
+
+        # step from the previous frame, the oldest frame of the window has no step counted
+        if present and self._count > 1 and self._present[prev]:
+            delta = self._points[slot] - self._points[prev]
+            steps = np.sqrt(delta[:, 0] * delta[:, 0] + delta[:, 1] * delta[:, 1])
+            self._steps[slot] = steps
+            self._step_sum += steps
+        else:
+            self._steps[slot] = 0.0
+
+        self._head = (slot + 1) % self.window_size
+
+        self._updates_since_resync += 1
+        if self._updates_since_resync >= self.window_size:
+            self._resync()
+
+    def _evict(self, slot: int):
+        """Removes the oldest frame (at slot) from the running sums, the next one becomes the oldest."""
+
+        if self._present[slot]:
+            distances = self._finger_dist[slot]
+            self._hand_count -= 1
+            self._dist_sum -= distances
+            self._dist_sq_sum -= distances * distances
 
-        if self.past_frame_count > 30:
-            self.past_30_frames.pop(0)
+        # the new oldest frame no longer has a predecessor in the window
+        next_oldest = (slot + 1) % self.window_size
+        self._step_sum -= self._steps[next_oldest]
+        self._steps[next_oldest] = 0.0
+
+    def _resync(self):
+        present = self._present[:self._count] if self._count < self.window_size else self._present
+        distances = self._finger_dist[:len(present)][present]
+
+        self._step_sum = self._steps[:len(present)].sum(axis=0)
+        self._hand_count = len(distances)
+        self._dist_sum = distances.sum(axis=0)
+        self._dist_sq_sum = (distances * distances).sum(axis=0)
+        self._updates_since_resync = 0
+
+    @property
+    def is_full(self) -> bool:
+        return self._count == self.window_size
+
+    def latest(self) -> LandmarkFrame | None:
+        """The newest frame of the window, None if the window is empty."""
+
+        if self._count == 0:
+            return None
+        return self._frames[(self._head - 1) % self.window_size]
+
+    def window(self) -> list:
+        """The frames of the window, oldest first."""
+
+        if self._count < self.window_size:
+            return list(self._frames[:self._count])
+        return list(np.roll(self._frames, -self._head))
 
     def calculate_movement_type(self):
-        if len(self.past_30_frames) < 30:
+        if self._count < self.window_size:
             return "noise"
         
-        last_frame = self.past_30_frames[29]
-        if not last_frame.multi_hand_landmarks:
+        last_frame = self.latest()
+        if not last_frame.has_hands:
             return "noise"
-        last_frame = last_frame.multi_hand_landmarks[0]
-        hand_scale = math.sqrt((last_frame.landmark[9].x - last_frame.landmark[0].x)**2 + (last_frame.landmark[9].y - last_frame.landmark[0].y)**2)
+        hand_scale = last_frame.hand_scale[0]
 
         if hand_scale < 0.01:
             return "noise"
@@ -55,55 +162,26 @@ class Classifier:
 
     # steady hand and moving fingers is usually just sign transition
     def finger_movement(self):
-        if len(self.past_30_frames) < 30: 
+        if self._count < self.window_size: 
             return 0.0
 
-        distances = []
-
-        for res in self.past_30_frames:
-            if not res.multi_hand_landmarks: 
-                continue
-            
-            lm = res.multi_hand_landmarks[0].landmark
-            frame_distances = []
-            dist_index = math.sqrt((lm[8].x - lm[0].x)**2 + (lm[8].y - lm[0].y)**2)
-            frame_distances.append(dist_index)
-
-            dist_middle = math.sqrt((lm[12].x - lm[0].x)**2 + (lm[12].y - lm[0].y)**2)
-            frame_distances.append(dist_middle)
-
-            dist_ring = math.sqrt((lm[16].x - lm[0].x)**2 + (lm[16].y - lm[0].y)**2)
-            frame_distances.append(dist_ring)
-
-            dist_pinky = math.sqrt((lm[20].x - lm[0].x)**2 + (lm[20].y - lm[0].y)**2)
-            frame_distances.append(dist_pinky)
-
-            distances.append(frame_distances)
-
-        if not distances: 
+        if self._hand_count == 0: 
             return 0.0
 
-        # average distances each finger moved
-        avg_dist = []
-        for i in range(4):
-            avg_dist.append(sum(row[i] for row in distances) / len(distances))
-
-        total_wiggle_score = 0
-
-        for row in distances:
-            for i in range(len(row)):
-                deviation = row[i] - avg_dist[i]
-                total_wiggle_score += (deviation ** 2)
-
+        # sum of the squared deviations of each finger from its average distance, from the running sums:
+        # sum((d - avg)^2) = sum(d^2) - sum(d)^2 / n
+        n = self._hand_count
+        deviations = self._dist_sq_sum - self._dist_sum * self._dist_sum / n
+        total_wiggle_score = max(0.0, float(deviations.sum()))
 
-        final_score = total_wiggle_score / len(distances)
+        final_score = total_wiggle_score / n
 
         return final_score
     
     # a relaxed hand has a specific shape, that can be calculated
-    def relaxation_factor(self, results):
+    def relaxation_factor(self, frame: LandmarkFrame):
         # for now just for one hand
-        fingers = self.get_finger_joints(results)
+        fingers = self.get_finger_joints(frame)
         tense_fingers = 0
         for finger in fingers:
             angle = self.finger_relaxation(finger)
@@ -116,9 +194,9 @@ class Classifier:
         else:
             return 0
 
-    def decide_relaxation(self, results):
+    def decide_relaxation(self, frame: LandmarkFrame):
         index = 0
-        self.past_half_second_frames.append(results)
+        self.past_half_second_frames.append(frame)
         for frame in self.past_half_second_frames:
             index += self.relaxation_factor(frame)
         if (len(self.past_half_second_frames) / 2 < index):
@@ -134,24 +212,9 @@ class Classifier:
 
     # dynamic movement will most likely involve the translation of the hand on screen
     # static movement or signs is usually just moving of the fingers
+    # total distance a tracked point (wrist or middle knuckle) moved over the window
     def translation(self, point):
-        total_distance = 0
-        for i in range(29):
-            curr_res = self.past_30_frames[i]
-            next_res = self.past_30_frames[i+1]
-
-            # if for a frame the camera tweaked
-            if not (curr_res.multi_hand_landmarks and next_res.multi_hand_landmarks):
-                continue
-            
-            curr = curr_res.multi_hand_landmarks[0].landmark[point]
-            flwing = next_res.multi_hand_landmarks[0].landmark[point]
-
-            # distance the wrist moved the past 2 frames
-            step_dist = math.sqrt((flwing.x - curr.x)**2 + (flwing.y - curr.y)**2)
-            
-            total_distance += step_dist
-        return total_distance
+        return float(self._step_sum[TRACKED_POINTS.index(point)])
 
     # gestures are usually perfect lines, curves or circles
     def trajectory(self, landmarks):
@@ -184,19 +247,14 @@ class Classifier:
         angle_rad = math.acos(cos)
         return math.degrees(angle_rad)
 
-    def get_finger_joints(self, results):
-        if not results.multi_hand_landmarks:
+    def get_finger_joints(self, frame: LandmarkFrame):
+        if not frame.has_hands:
             return []
 
-        hand_landmarks = results.multi_hand_landmarks[0].landmark
+        hand_landmarks = frame.coords[0]
         fingers = []
 
         for i in range(1, 21, 4):
-            crt_finger = []
-            
-            for j in range(i, i + 4):
-                crt_finger.append(hand_landmarks[j].x)
-                crt_finger.append(hand_landmarks[j].y)
-            
-            fingers.append(crt_finger)
+            # x0, y0, x1, y1, ... of the 4 joints of the finger
+            fingers.append(hand_landmarks[i:i + 4, :2].ravel().tolist())
         return fingers
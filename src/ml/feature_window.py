@@ -0,0 +1,51 @@
+import numpy as np
+
+class FeatureWindow:
+    """
+    Rolling, preallocated matrix holding the processed feature vector of the last window_size frames
+
+    Every row is written twice, at slot and slot + window_size, so the window in chronological order
+    is always one contiguous slice of the buffer and can be handed to a model without copying
+    """
+
+    def __init__(self, window_size: int, feature_count: int):
+        self.window_size = window_size
+        self.feature_count = feature_count
+
+        self._buffer = np.zeros((2 * window_size, feature_count), dtype=np.float64)
+        # slot the next row is written to, which is also where the oldest row starts
+        self._head = 0
+        self._count = 0
+
+    def push(self, features: np.ndarray):
+        """Appends the features of the newest frame, dropping the oldest one once the window is full."""
+
+        self._buffer[self._head] = features
+        self._buffer[self._head + self.window_size] = features
+
+        self._head = (self._head + 1) % self.window_size
+        self._count = min(self._count + 1, self.window_size)
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+
+    @property
+    def is_full(self) -> bool:
+        return self._count == self.window_size
+
+    def latest(self) -> np.ndarray:
+        """(1, feature_count) view of the newest row."""
+
+        newest = self._head - 1 + self.window_size
+        return self._buffer[newest:newest + 1]
+
+    def view(self) -> np.ndarray:
+        """(window_size, feature_count) view of the window, oldest row first, only meaningful once full."""
+
+        return self._buffer[self._head:self._head + self.window_size]
+
+    def flat(self) -> np.ndarray:
+        """(1, window_size * feature_count) view of the window, the row layout the dynamic model was trained on."""
+
+        return self.view().reshape(1, -1)
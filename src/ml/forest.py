@@ -0,0 +1,258 @@
+import numpy as np
+
+from ml.artifact import save_artifact, load_artifact, check_schema
+from preprocess import load_featurizer
+
+_NODE_ARRAYS = ("feature", "threshold", "left", "right", "value", "roots")
+
+class CompiledForest:
+    """
+    Fitted scikit-learn RandomForestClassifier flattened into plain numpy node arrays
+
+    All trees share one set of node arrays, leaves point to themselves and always go "left",
+    so every tree is walked for every sample at once with vectorized indexing, max_depth steps in total.
+    Gives exactly the same probabilities and predictions as the scikit-learn model
+    (inputs are compared as float32 and the trees are summed in order, like scikit-learn does),
+    without its per call validation and dispatch overhead.
+
+    A forest trained on featurized windows (see preprocess/temporal_features.py) carries its featurizer,
+    predict() and predict_proba() take the raw input and featurize it first.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes, n_features: int, max_depth: int,
+                 featurizer=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        # (n_nodes, n_classes) class fractions of every node, only the leaves are ever read
+        self.value = value
+        self.roots = roots
+        self.classes = classes
+        self.n_features = n_features
+        self.max_depth = max_depth
+        self.featurizer = featurizer
+
+    @classmethod
+    def from_sklearn(cls, model, featurizer=None) -> "CompiledForest":
+        """
+        Flattens a fitted RandomForestClassifier (single output)
+
+        :param model: the fitted scikit-learn forest
+        :param featurizer: the fitted featurizer the model was trained on, None for raw inputs
+
+        :return CompiledForest: the equivalent compiled forest
+        """
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(offset, offset + n_nodes, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold).astype(np.float64))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset).astype(np.int32))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset).astype(np.int32))
+            # scikit-learn stores the class fractions of each node, (n_nodes, n_outputs, n_classes)
+            values.append(tree.value[:, 0, :].astype(np.float64))
+            roots.append(offset)
+
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            np.concatenate(features),
+            np.concatenate(thresholds),
+            np.concatenate(lefts),
+            np.concatenate(rights),
+            np.concatenate(values),
+            np.array(roots, dtype=np.int32),
+            cls._plain_classes(model.classes_),
+            int(model.n_features_in_),
+            int(max_depth),
+            featurizer,
+        )
+
+    @staticmethod
+    def _plain_classes(classes) -> np.ndarray:
+        # string labels come as an object array, stored as unicode so they don't need pickle
+        classes = np.asarray(classes)
+        if classes.dtype == object:
+            classes = classes.astype(str)
+        return classes
+
+    @classmethod
+    def merge(cls, forests: list, classes=None) -> "CompiledForest":
+        """
+        Joins forests into one, its probabilities are the average over all their trees
+
+        :param forests: forests taking the same features, the featurizer of the first one is kept
+        :param classes: class order of the result, by default the classes of the first forest
+                        followed by the new classes of the next ones
+
+        :return CompiledForest: the merged forest
+        """
+
+        if classes is None:
+            classes = list(forests[0].classes)
+            for forest in forests[1:]:
+                classes += [label for label in forest.classes if label not in classes]
+        classes = np.asarray(classes)
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for forest in forests:
+            if forest.n_features != forests[0].n_features:
+                raise ValueError(f"Can't merge forests taking {forest.n_features} and {forests[0].n_features} features")
+
+            # node indices shift by the nodes of the forests before
+            features.append(forest.feature)
+            thresholds.append(forest.threshold)
+            lefts.append(forest.left + offset)
+            rights.append(forest.right + offset)
+            roots.append(forest.roots + offset)
+
+            # a class a forest never saw gets 0 in all of its leaves
+            value = np.zeros((len(forest.value), len(classes)), dtype=np.float64)
+            for column, label in enumerate(forest.classes):
+                value[:, np.flatnonzero(classes == label)[0]] = forest.value[:, column]
+            values.append(value)
+
+            offset += len(forest.feature)
+
+        return cls(
+            np.concatenate(features),
+            np.concatenate(thresholds),
+            np.concatenate(lefts).astype(np.int32),
+            np.concatenate(rights).astype(np.int32),
+            np.concatenate(values),
+            np.concatenate(roots).astype(np.int32),
+            classes,
+            forests[0].n_features,
+            max(forest.max_depth for forest in forests),
+            forests[0].featurizer,
+        )
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the stored arrays (nodes and featurizer), i.e. of the artifact minus its header"""
+        nbytes = sum(getattr(self, name).nbytes for name in _NODE_ARRAYS)
+        if self.featurizer is not None:
+            nbytes += sum(array.nbytes for array in self.featurizer.arrays().values())
+        return nbytes
+
+    @property
+    def n_inputs(self) -> int:
+        """Size of a raw input sample, before the featurizer"""
+        return self.n_features if self.featurizer is None else self.featurizer.n_inputs
+
+    def apply(self, X) -> np.ndarray:
+        """
+        Finds the leaf every tree ends in for every sample
+
+        :param X: (n_samples, n_features) input
+
+        :return np.ndarray: (n_samples, n_trees) global node indices of the leaves
+        """
+
+        # scikit-learn trees compare float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected input of shape (n_samples, {self.n_features}), got {X.shape}")
+
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.n_trees))
+
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        return nodes
+
+    def predict_proba(self, X) -> np.ndarray:
+        if self.featurizer is not None:
+            X = self.featurizer.transform(X)
+        leaf_values = self.value[self.apply(X)]
+
+        # summed tree after tree (not pairwise) to stay bit identical with scikit-learn
+        proba = np.zeros((leaf_values.shape[0], leaf_values.shape[2]), dtype=np.float64)
+        for tree in range(self.n_trees):
+            proba += leaf_values[:, tree]
+        proba /= self.n_trees
+
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+    def warm_up(self):
+        """
+        Reads every node array once and runs a dummy prediction,
+        so the first real prediction doesn't wait for the mapped file to be paged in
+        """
+
+        for name in _NODE_ARRAYS:
+            getattr(self, name).sum()
+        self.predict(np.zeros((1, self.n_inputs)))
+
+    def save(self, path: str, metadata: dict):
+        """
+        Writes the forest as a model artifact, the labels and the tree shape go into the header
+
+        :param path: destination file
+        :param metadata: description of the model (input schema, training data, ...)
+        """
+
+        header = dict(metadata)
+        header["model_type"] = "random_forest"
+        header["labels"] = self.classes.tolist()
+        header["n_features"] = self.n_features
+        header["max_depth"] = self.max_depth
+        header["n_trees"] = self.n_trees
+
+        arrays = {name: getattr(self, name) for name in _NODE_ARRAYS}
+        if self.featurizer is not None:
+            header["featurizer"] = self.featurizer.config()
+            arrays.update({"featurizer_" + name: array for name, array in self.featurizer.arrays().items()})
+
+        save_artifact(path, arrays, header)
+
+    @classmethod
+    def load(cls, path: str, expected: dict | None = None) -> tuple["CompiledForest", dict]:
+        """
+        Maps a forest artifact, the node arrays stay backed by the file
+
+        :param path: the artifact file
+        :param expected: metadata values the model must have, see artifact.check_schema
+
+        :return tuple: (the forest, the artifact metadata)
+        """
+
+        arrays, metadata = load_artifact(path)
+        if metadata.get("model_type") != "random_forest":
+            raise ValueError(f"{path} holds a {metadata.get('model_type')!r} model, not a random forest")
+        if expected is not None:
+            check_schema(metadata, expected)
+
+        forest = cls(
+            *(arrays[name] for name in _NODE_ARRAYS),
+            np.array(metadata["labels"]),
+            int(metadata["n_features"]),
+            int(metadata["max_depth"]),
+        )
+        if "featurizer" in metadata:
+            prefix = "featurizer_"
+            forest.featurizer = load_featurizer(
+                metadata["featurizer"],
+                {name[len(prefix):]: array for name, array in arrays.items() if name.startswith(prefix)},
+            )
+        return forest, metadata
@@ -0,0 +1,124 @@
+import threading
+import time
+
+import numpy as np
+
+from utils import LatestBuffer
+
+class InferenceJob:
+    """
+    Snapshot of what a model needs for one prediction, detached from the live window
+
+    gesture: the Gesture the classifier decided on (STATIC or DYNAMIC), picks the model
+    features: (1, n_features) copy of the model input
+    timestamp: grab time of the newest frame of the window
+    trace: FrameTrace of that frame, the worker adds the prediction to it, None when not traced
+    """
+
+    __slots__ = ("gesture", "features", "timestamp", "trace")
+
+    def __init__(self, gesture, features: np.ndarray, timestamp: float, trace=None):
+        self.gesture = gesture
+        self.features = features
+        self.timestamp = timestamp
+        self.trace = trace
+
+class InferenceWorker:
+    """
+    Runs the model predictions on a background thread
+
+    The input queue holds a single job and the newest submitted job always wins,
+    so a slow model never makes the predictions lag behind the camera.
+    Results are handed to on_result(label, window_timestamp, inference_ms) on the worker thread.
+    """
+
+    # weight of the newest sample in the running inference time average
+    _TIME_SMOOTHING = 0.1
+
+    def __init__(self, predictor, on_result):
+        self.predictor = predictor
+        self._on_result = on_result
+
+        self._jobs = LatestBuffer()
+        self._is_running = False
+        self._is_busy = False
+        self._thread : threading.Thread | None = None
+
+        self.completed_count = 0
+        self.last_inference_ms = 0.0
+        self.avg_inference_ms = 0.0
+
+    def start(self):
+        if self._thread is not None:
+            return
+
+        self._is_running = True
+        self._thread = threading.Thread(target=self._run, name="InferenceWorker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the worker thread, a prediction in progress is finished first."""
+
+        if self._thread is None:
+            return
+
+        self._is_running = False
+        self._jobs.close()
+        self._thread.join()
+        self._thread = None
+
+    def submit(self, job: InferenceJob):
+        """Queues the job, replacing (and counting as dropped) a job the worker did not pick up yet."""
+
+        if job.trace is not None:
+            job.trace.hold()
+        replaced = self._jobs.put(job)
+        if replaced is not None and replaced.trace is not None:
+            replaced.trace.drop("predictor")
+            replaced.trace.finish()
+
+    def _run(self):
+        while self._is_running:
+            job = self._jobs.get(timeout=0.5)
+            if job is None:
+                continue
+
+            self._is_busy = True
+            start = time.perf_counter()
+            try:
+                label = self.predictor.run_job(job)
+            except Exception as e:
+                print(f"ERROR: Prediction failed: {e}")
+                if job.trace is not None:
+                    job.trace.finish()
+                continue
+            finally:
+                self._is_busy = False
+
+            if job.trace is not None:
+                job.trace.span("predictor", start)
+                job.trace.finish()
+            self._record_time((time.perf_counter() - start) * 1000)
+            self.completed_count += 1
+            self._on_result(label, job.timestamp, self.last_inference_ms)
+
+    def _record_time(self, inference_ms: float):
+        self.last_inference_ms = inference_ms
+        if self.avg_inference_ms == 0.0:
+            self.avg_inference_ms = inference_ms
+        else:
+            self.avg_inference_ms += self._TIME_SMOOTHING * (inference_ms - self.avg_inference_ms)
+
+    def stats(self) -> dict:
+        """
+        Returns a snapshot of the worker state
+
+        :return dict: queue depth (waiting + running jobs), dropped and completed jobs and the inference time
+        """
+
+        return {
+            "queue_depth": self._jobs.pending + int(self._is_busy),
+            "dropped": self._jobs.drop_count,
+            "completed": self.completed_count,
+            "inference_ms": self.avg_inference_ms,
+        }
@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+
+from ml.predictor import Predictor
+from utils import GESTURE_WINDOW, STATIC_WINDOW
+
+class ModelManager:
+    """
+    Keeps the models of a live Predictor up to date without pausing its predictions
+
+    A background thread reloads the models when their files change on disk or when a reload is requested,
+    warms them up and swaps them into the predictor in one step, keeping its frame window.
+    A model that fails to load leaves the one in use in place.
+    Reports are handed to on_reloaded(report) on the manager thread.
+    """
+
+    # seconds between two checks of the model files
+    _POLL_INTERVAL = 1.0
+
+    def __init__(self, predictor: Predictor, static_model_path: str, dynamic_model_path: str, on_reloaded=None):
+        self.predictor = predictor
+        self._paths = (static_model_path, dynamic_model_path)
+        self._windows = (STATIC_WINDOW, GESTURE_WINDOW)
+        self._on_reloaded = on_reloaded
+
+        self._versions = self._file_versions()
+        self._reload_requested = threading.Event()
+        self._is_running = False
+        self._thread : threading.Thread | None = None
+
+        self.reload_count = 0
+        self.failed_count = 0
+        self.last_reload_ms = 0.0
+
+    def start(self):
+        if self._thread is not None:
+            return
+
+        self._is_running = True
+        self._thread = threading.Thread(target=self._run, name="ModelManager", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops watching, a reload in progress is finished first."""
+
+        if self._thread is None:
+            return
+
+        self._is_running = False
+        self._reload_requested.set()
+        self._thread.join()
+        self._thread = None
+
+    def request_reload(self):
+        """Reloads both models on the manager thread, even when their files look unchanged."""
+
+        self._reload_requested.set()
+
+    def _file_versions(self) -> tuple:
+        versions = []
+        for path in self._paths:
+            try:
+                stat = os.stat(path)
+                versions.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                versions.append(None)
+        return tuple(versions)
+
+    def _run(self):
+        while self._is_running:
+            requested = self._reload_requested.wait(self._POLL_INTERVAL)
+            if not self._is_running:
+                return
+            self._reload_requested.clear()
+
+            # artifacts are replaced atomically, a changed version is always a complete file
+            versions = self._file_versions()
+            if requested or versions != self._versions:
+                self._versions = versions
+                self._reload()
+
+    def _load(self, path: str, window: int, current):
+        model = Predictor.load_model(path, window)
+        if model is None:
+            return current, False
+
+        try:
+            if hasattr(model, "warm_up"):
+                model.warm_up()
+        except Exception as e:
+            print(f"ERROR: Model {path} failed its warm-up prediction: {e}")
+            return current, False
+
+        return model, True
+
+    def _reload(self):
+        start = time.perf_counter()
+
+        loaded = []
+        status = {}
+        for name, path, window, current in zip(
+            ("static", "dynamic"), self._paths, self._windows, (self.predictor.static_model, self.predictor.dynamic_model)
+        ):
+            model, ok = self._load(path, window, current)
+            loaded.append(model)
+            status[name] = "reloaded" if ok else "kept previous"
+            if not ok:
+                self.failed_count += 1
+
+        self.predictor.swap_models(*loaded)
+
+        self.last_reload_ms = (time.perf_counter() - start) * 1000
+        self.reload_count += 1
+        print(f"INFO: Models reloaded in {self.last_reload_ms:.1f} ms "
+              f"(static {status['static']}, dynamic {status['dynamic']})")
+
+        if self._on_reloaded is not None:
+            self._on_reloaded({"reload_ms": self.last_reload_ms, **status})
+
+    def stats(self) -> dict:
+        """
+        Returns a snapshot of the manager state
+
+        :return dict: reload and failed load counts, the last reload duration and the prediction gap around it in ms
+        """
+
+        return {
+            "reloads": self.reload_count,
+            "failed": self.failed_count,
+            "reload_ms": self.last_reload_ms,
+            "gap_ms": self.predictor.swap_gap_ms,
+        }
@@ -1,53 +1,159 @@
 import pickle
+import time
 import numpy as np
 import os
 
-from preprocess import process_dataset
+from preprocess import process_dataset, LandmarkFrame, FEATURES_PER_FRAME
 from ml.classifier import Classifier, Gesture
+from ml.feature_window import FeatureWindow
+from ml.inference_worker import InferenceJob
+from ml.forest import CompiledForest
+from ml.artifact import input_schema, legacy_model_path
+from utils import GESTURE_WINDOW, STATIC_WINDOW
 
 class Predictor:
     def __init__(self, static_model_path : str, dynamic_model_path : str):
-        self.static_model = self.load_model(static_model_path)
-        self.dynamic_model = self.load_model(dynamic_model_path)
+        # swapped as a whole, so a prediction never sees one new and one old model
+        self._models = (
+            self.load_model(static_model_path, STATIC_WINDOW),
+            self.load_model(dynamic_model_path, GESTURE_WINDOW),
+        )
         self._classifier = Classifier()
+        self._features = FeatureWindow(GESTURE_WINDOW, FEATURES_PER_FRAME)
 
-    def load_model(self, path):
-        if not os.path.exists(path):
+        # time of the last model prediction and the pause in predictions around the last model swap
+        self.last_run_time = 0.0
+        self.swap_gap_ms = 0.0
+        self._run_time_before_swap = None
+
+    @property
+    def static_model(self):
+        return self._models[0]
+
+    @property
+    def dynamic_model(self):
+        return self._models[1]
+
+    def swap_models(self, static_model, dynamic_model):
+        """
+        Replaces the models in one step, safe while predictions run on another thread.
+        The classifier and feature windows are kept, so recognition goes on with the current frames
+        """
+
+        self._run_time_before_swap = self.last_run_time
+        self._models = (static_model, dynamic_model)
+
+    @staticmethod
+    def load_model(path, window: int):
+        """
+        Maps the model artifact, falls back to a legacy pickle (compiled in memory) when there is no artifact yet
+
+        :param path: the model artifact
+        :param window: frames per model sample, checked against the model metadata
+
+        :return: the model or None when it's missing or doesn't fit the current preprocessing
+        """
+
+        expected = input_schema(window)
+
+        if os.path.exists(path):
+            try:
+                model, metadata = CompiledForest.load(path, expected)
+            except Exception as e:
+                print(f"ERROR: Failed to load {path}: {e}")
+                return None
+
+            print(f"INFO: Loaded {metadata.get('kind', 'model')} artifact from {path} "
+                  f"({len(metadata['labels'])} labels, created {metadata.get('created_at')})")
+            return model
+
+        legacy_path = legacy_model_path(path)
+        if not os.path.exists(legacy_path):
             print(f"ERROR: Model file at {path} doesn't exist.")
             return None
 
         try:
-            with open(path, 'rb') as f:
+            with open(legacy_path, 'rb') as f:
                 data = pickle.load(f)
                 if isinstance(data, dict) and 'model' in data:
-                    print(f"INFO: Loaded dictionary model from {path}")
-                    return data['model']
+                    model = data['model']
                 else:
-                    print(f"INFO: Loaded raw model object from {path}")
-                    return data
+                    model = data
         except Exception as e:
-            print(f"ERROR: Failed to load {path}: {e}")
+            print(f"ERROR: Failed to load {legacy_path}: {e}")
+            return None
+
+        # pickles carry no schema, at least the input size has to match
+        n_features = getattr(model, "n_features_in_", None)
+        if n_features is not None and n_features != FEATURES_PER_FRAME * window:
+            print(f"ERROR: Legacy model {legacy_path} takes {n_features} features, "
+                  f"expected {FEATURES_PER_FRAME * window}")
             return None
 
-    def predict(self, results):
+        print(f"WARNING: Loaded legacy pickled model from {legacy_path}, retrain or convert it "
+              f"(python ml/train/train.py --convert-legacy)")
+
+        # predicting one sample at a time is much faster on the compiled forest than through scikit-learn
+        if hasattr(model, "estimators_"):
+            model = CompiledForest.from_sklearn(model)
+        return model
+
+    def update(self, frame: LandmarkFrame):
+        """
+        Adds a new frame to the classifier window and caches its processed features,
+        every frame is processed exactly once, when it enters the window
+
+        :param frame: the hand landmarks of the newest frame
+        """
+
+        self._classifier.update(frame)
+        self._features.push(process_dataset(frame))
+
+    def prepare(self, timestamp: float = 0.0):
+        """
+        Decides the movement type of the current window and snapshots the input of the matching model
+
+        :param timestamp: grab time of the newest frame of the window
+
+        :return: an InferenceJob for run_job() or, when no model has to run, the final label
+        """
+
         if self.static_model is None or self.dynamic_model is None:
             return "model not loaded or invalid results"
         
-        self._classifier.calculate_movement_type()
+        movement_type = self._classifier.calculate_movement_type()
 
         if self._classifier.crt_gesture == Gesture.STATIC:
-            processed_data = process_dataset(self._classifier.past_30_frames[29])
-            data_array = np.array([processed_data])
-            prediction = self.static_model.predict(data_array)[0]
-            return prediction
+            return InferenceJob(Gesture.STATIC, self._features.latest().copy(), timestamp)
         elif self._classifier.crt_gesture == Gesture.DYNAMIC:
-            dynamic_row = []
-            
-            for frame in self._classifier.past_30_frames:
-                features = process_dataset(frame) 
-                dynamic_row.extend(features)
-            
-            prediction = self.dynamic_model.predict(np.array([dynamic_row]))[0]
-            return prediction
+            # the classifier decides on its own window, the dynamic model needs GESTURE_WINDOW frames of features,
+            # a window not full yet would hand it zero or stale rows
+            if not self._features.is_full:
+                return "noise"
+            # the cached window already has the layout of a dynamic training row
+            return InferenceJob(Gesture.DYNAMIC, self._features.flat().copy(), timestamp)
         else:
-            return self._classifier.calculate_movement_type()
+            return movement_type
+
+    def run_job(self, job: InferenceJob):
+        """Runs the model picked by the job on its features, safe to call from another thread than update()."""
+
+        static_model, dynamic_model = self._models
+        model = static_model if job.gesture == Gesture.STATIC else dynamic_model
+        label = model.predict(job.features)[0]
+
+        now = time.perf_counter()
+        if self._run_time_before_swap is not None:
+            # first prediction on the swapped models
+            if self._run_time_before_swap:
+                self.swap_gap_ms = (now - self._run_time_before_swap) * 1000
+            self._run_time_before_swap = None
+        self.last_run_time = now
+
+        return label
+
+    def predict(self, frame: LandmarkFrame):
+        job = self.prepare(frame.timestamp)
+        if not isinstance(job, InferenceJob):
+            return job
+        return self.run_job(job)
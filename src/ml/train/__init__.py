@@ -1,2 +1,12 @@
+import importlib
+
 from .recorder import Recorder, RecordingType
-from .train import train_models
\ No newline at end of file
+from .jobs import TrainingJob
+
+# train_models imports scikit-learn, only loaded when it is used (the GUI trains in a separate process)
+_LAZY_ATTRIBUTES = {"train_models": ".train"}
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
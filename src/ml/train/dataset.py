@@ -0,0 +1,381 @@
+"""
+Binary training dataset, a directory holding:
+
+    dataset.json            format version, feature columns, feature schema and the label table
+    features_00000.f32 ...  raw little-endian float32 rows, CHUNK_ROWS rows per file, memory-mappable
+    label_ids.u16           one uint16 index into the label table per row
+
+Every file is only ever appended to (the label table is rewritten atomically when a label is added),
+features are written before their label id, so the label index decides how many rows are complete.
+"""
+
+import csv
+import hashlib
+import json
+import os
+
+import numpy as np
+
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from preprocess import FEATURE_SCHEMA
+from ml.artifact import fingerprint_file
+from utils import (
+    STATIC_GESTURE_TRAINING_DATA_PATH,
+    DYNAMIC_GESTURE_TRAINING_DATA_PATH,
+    GESTURE_WINDOW,
+)
+
+FORMAT_VERSION = 1
+CHUNK_ROWS = 4096
+
+_META_FILE = "dataset.json"
+_LABELS_FILE = "label_ids.u16"
+_FEATURE_DTYPE = np.dtype("<f4")
+_LABEL_DTYPE = np.dtype("<u2")
+
+def static_columns() -> list:
+    """Feature column names of a static sample, as in the CSV header"""
+
+    return [f'left_{i}' for i in range(42)] + [f'right_{i}' for i in range(42)]
+
+def dynamic_columns(window: int = GESTURE_WINDOW) -> list:
+    """Feature column names of a dynamic sample of window frames, as in the CSV header"""
+
+    columns = []
+    for j in range(window):
+        columns += [f'frame_{j}_left_{i}' for i in range(42)] + [f'frame_{j}_right_{i}' for i in range(42)]
+    return columns
+
+def legacy_csv_path(path: str) -> str:
+    """CSV file older versions recorded in place of a dataset, e.g. data/static_gestures_training_data -> .csv"""
+
+    return path + ".csv"
+
+class GestureDataset:
+    """
+    Append-only binary store of labeled training samples, see the module description for the layout
+    """
+
+    def __init__(self, path: str):
+        """
+        Opens an existing dataset
+
+        :param path: the dataset directory
+        """
+
+        self.path = path
+        with open(os.path.join(path, _META_FILE)) as f:
+            meta = json.load(f)
+
+        if meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported dataset format version {meta.get('format_version')} in {path}")
+
+        self.columns = meta["columns"]
+        self.feature_schema = meta["feature_schema"]
+        self.label_table = meta["labels"]
+        self._label_lookup = {label: i for i, label in enumerate(self.label_table)}
+
+        # append handles, opened on the first append
+        self._count = 0
+        self._features_file = None
+        self._features_chunk = None
+        self._labels_file = None
+
+    @classmethod
+    def create(cls, path: str, columns: list, feature_schema: str = FEATURE_SCHEMA) -> "GestureDataset":
+        """
+        Creates an empty dataset, or opens it when it already exists with the same columns
+
+        :param path: the dataset directory
+        :param columns: names of the feature columns
+        :param feature_schema: preprocessing the features come from
+        """
+
+        if os.path.exists(os.path.join(path, _META_FILE)):
+            dataset = cls(path)
+            if dataset.columns != columns:
+                raise ValueError(f"Dataset {path} exists with {len(dataset.columns)} different columns")
+            return dataset
+
+        os.makedirs(path, exist_ok=True)
+        _write_json(os.path.join(path, _META_FILE), {
+            "format_version": FORMAT_VERSION,
+            "dtype": _FEATURE_DTYPE.str,
+            "chunk_rows": CHUNK_ROWS,
+            "columns": columns,
+            "feature_schema": feature_schema,
+            "labels": [],
+        })
+        open(os.path.join(path, _LABELS_FILE), "ab").close()
+        return cls(path)
+
+    @property
+    def n_features(self) -> int:
+        return len(self.columns)
+
+    @property
+    def _row_bytes(self) -> int:
+        return self.n_features * _FEATURE_DTYPE.itemsize
+
+    def _chunk_path(self, index: int) -> str:
+        return os.path.join(self.path, f"features_{index:05d}.f32")
+
+    def __len__(self) -> int:
+        return os.path.getsize(os.path.join(self.path, _LABELS_FILE)) // _LABEL_DTYPE.itemsize
+
+    def _save_meta(self):
+        with open(os.path.join(self.path, _META_FILE)) as f:
+            meta = json.load(f)
+        meta["labels"] = self.label_table
+        _write_json(os.path.join(self.path, _META_FILE), meta)
+
+    def _label_id(self, label: str) -> int:
+        label = str(label)
+        if label not in self._label_lookup:
+            self._label_lookup[label] = len(self.label_table)
+            self.label_table.append(label)
+            self._save_meta()
+        return self._label_lookup[label]
+
+    def _truncate_to(self, rows: int):
+        # drops the features of rows whose label id never got written (interrupted append)
+        chunk = rows // CHUNK_ROWS
+        chunk_path = self._chunk_path(chunk)
+        if os.path.exists(chunk_path):
+            expected = (rows - chunk * CHUNK_ROWS) * self._row_bytes
+            if os.path.getsize(chunk_path) > expected:
+                os.truncate(chunk_path, expected)
+
+        # an append crossing a chunk boundary also leaves rows in the chunks after it,
+        # the next appends would go after them and be misaligned with their labels
+        chunk += 1
+        while os.path.exists(self._chunk_path(chunk)):
+            os.remove(self._chunk_path(chunk))
+            chunk += 1
+
+        # a leftover half written label id
+        labels_path = os.path.join(self.path, _LABELS_FILE)
+        if os.path.getsize(labels_path) > rows * _LABEL_DTYPE.itemsize:
+            os.truncate(labels_path, rows * _LABEL_DTYPE.itemsize)
+
+    def append(self, label: str, features):
+        """
+        Appends samples with the same label
+
+        :param label: the gesture label
+        :param features: one (n_features,) sample or a (n, n_features) batch
+        """
+
+        rows = np.asarray(features, dtype=_FEATURE_DTYPE).reshape(-1, self.n_features)
+        self.append_rows([label] * len(rows), rows)
+
+    def append_rows(self, labels: list, features):
+        """
+        Appends samples with their own labels, the files stay open for the next append until close()
+
+        :param labels: the gesture label of every sample
+        :param features: (n, n_features) samples
+        """
+
+        rows = np.asarray(features, dtype=_FEATURE_DTYPE).reshape(-1, self.n_features)
+        label_ids = np.array([self._label_id(label) for label in labels], dtype=_LABEL_DTYPE)
+
+        if self._labels_file is None:
+            self._count = len(self)
+            self._truncate_to(self._count)
+            self._labels_file = open(os.path.join(self.path, _LABELS_FILE), "ab")
+
+        written = 0
+        while written < len(rows):
+            chunk, offset = divmod(self._count + written, CHUNK_ROWS)
+            take = min(CHUNK_ROWS - offset, len(rows) - written)
+            self._chunk_file(chunk).write(rows[written:written + take].tobytes())
+            written += take
+
+        # the features reach the file before the label ids that make their rows complete
+        self._features_file.flush()
+        self._labels_file.write(label_ids.tobytes())
+        self._labels_file.flush()
+        self._count += len(rows)
+
+    def _chunk_file(self, chunk: int):
+        if self._features_chunk != chunk:
+            if self._features_file is not None:
+                self._features_file.flush()
+                self._features_file.close()
+            self._features_file = open(self._chunk_path(chunk), "ab")
+            self._features_chunk = chunk
+        return self._features_file
+
+    def sync(self):
+        """Forces the appended rows to disk"""
+
+        for f in (self._features_file, self._labels_file):
+            if f is not None:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def close(self):
+        """Closes the files kept open by append_rows()"""
+
+        for f in (self._features_file, self._labels_file):
+            if f is not None:
+                f.close()
+        self._features_file = None
+        self._features_chunk = None
+        self._labels_file = None
+
+    def label_ids(self, rows: int | None = None) -> np.ndarray:
+        count = len(self) if rows is None else rows
+        if count == 0:
+            return np.zeros(0, dtype=_LABEL_DTYPE)
+        return np.memmap(os.path.join(self.path, _LABELS_FILE), dtype=_LABEL_DTYPE, mode="r", shape=(count,))
+
+    def labels(self, rows: int | None = None) -> np.ndarray:
+        """(n_rows,) label of every row, of the first rows only when given"""
+
+        return np.array(self.label_table, dtype=str)[self.label_ids(rows)]
+
+    def chunks(self, rows: int | None = None) -> list:
+        """Read-only memory maps of the complete rows of every chunk (or of the first rows), (rows, n_features) each"""
+
+        count = len(self) if rows is None else rows
+        chunks = []
+        for chunk in range((count + CHUNK_ROWS - 1) // CHUNK_ROWS):
+            chunk_rows = min(CHUNK_ROWS, count - chunk * CHUNK_ROWS)
+            chunks.append(np.memmap(self._chunk_path(chunk), dtype=_FEATURE_DTYPE, mode="r",
+                                    shape=(chunk_rows, self.n_features)))
+        return chunks
+
+    def features(self, rows: int | None = None) -> np.ndarray:
+        """
+        (n_rows, n_features) float32 feature matrix, mapped straight from the file while the dataset fits one chunk
+        """
+
+        chunks = self.chunks(rows)
+        if not chunks:
+            return np.zeros((0, self.n_features), dtype=_FEATURE_DTYPE)
+        if len(chunks) == 1:
+            return chunks[0]
+        return np.concatenate(chunks)
+
+    def fingerprint(self, rows: int | None = None) -> str:
+        """
+        sha256 of the columns, labels and features of the complete rows, or of the first rows only
+
+        Rows and label ids are never rewritten, so the fingerprint of the first n rows stays the same
+        while samples are appended
+        """
+
+        label_ids = self.label_ids(rows)
+        used_labels = self.label_table[:int(label_ids.max()) + 1] if len(label_ids) else []
+
+        digest = hashlib.sha256()
+        digest.update(json.dumps(self.columns).encode("utf-8"))
+        digest.update(json.dumps(used_labels).encode("utf-8"))
+        digest.update(label_ids.tobytes())
+        for chunk in self.chunks(rows):
+            digest.update(chunk.tobytes())
+        return digest.hexdigest()
+
+def _write_json(path: str, data: dict):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def csv_to_dataset(csv_path: str, dataset_path: str) -> GestureDataset:
+    """
+    Converts a training CSV (label column first) into a binary dataset, appending to it if it exists
+
+    :return GestureDataset: the dataset
+    """
+
+    with open(csv_path, newline='') as f:
+        reader = csv.reader(f)
+        columns = next(reader)[1:]
+        rows = list(reader)
+
+    dataset = GestureDataset.create(dataset_path, columns)
+
+    # consecutive rows with the same label are appended in one go
+    labels = [row[0] for row in rows]
+    features = np.array([row[1:] for row in rows], dtype=np.float64).reshape(len(rows), len(columns))
+    start = 0
+    for end in range(1, len(rows) + 1):
+        if end == len(rows) or labels[end] != labels[start]:
+            dataset.append(labels[start], features[start:end])
+            start = end
+
+    dataset.close()
+    return dataset
+
+def dataset_to_csv(dataset_path: str, csv_path: str):
+    """Writes a binary dataset back as a training CSV, with the label in the first column"""
+
+    dataset = GestureDataset(dataset_path)
+    labels = dataset.labels()
+
+    with open(csv_path, mode='w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['label'] + dataset.columns)
+        start = 0
+        for chunk in dataset.chunks():
+            for i, row in enumerate(chunk.astype(np.float64).tolist()):
+                writer.writerow([labels[start + i]] + row)
+            start += len(chunk)
+
+def training_data_fingerprint(path: str, rows: int) -> str | None:
+    """
+    Fingerprint of the first rows of a training set, None when it's not a binary dataset (CSVs aren't append-only)
+    """
+
+    if not os.path.exists(os.path.join(path, _META_FILE)):
+        return None
+
+    dataset = GestureDataset(path)
+    if rows > len(dataset):
+        return None
+    return dataset.fingerprint(rows)
+
+def load_training_data(path: str) -> tuple[np.ndarray, np.ndarray, str]:
+    """
+    Loads a training set, from the binary dataset or, when there is none, from the CSV older versions recorded
+
+    :param path: the dataset directory
+
+    :return tuple: (n_rows, n_features) features, (n_rows,) labels, fingerprint of the data
+    """
+
+    if os.path.exists(os.path.join(path, _META_FILE)):
+        dataset = GestureDataset(path)
+        # the recorder may go on appending meanwhile, everything is read up to the same row
+        rows = len(dataset)
+        return dataset.features(rows), dataset.labels(rows), dataset.fingerprint(rows)
+
+    # only needed for the old format, pandas is slow to import
+    import pandas as pd
+
+    csv_path = legacy_csv_path(path)
+    data = pd.read_csv(csv_path)
+    print(f"WARNING: Loaded the legacy CSV {csv_path}, new recordings only go to {path}, "
+          f"convert it (python ml/train/dataset.py --to-binary)")
+    return data.drop('label', axis=1).values, data['label'].values, fingerprint_file(csv_path)
+
+if __name__ == "__main__":
+    # python ml/train/dataset.py --to-binary | --to-csv
+    datasets = [STATIC_GESTURE_TRAINING_DATA_PATH, DYNAMIC_GESTURE_TRAINING_DATA_PATH]
+
+    # the CSVs written by --to-csv are exports, regenerated from the datasets and not kept in the repository
+    if "--to-csv" in sys.argv:
+        for path in datasets:
+            dataset_to_csv(path, legacy_csv_path(path))
+            print(f"Converted {path} -> {legacy_csv_path(path)}")
+    elif "--to-binary" in sys.argv:
+        for path in datasets:
+            dataset = csv_to_dataset(legacy_csv_path(path), path)
+            print(f"Converted {legacy_csv_path(path)} -> {path} ({len(dataset)} rows)")
+    else:
+        print("Usage: python ml/train/dataset.py --to-binary | --to-csv")
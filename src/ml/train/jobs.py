@@ -0,0 +1,161 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+from utils import TRAINING_N_JOBS, TRAINING_NICENESS, TRAINING_MAX_CORES
+
+def training_cores(max_cores: int | None) -> set | None:
+    """
+    Picks the cores training processes are pinned to, the last ones, the first ones stay with the camera and GUI threads
+
+    :param max_cores: cores given to the training, None for all but one
+
+    :return set | None: the core ids or None where the affinity can't be set
+    """
+
+    if not hasattr(os, "sched_getaffinity"):
+        return None
+
+    cores = sorted(os.sched_getaffinity(0))
+    if max_cores is None:
+        max_cores = len(cores) - 1
+    max_cores = max(1, min(max_cores, len(cores)))
+    return set(cores[-max_cores:])
+
+def limit_resources(niceness: int, cores: set | None):
+    """Lowers the priority of the calling process by niceness (Unix only) and pins it to cores (Linux only)"""
+
+    if niceness and hasattr(os, "nice"):
+        os.nice(niceness)
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+
+def _train_in_process(kind: str, messages, n_jobs: int, niceness: int, cores: set | None, full: bool):
+    """Entry point of a training process, reports ("progress" | "done" | "error", kind, ...) messages."""
+
+    try:
+        limit_resources(niceness, cores)
+
+        # imported here, scikit-learn is only loaded in the training process
+        from joblib import parallel_config
+        from .train import train_model
+
+        # forests build their trees on threads, joblib's default process backend refuses to run in a daemon process
+        with parallel_config(backend="threading"):
+            score = train_model(
+                kind, n_jobs=n_jobs, full=full,
+                progress=lambda fraction, step: messages.put(("progress", kind, fraction, step)),
+            )
+        if score is None:
+            messages.put(("error", kind, "no training data"))
+        else:
+            messages.put(("done", kind, score))
+    except Exception as e:
+        messages.put(("error", kind, str(e)))
+
+class TrainingJob:
+    """
+    Trains the static and dynamic models at the same time, each in its own low priority process
+    The models are updated with the new samples only, unless full is set (see train.fit_model)
+
+    Progress is handed to on_progress(kind, fraction, step) and the outcome to on_finished(ok, message),
+    both on the job monitor thread. Cancelling kills the processes, the models are only replaced
+    (atomically) once fully trained, so a cancelled job leaves the previous ones in place.
+    """
+
+    # seconds between two checks of the training processes while no message arrives
+    _POLL_INTERVAL = 0.2
+
+    def __init__(self, on_progress=None, on_finished=None, kinds=("static", "dynamic"), full: bool = False,
+                 n_jobs: int = TRAINING_N_JOBS, niceness: int = TRAINING_NICENESS,
+                 max_cores: int | None = TRAINING_MAX_CORES):
+        self._on_progress = on_progress
+        self._on_finished = on_finished
+        self._kinds = kinds
+        self._full = full
+        self._n_jobs = n_jobs
+        self._niceness = niceness
+        self._cores = training_cores(max_cores)
+
+        # spawned, the GUI process may hold threads and Qt state a fork would copy
+        self._context = multiprocessing.get_context("spawn")
+        self._messages = None
+        self._processes = {}
+        self._monitor : threading.Thread | None = None
+        self._is_cancelled = False
+
+        self.start_time = 0.0
+        self.duration = 0.0
+        self.results = {}
+
+    @property
+    def is_running(self) -> bool:
+        return self._monitor is not None and self._monitor.is_alive()
+
+    def start(self):
+        if self._monitor is not None:
+            return
+
+        self.start_time = time.perf_counter()
+        self._messages = self._context.Queue()
+        for kind in self._kinds:
+            process = self._context.Process(
+                target=_train_in_process,
+                args=(kind, self._messages, self._n_jobs, self._niceness, self._cores, self._full),
+                name=f"Training-{kind}",
+                daemon=True,
+            )
+            process.start()
+            self._processes[kind] = process
+
+        self._monitor = threading.Thread(target=self._run, name="TrainingJob", daemon=True)
+        self._monitor.start()
+
+    def cancel(self):
+        """Stops the training processes, the models in use are kept."""
+
+        self._is_cancelled = True
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+
+    def wait(self, timeout: float | None = None):
+        if self._monitor is not None:
+            self._monitor.join(timeout)
+
+    def _run(self):
+        pending = set(self._kinds)
+
+        while pending:
+            try:
+                message = self._messages.get(timeout=self._POLL_INTERVAL)
+            except queue.Empty:
+                # a process that died without reporting (killed, cancelled, crashed)
+                for kind in list(pending):
+                    if not self._processes[kind].is_alive() and self._messages.empty():
+                        self.results[kind] = "cancelled" if self._is_cancelled else "stopped unexpectedly"
+                        pending.discard(kind)
+                continue
+
+            state, kind = message[0], message[1]
+            if state == "progress":
+                if self._on_progress is not None:
+                    self._on_progress(kind, message[2], message[3])
+            elif state == "done":
+                self.results[kind] = f"accuracy {message[2] * 100:.1f}%"
+                pending.discard(kind)
+            else:
+                self.results[kind] = f"failed: {message[2]}"
+                pending.discard(kind)
+
+        for process in self._processes.values():
+            process.join()
+
+        self.duration = time.perf_counter() - self.start_time
+        ok = not self._is_cancelled and all(result.startswith("accuracy") for result in self.results.values())
+        summary = ", ".join(f"{kind} {self.results[kind]}" for kind in self._kinds)
+
+        if self._on_finished is not None:
+            self._on_finished(ok, f"{summary} ({self.duration:.1f} s)")
@@ -1,8 +1,9 @@
-import csv
 import os
 from enum import Enum, auto
 
-from preprocess import process_dataset
+from preprocess import process_dataset, process_frames, LandmarkFrame
+from .dataset import GestureDataset, static_columns, dynamic_columns, csv_to_dataset, legacy_csv_path
+from .writer import DatasetWriter
 from utils import (
     DATA_DIR,
     STATIC_GESTURE_TRAINING_DATA_PATH,
@@ -24,7 +25,7 @@ class Recorder:
 
     def __init__(self):
         """
-        Ensures the state of the recorder is initialized properly and the training data files exist
+        Ensures the state of the recorder is initialized properly and the training datasets exist
         """
         
         # Create data directory if it doesn't exist
@@ -49,7 +50,9 @@ class Recorder:
         self._recording_active = False
         self._pending_label = ""
 
-        self._ensure_headers_exist()
+        # samples are written by a background writer per dataset
+        self._writers = {}
+        self._ensure_datasets_exist()
     
     def reset(self):
         self.current_working_file = ""
@@ -58,30 +61,27 @@ class Recorder:
         self._video_buffer = []
         self._video_frame_count = 0
     
-    def _ensure_headers_exist(self):
+    def _ensure_datasets_exist(self):
         """
-        Private helper to initialize CSV files with headers if they do not already exist
+        Private helper to open the training datasets, creating the missing ones
+        CSV data recorded by older versions is converted, so new samples are appended to it
         """
 
-        # Header of the static/static noise gestures file
-        header_static = ['label'] + [f'left_{i}' for i in range(42)] + [f'right_{i}' for i in range(42)]
+        columns = {
+            RecordingType.STATIC: static_columns(),
+            RecordingType.DYNAMIC: dynamic_columns(),
+        }
 
-        # Header of the dynamic/dynamic noise gestures file
-        header_dynamic = ['label']
-        for j in range(30):
-            header_dynamic += [f'frame_{j}_left_{i}' for i in range(42)] + [f'frame_{j}_right_{i}' for i in range(42)]
+        for gesture_type, path in self.file_map.items():
+            if gesture_type == RecordingType.NONE:
+                continue
 
-        headers = {
-            RecordingType.STATIC: header_static,
-            RecordingType.DYNAMIC: header_dynamic,
-        }
-        
-        # Create files with headers if they do not exist
-        for gesture_type, filepath in self.file_map.items():
-            if not os.path.exists(filepath) and gesture_type != RecordingType.NONE:
-                with open(filepath, mode='w', newline='') as f:
-                    writer = csv.writer(f)
-                    writer.writerow(headers[gesture_type])
+            if not os.path.exists(path) and os.path.exists(legacy_csv_path(path)):
+                print(f"INFO: Converting {legacy_csv_path(path)} to a binary dataset")
+                csv_to_dataset(legacy_csv_path(path), path)
+            writer = DatasetWriter(GestureDataset.create(path, columns[gesture_type]))
+            writer.start()
+            self._writers[gesture_type] = writer
 
     def pick_recording_type(self, recording_type: RecordingType):
         self.reset()
@@ -91,23 +91,22 @@ class Recorder:
         print("INFO: Current recording type: " + str(self.current_recording_type))
     
     # this happens every frame
-    def add_frame(self, results):
+    def add_frame(self, frame: LandmarkFrame):
         """
-        Adds a frame's landmark results to the recording buffer
+        Adds a frame's landmarks to the recording buffer
 
-        :param results: The processed landmark results from the vision module
+        :param frame: The hand landmarks of the frame from the vision module
         """
 
         if self.current_recording_type == RecordingType.STATIC:
-            self._buffer = [results]
+            self._buffer = [frame]
             
         elif self.current_recording_type == RecordingType.DYNAMIC:
             if self._recording_active:
-                crt_frames = process_dataset(results)
-                self._video_buffer.append(crt_frames)
+                # the raw frames are kept and processed in one batch once the sequence is complete
+                self._video_buffer.append(frame)
                 self._video_frame_count += 1
-                print(f"Recorded {self._video_frame_count} / 30 frames")
-                
+
                 if len(self._video_buffer) >= 30:
                     self._save_dynamic_gesture(self._pending_label)
                     self._recording_active = False
@@ -135,28 +134,45 @@ class Recorder:
         else:
             print("ERROR: No recording type selected. Cannot save gesture.")
 
-    def _save_static_gesture(self, label, results):
+    def _save_static_gesture(self, label, frame: LandmarkFrame):
         """
-        Private method to process and append a static labeled gesture frame to the currently active CSV file
+        Private method to process and append a static labeled gesture frame to the static dataset
         
         :param label: The gesture label for this recording
-        :param results: MediaPipe hand detection results object
+        :param frame: The hand landmarks of the recorded frame
         """
-        interpreted_data = process_dataset(results)
 
-        with open(self.current_working_file, mode='a', newline='') as f:
-            if (f.tell() == 0):
-                print(f"Error: File {self.current_working_file} is empty. Cannot write data without headers.")
-                return
-            writer = csv.writer(f)
-            writer.writerow([label] + interpreted_data)
+        self._writers[RecordingType.STATIC].submit(label, process_dataset(frame))
 
     def _save_dynamic_gesture(self, label):
-        with open(self.current_working_file, mode='a', newline='') as f:
-            if (f.tell() == 0):
-                print(f"Error: File {self.current_working_file} is empty. Cannot write data without headers.")
-                return
-            flat_video_data = [coordinate for frame in self._video_buffer for coordinate in frame]
-            writer = csv.writer(f)
-            writer.writerow([label] + flat_video_data)
-        return
+        # the whole sequence becomes one row, frame after frame
+        # always the raw window, the dynamic model featurizes it itself (see preprocess/temporal_features.py),
+        # so the same recordings can train a model with any featurizer
+        flat_video_data = process_frames(self._video_buffer).ravel()
+        self._writers[RecordingType.DYNAMIC].submit(label, flat_video_data)
+
+    def flush(self):
+        """
+        Waits until every recorded sample is written to its dataset, e.g. before training on them
+        """
+
+        for writer in self._writers.values():
+            writer.flush()
+
+    def close(self):
+        """
+        Writes the remaining samples and stops the background writers
+        """
+
+        for writer in self._writers.values():
+            writer.stop()
+
+    def stats(self) -> dict | None:
+        """
+        Returns the writer stats of the current recording type, see DatasetWriter.stats()
+
+        :return dict | None: the stats or None when no recording type is selected
+        """
+
+        writer = self._writers.get(self.current_recording_type)
+        return writer.stats() if writer is not None else None
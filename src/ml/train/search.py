@@ -0,0 +1,188 @@
+import itertools
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from .dataset import load_training_data
+from .jobs import training_cores, limit_resources
+from utils import TRAINING_NICENESS, TRAINING_MAX_CORES
+
+# candidates tried by search_models(), every combination of these settings
+SEARCH_GRID = {
+    "model": ["random_forest", "extra_trees"],
+    "n_estimators": [25, 50, 100],
+    "max_depth": [None, 10, 20],
+    "max_features": ["sqrt", 0.3],
+}
+SEARCH_FOLDS = 5
+
+# single-sample predictions timed per fold, the median is reported
+_LATENCY_RUNS = 200
+
+# set in every pool process by _init_worker, the data is mapped from the files the search wrote once.
+# With a featurizer _X holds the raw windows, the featurizer is fitted on the training rows of every fold
+_X = None
+_y = None
+_folds = None
+_featurizer = None
+
+def _candidates(grid: dict) -> list[dict]:
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+def _build_model(params: dict):
+    # imported in the pool processes only
+    from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier
+
+    model_types = {"random_forest": RandomForestClassifier, "extra_trees": ExtraTreesClassifier}
+    settings = {name: value for name, value in params.items() if name != "model"}
+    return model_types[params["model"]](n_jobs=1, **settings)
+
+def _init_worker(data_dir: str, n_folds: int, niceness: int, cores: set | None, featurizer):
+    global _X, _y, _folds, _featurizer
+
+    from sklearn.model_selection import StratifiedKFold
+
+    limit_resources(niceness, cores)
+    _X = np.load(os.path.join(data_dir, "X.npy"), mmap_mode="r")
+    _y = np.load(os.path.join(data_dir, "y.npy"), mmap_mode="r")
+    _featurizer = featurizer
+    # the same seed in every process, the folds need not be sent along with each task
+    _folds = list(StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=0).split(np.zeros(len(_y)), _y))
+
+def _evaluate(task: tuple) -> tuple:
+    """Trains one candidate on one fold, returns (candidate, accuracy, fit s, latency ms, size in bytes)"""
+
+    from ml.forest import CompiledForest
+    from preprocess import load_featurizer
+
+    candidate, params, fold = task
+    train_rows, test_rows = _folds[fold]
+
+    start = time.perf_counter()
+    X_train = _X[train_rows]
+    featurizer = None
+    if _featurizer is not None:
+        # a fresh featurizer per fold, its PCA never sees the held-out rows (like fit_model)
+        featurizer = load_featurizer(_featurizer.config(), {}).fit(X_train)
+        X_train = featurizer.transform(X_train)
+    model = _build_model(params)
+    model.fit(X_train, _y[train_rows])
+    fit_s = time.perf_counter() - start
+
+    # scored on the compiled forest the predictor runs, it takes the raw windows and featurizes them itself
+    forest = CompiledForest.from_sklearn(model, featurizer)
+    accuracy = float(np.mean(forest.predict(_X[test_rows]) == _y[test_rows]))
+
+    sample = np.array(_X[test_rows[:1]])
+    forest.predict(sample)
+    latencies = []
+    for _ in range(_LATENCY_RUNS):
+        start = time.perf_counter()
+        forest.predict(sample)
+        latencies.append(time.perf_counter() - start)
+
+    return candidate, accuracy, fit_s, float(np.median(latencies)) * 1000, forest.nbytes
+
+def search_models(data_path: str, kind: str, grid: dict = SEARCH_GRID, n_folds: int = SEARCH_FOLDS,
+                  processes: int | None = None, report_path: str | None = None, featurizer=None) -> list[dict]:
+    """
+    Cross-validates every model setting of grid on the training data, the folds run on a process pool
+
+    The data is parsed once and written to a temporary .npy file the pool processes map read-only.
+    With a featurizer the raw samples are written, its PCA is fitted on the training rows of each fold
+
+    :param data_path: the training dataset
+    :param kind: "static" or "dynamic", only used in the report
+    :param grid: setting -> values tried, model is "random_forest" or "extra_trees", the others are
+                 scikit-learn forest parameters
+    :param n_folds: cross-validation folds, lowered to the sample count of the rarest gesture
+    :param processes: pool size, None for the cores the training may use
+    :param report_path: where to also write the results as JSON
+    :param featurizer: the unfitted featurizer the trained model would use (see train._featurizer), None for raw samples
+
+    :return list: one dict per candidate, best accuracy first: params, accuracy (mean and std over the folds),
+                  fit_s, latency_ms (single sample, compiled forest), size_kib
+    """
+
+    X, y, fingerprint = load_training_data(data_path)
+    labels, y_ids = np.unique(y, return_inverse=True)
+    n_folds = min(n_folds, int(np.bincount(y_ids).min()))
+    if n_folds < 2:
+        print(f"Error: {data_path} needs at least 2 samples of every gesture for a cross-validation")
+        return []
+
+    cores = training_cores(TRAINING_MAX_CORES)
+    if processes is None:
+        processes = len(cores) if cores else os.cpu_count()
+
+    candidates = _candidates(grid)
+    tasks = [(candidate, params, fold) for candidate, params in enumerate(candidates) for fold in range(n_folds)]
+    features = featurizer.name if featurizer is not None else "raw"
+    print(f"{kind}: {len(candidates)} candidates x {n_folds} folds on {len(X)} samples ({features} features), "
+          f"{processes} processes")
+
+    scores = [[] for _ in candidates]
+    data_dir = tempfile.mkdtemp(prefix="mira_search_")
+    try:
+        np.save(os.path.join(data_dir, "X.npy"), np.ascontiguousarray(X, dtype=np.float32))
+        np.save(os.path.join(data_dir, "y.npy"), y_ids)
+        del X
+
+        start = time.perf_counter()
+        context = multiprocessing.get_context("spawn")
+        init_args = (data_dir, n_folds, TRAINING_NICENESS, cores, featurizer)
+        with context.Pool(processes, _init_worker, init_args) as pool:
+            for done, (candidate, *score) in enumerate(pool.imap_unordered(_evaluate, tasks), 1):
+                scores[candidate].append(score)
+                if len(scores[candidate]) == n_folds:
+                    print(f"INFO: {done}/{len(tasks)} folds done, {candidates[candidate]}")
+        duration = time.perf_counter() - start
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    results = []
+    for params, folds in zip(candidates, scores):
+        accuracy, fit_s, latency_ms, size = np.array(folds).T
+        results.append({
+            "params": params,
+            "accuracy": float(accuracy.mean()),
+            "accuracy_std": float(accuracy.std()),
+            "fit_s": float(fit_s.mean()),
+            "latency_ms": float(np.median(latency_ms)),
+            "size_kib": float(size.mean() / 1024),
+        })
+    results.sort(key=lambda result: (-result["accuracy"], result["latency_ms"]))
+
+    _print_report(kind, results)
+    print(f"{kind}: search took {duration:.1f} s")
+
+    if report_path is not None:
+        with open(report_path, "w") as f:
+            json.dump({
+                "kind": kind,
+                "training_data": {"file": os.path.basename(data_path), "rows": len(y), "fingerprint": fingerprint},
+                "folds": n_folds,
+                "featurizer": featurizer.config() if featurizer is not None else None,
+                "labels": labels.tolist(),
+                "results": results,
+            }, f, indent=2)
+        print(f"{kind}: results written to {report_path}")
+
+    return results
+
+def _print_report(kind: str, results: list[dict]):
+    print(f"====== {kind} model search ======")
+    print(f"{'model':14} {'trees':>5} {'depth':>5} {'features':>8} | {'accuracy':>15} | "
+          f"{'latency':>9} | {'size':>9} | {'fit':>7}")
+    for result in results:
+        params = result["params"]
+        print(f"{params.get('model', '-'):14} {str(params.get('n_estimators', '-')):>5} "
+              f"{str(params.get('max_depth', '-')):>5} {str(params.get('max_features', '-')):>8} | "
+              f"{result['accuracy'] * 100:6.2f}% +- {result['accuracy_std'] * 100:5.2f} | "
+              f"{result['latency_ms']:6.3f} ms | {result['size_kib']:6.0f} KiB | {result['fit_s']:5.2f} s")
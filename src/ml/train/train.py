@@ -1,6 +1,6 @@
-import pandas as pd
 import pickle
 
+import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score
@@ -8,64 +8,282 @@ from sklearn.metrics import accuracy_score
 import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
+from ml.forest import CompiledForest
+from ml.artifact import input_schema, creation_time, legacy_model_path
+from preprocess import make_featurizer
+from ml.train.dataset import load_training_data, training_data_fingerprint
+from ml.train.search import search_models
 from utils import (
     STATIC_GESTURE_TRAINING_DATA_PATH,
     DYNAMIC_GESTURE_TRAINING_DATA_PATH,
     STATIC_MODEL_PATH,
     DYNAMIC_MODEL_PATH,
+    STATIC_WINDOW,
+    GESTURE_WINDOW,
+    INCREMENTAL_DRIFT_TOLERANCE,
+    INCREMENTAL_MAX_TREES,
+    DYNAMIC_FEATURIZER,
+    DYNAMIC_FEATURE_SEGMENTS,
+    DYNAMIC_PCA_COMPONENTS,
 )
 
-def _train_model(path, data_path):
+# model kind -> (artifact path, training data, frames per sample)
+MODELS = {
+    "static": (STATIC_MODEL_PATH, STATIC_GESTURE_TRAINING_DATA_PATH, STATIC_WINDOW),
+    "dynamic": (DYNAMIC_MODEL_PATH, DYNAMIC_GESTURE_TRAINING_DATA_PATH, GESTURE_WINDOW),
+}
+
+# trees of a forest, grown in steps so the training can report its progress
+N_ESTIMATORS = 100
+_ESTIMATORS_STEP = 10
+
+def train_model(kind, n_jobs=None, progress=None, full=False):
+    """
+    Trains a Random Forest Classifier on the hand gesture dataset of the given kind and saves the trained model
+
+    :param kind: "static" or "dynamic"
+    :param n_jobs: trees trained in parallel (scikit-learn n_jobs), None for one at a time
+    :param progress: called with (fraction done, step description) as the training goes on
+    :param full: retrain from scratch even when the model could be updated with the new samples only
+
+    :return float | None: the test accuracy or None when there is no data to train on
+    """
+
+    path, data_path, window = MODELS[kind]
+    return fit_model(path, data_path, kind, window, n_jobs, progress, full)
+
+def fit_model(path, data_path, kind, window, n_jobs=None, progress=None, full=False):
     """
-    Trains a Random Forest Classifier on the static hand gesture dataset and saves the trained model
+    Trains the model at path on the data at data_path, see train_model()
+
+    Unless full is set, a model trained on the first rows of the same data is updated incrementally:
+    trees grown on the new rows (mixed with as many old rows) are added to it.
+    It is retrained from scratch when it can't be updated: new gestures, old rows changed,
+    too many trees (more added than the full training grew) or drift, i.e. it predicts the new rows
+    much worse than its accuracy so far
     """
 
+    if progress is None:
+        progress = lambda fraction, message: None
+
+    progress(0.0, "loading data")
     try:
-        data = pd.read_csv(data_path)
+        # x is a matrix of data, y is a vector of labels
+        X, y, fingerprint = load_training_data(data_path)
     except FileNotFoundError:
         print(f"Error: {data_path} not found! Go collect some data first.")
-        return
+        return None
 
-    if data.empty:
+    if len(X) == 0:
         print(f"Error: {data_path} is empty! Go collect some data first.")
-        return
-
-    model_type = ""
-    if path == STATIC_MODEL_PATH:
-        model_type = "static"
-    else:
-        model_type = "dynamic"
+        return None
 
-    # x is a matrix of data, y is a vector of labels
-    X = data.drop('label', axis=1)
-    y = data['label']
+    if not full:
+        previous = _updatable_model(path, data_path, window, X, y, kind)
+        if previous is not None:
+            return _update_model(path, X, y, fingerprint, n_jobs, progress, kind, *previous)
 
     # Split the training data into the one fed to the model and the one testing it
     # 80% training, 20% accuracy testing
-    X_train, X_test, y_train, y_test = train_test_split(X.values, y.values, test_size=0.2, shuffle=True, stratify=y)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=True, stratify=y)
 
-    model = RandomForestClassifier()
-    # The actual training
-    model.fit(X_train, y_train)
+    # the featurizer (its PCA) is fitted on the training part only
+    featurizer = _featurizer(kind, window)
+    if featurizer is not None:
+        progress(0.05, f"{featurizer.name} features")
+        featurizer.fit(X_train)
+        X_train = featurizer.transform(X_train)
+        X_test = featurizer.transform(X_test)
+
+    # The actual training, a few trees at a time (warm start keeps the trees already grown)
+    model = RandomForestClassifier(n_estimators=0, n_jobs=n_jobs, warm_start=True)
+    for n_estimators in range(_ESTIMATORS_STEP, N_ESTIMATORS + 1, _ESTIMATORS_STEP):
+        model.n_estimators = n_estimators
+        model.fit(X_train, y_train)
+        progress(0.1 + 0.8 * n_estimators / N_ESTIMATORS, f"{n_estimators}/{N_ESTIMATORS} trees")
 
     # Evaluate the accuracy
     y_predict = model.predict(X_test)
     score = accuracy_score(y_test, y_predict)
-    print(f"{model_type} model accuracy: {score * 100:.2f}% ({score})")
+    print(f"{kind} model accuracy: {score * 100:.2f}% ({score})")
+
+    # Save the compiled trained model as a memory-mappable artifact
+    progress(0.95, "saving")
+    metadata = {
+        "kind": kind,
+        **input_schema(window),
+        "training_data": {
+            "file": os.path.basename(data_path),
+            "rows": len(X),
+            "fingerprint": fingerprint,
+        },
+        # accuracy on the samples the model was scored on before being trained on them, see _update_model()
+        "accuracy": score,
+        "tested_rows": len(X_test),
+        "created_at": creation_time(),
+        "updates": 0,
+        "added_trees": 0,
+    }
+    CompiledForest.from_sklearn(model, featurizer).save(path, metadata)
+    progress(1.0, f"accuracy {score * 100:.1f}%")
+
+    return score
 
-    # Save the trained model
-    with open(path, 'wb') as f:
-        pickle.dump({'model' : model}, f)
+def _featurizer(kind, window):
+    """The unfitted featurizer a full training of the model uses, None when it takes the raw samples"""
+
+    if kind != "dynamic" or DYNAMIC_FEATURIZER == "raw":
+        return None
+    return make_featurizer(DYNAMIC_FEATURIZER, window, DYNAMIC_FEATURE_SEGMENTS, DYNAMIC_PCA_COMPONENTS)
+
+def _updatable_model(path, data_path, window, X, y, kind):
+    """
+    Loads the model at path when the new rows of X can be added to it
 
-def train_models():
+    :return tuple | None: (forest, metadata, rows it was trained on, its accuracy on the new rows)
+                          or None when it needs a full retrain
+    """
+
+    def full_retrain(reason):
+        print(f"{kind} model: full retrain, {reason}")
+        return None
+
+    if not os.path.exists(path):
+        return full_retrain("no model yet")
+    try:
+        forest, metadata = CompiledForest.load(path, input_schema(window))
+    except Exception as e:
+        return full_retrain(f"the model can't be updated ({e})")
+
+    featurizer = _featurizer(kind, window)
+    expected_featurizer = featurizer.config() if featurizer is not None else None
+    if metadata.get("featurizer") != expected_featurizer:
+        return full_retrain(f"featurizer changed to {DYNAMIC_FEATURIZER}")
+
+    rows = (metadata.get("training_data") or {}).get("rows")
+    if not rows or rows > len(X):
+        return full_retrain("unknown training data")
+    old_fingerprint = training_data_fingerprint(data_path, rows)
+    if old_fingerprint is None:
+        return full_retrain("the training data is not an append-only dataset")
+    if old_fingerprint != metadata["training_data"]["fingerprint"]:
+        return full_retrain("the training data changed")
+
+    X_new, y_new = X[rows:], y[rows:]
+    if len(X_new) == 0:
+        return forest, metadata, rows, None
+
+    new_labels = set(y_new.tolist()) - set(forest.classes.tolist())
+    if new_labels:
+        return full_retrain(f"new gestures {sorted(new_labels)}")
+    update_trees = _update_estimators(len(X_new), len(X))
+    if forest.n_trees + update_trees > INCREMENTAL_MAX_TREES:
+        return full_retrain(f"{forest.n_trees} trees already")
+    # the trees of the updates, each grown on a few rows, must not outnumber the fully trained ones
+    added_trees = _added_trees(forest, metadata) + update_trees
+    trained_trees = forest.n_trees - _added_trees(forest, metadata)
+    if added_trees > trained_trees:
+        return full_retrain(f"the updates would add {added_trees} trees to the {trained_trees} fully trained ones")
+
+    new_accuracy = float(np.mean(forest.predict(X_new) == y_new))
+    if new_accuracy < metadata["accuracy"] - INCREMENTAL_DRIFT_TOLERANCE:
+        return full_retrain(f"drift, {new_accuracy * 100:.1f}% on the new samples "
+                            f"against {metadata['accuracy'] * 100:.1f}% so far")
+
+    return forest, metadata, rows, new_accuracy
+
+def _added_trees(forest, metadata):
+    # models saved before the count was kept were fully trained with N_ESTIMATORS trees
+    return metadata.get("added_trees", max(forest.n_trees - N_ESTIMATORS, 0))
+
+def _update_estimators(new_rows, total_rows):
+    # trees for the new rows, in proportion to their share of the data
+    share = round(N_ESTIMATORS * new_rows / total_rows / _ESTIMATORS_STEP) * _ESTIMATORS_STEP
+    return int(min(max(share, _ESTIMATORS_STEP), N_ESTIMATORS))
+
+def _update_model(path, X, y, fingerprint, n_jobs, progress, kind, forest, metadata, rows, new_accuracy):
+    if rows == len(X):
+        print(f"{kind} model is up to date")
+        progress(1.0, "up to date")
+        return metadata["accuracy"]
+
+    # the new rows with as many old rows, so the new trees still know the old samples
+    rng = np.random.default_rng()
+    new_rows = np.arange(rows, len(X))
+    old_rows = rng.choice(rows, size=min(rows, len(new_rows)), replace=False)
+    sample = np.concatenate([old_rows, new_rows])
+
+    n_estimators = _update_estimators(len(new_rows), len(X))
+    progress(0.1, f"adding {n_estimators} trees for {len(new_rows)} new samples")
+    model = RandomForestClassifier(n_estimators=n_estimators, n_jobs=n_jobs)
+    # on the features of the model, its featurizer (PCA) is kept as fitted by the last full training
+    X_sample = X[sample] if forest.featurizer is None else forest.featurizer.transform(X[sample])
+    model.fit(X_sample, y[sample])
+
+    progress(0.9, "saving")
+    updated = CompiledForest.merge([forest, CompiledForest.from_sklearn(model)], forest.classes)
+
+    metadata = dict(metadata)
+    metadata["training_data"] = dict(metadata["training_data"], rows=len(X), fingerprint=fingerprint)
+    metadata["updates"] = metadata.get("updates", 0) + 1
+    metadata["added_trees"] = _added_trees(forest, metadata) + n_estimators
+    metadata["updated_at"] = creation_time()
+    # the new rows were scored before the model was trained on them, like the test split of the full training:
+    # the accuracy covers every sample scored that way since the last full training
+    # (models saved before the count was kept were tested on the 20% split)
+    tested_rows = metadata.get("tested_rows", round(0.2 * rows))
+    metadata["tested_rows"] = tested_rows + len(new_rows)
+    metadata["accuracy"] = (metadata["accuracy"] * tested_rows + new_accuracy * len(new_rows)) / metadata["tested_rows"]
+    updated.save(path, metadata)
+
+    print(f"{kind} model: added {n_estimators} trees for {len(new_rows)} new samples ({updated.n_trees} trees)")
+    progress(1.0, f"updated, {updated.n_trees} trees")
+    return metadata["accuracy"]
+
+def train_models(full=False):
     """
     Trains the static and dynamic hand gesture models with a given dataset and saves the trained models
+
+    :param full: retrain from scratch instead of updating the models with the new samples
     """
 
     print("====== Starting models training ======")
-    _train_model(STATIC_MODEL_PATH, STATIC_GESTURE_TRAINING_DATA_PATH)
-    _train_model(DYNAMIC_MODEL_PATH, DYNAMIC_GESTURE_TRAINING_DATA_PATH)
+    train_model("static", full=full)
+    train_model("dynamic", full=full)
     print("====== Models training completed ======")
 
+def convert_legacy_model(path, window, kind):
+    """
+    Converts a model pickled by an older version into an artifact, without retraining
+
+    The training data of a pickle is unknown, so the artifact carries no fingerprint
+    """
+
+    legacy_path = legacy_model_path(path)
+    with open(legacy_path, 'rb') as f:
+        data = pickle.load(f)
+    model = data['model'] if isinstance(data, dict) and 'model' in data else data
+
+    metadata = {
+        "kind": kind,
+        **input_schema(window),
+        "training_data": {"file": None, "rows": None, "fingerprint": None},
+        "converted_from": os.path.basename(legacy_path),
+        "created_at": creation_time(),
+    }
+    CompiledForest.from_sklearn(model).save(path, metadata)
+    print(f"Converted {legacy_path} -> {path}")
+
 if __name__ == "__main__":
-    train_models()
\ No newline at end of file
+    if "--convert-legacy" in sys.argv:
+        convert_legacy_model(STATIC_MODEL_PATH, STATIC_WINDOW, "static")
+        convert_legacy_model(DYNAMIC_MODEL_PATH, GESTURE_WINDOW, "dynamic")
+    elif "--search" in sys.argv:
+        # python ml/train/train.py --search static|dynamic [report.json]
+        arguments = sys.argv[sys.argv.index("--search") + 1:]
+        kind = arguments[0] if arguments else "static"
+        _, data_path, window = MODELS[kind]
+        search_models(data_path, kind, report_path=arguments[1] if len(arguments) > 1 else None,
+                      featurizer=_featurizer(kind, window))
+    else:
+        train_models(full="--full" in sys.argv)
\ No newline at end of file
@@ -0,0 +1,167 @@
+import atexit
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from .dataset import GestureDataset
+from utils import RECORDER_FLUSH_INTERVAL
+
+class DatasetWriter:
+    """
+    Appends recorded samples to a GestureDataset on a background thread
+
+    Samples are queued and written in batches, at the latest flush_interval seconds after they were queued,
+    so recording never waits for the disk. The queued samples are written when the writer stops,
+    and at a normal interpreter exit if it was not stopped. A process aborted by Qt skips the atexit handlers,
+    the GUI stops its writers itself on an unhandled exception (see main.install_crash_handler).
+    """
+
+    # weight of the newest batch in the running write time average
+    _TIME_SMOOTHING = 0.1
+
+    def __init__(self, dataset: GestureDataset, flush_interval: float = RECORDER_FLUSH_INTERVAL):
+        self.dataset = dataset
+        self.flush_interval = flush_interval
+
+        # [label, features] of the samples not written yet
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._flush_requested = False
+        self._is_writing = False
+        self._is_running = False
+        self._thread : threading.Thread | None = None
+
+        self.queued_count = 0
+        self.written_count = 0
+        self.batch_count = 0
+        self.max_backlog = 0
+        self.avg_write_ms = 0.0
+        self._first_sample_time = None
+        self._last_write_time = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+
+        self._is_running = True
+        self._thread = threading.Thread(target=self._run, name="DatasetWriter", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Writes the queued samples, syncs them to disk and closes the dataset files."""
+
+        if self._thread is None:
+            return
+
+        with self._condition:
+            self._is_running = False
+            self._condition.notify()
+        self._thread.join()
+        self._thread = None
+        atexit.unregister(self.stop)
+
+        self.dataset.sync()
+        self.dataset.close()
+
+    def submit(self, label: str, features):
+        """
+        Queues one sample
+
+        :param label: the gesture label
+        :param features: the sample features, copied so the caller may reuse its buffer
+        """
+
+        with self._condition:
+            self._queue.append((label, np.array(features, dtype=np.float32)))
+            self.queued_count += 1
+            self.max_backlog = max(self.max_backlog, len(self._queue))
+            if self._first_sample_time is None:
+                self._first_sample_time = time.perf_counter()
+            self._condition.notify()
+
+    def flush(self):
+        """Waits until every sample queued so far is written to the dataset files."""
+
+        with self._condition:
+            # with nothing queued a request would stay set and cut the batching of the next sample short
+            if self._queue:
+                self._flush_requested = True
+                self._condition.notify_all()
+            while (self._queue or self._is_writing) and self._thread is not None:
+                self._condition.wait(0.1)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue and self._is_running:
+                    self._condition.wait()
+
+                # the first sample of a batch starts the flush interval
+                deadline = time.perf_counter() + self.flush_interval
+                while self._is_running and not self._flush_requested:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+
+                batch = list(self._queue)
+                self._queue.clear()
+                self._flush_requested = False
+                self._is_writing = True
+                is_running = self._is_running
+
+            if batch:
+                self._write(batch)
+
+            with self._condition:
+                self._is_writing = False
+                self._condition.notify_all()
+
+            if not is_running:
+                return
+
+    def _write(self, batch: list):
+        start = time.perf_counter()
+        try:
+            self.dataset.append_rows([label for label, _ in batch], np.stack([row for _, row in batch]))
+        except Exception as e:
+            print(f"ERROR: Failed to write {len(batch)} samples to {self.dataset.path}: {e}")
+            return
+
+        self._last_write_time = time.perf_counter()
+        write_ms = (self._last_write_time - start) * 1000
+        if self.batch_count == 0:
+            self.avg_write_ms = write_ms
+        else:
+            self.avg_write_ms += self._TIME_SMOOTHING * (write_ms - self.avg_write_ms)
+
+        self.written_count += len(batch)
+        self.batch_count += 1
+
+    def stats(self) -> dict:
+        """
+        Returns a snapshot of the writer state
+
+        :return dict: queued/written samples, the backlog (current and max), the sustained written samples
+                      per second since the first sample and the average batch write time in ms
+        """
+
+        with self._condition:
+            backlog = len(self._queue)
+
+        samples_per_s = 0.0
+        if self._last_write_time is not None and self._last_write_time > self._first_sample_time:
+            samples_per_s = self.written_count / (self._last_write_time - self._first_sample_time)
+
+        return {
+            "queued": self.queued_count,
+            "written": self.written_count,
+            "backlog": backlog,
+            "max_backlog": self.max_backlog,
+            "samples_per_s": samples_per_s,
+            "batches": self.batch_count,
+            "write_ms": self.avg_write_ms,
+        }
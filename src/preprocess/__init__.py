@@ -1 +1,3 @@
-from .landmark_preprocess import process_dataset
\ No newline at end of file
+from .landmark_preprocess import process_dataset, process_batch, process_frames, FEATURES_PER_FRAME, FEATURE_SCHEMA
+from .landmark_frame import LandmarkFrame
+from .temporal_features import make_featurizer, load_featurizer, FEATURIZERS
@@ -0,0 +1,104 @@
+import numpy as np
+
+# mediapipe hands layout
+MAX_HANDS = 2
+NUM_LANDMARKS = 21
+
+WRIST = 0
+MIDDLE_MCP = 9
+
+class LandmarkFrame:
+    """
+    Compact, numpy backed snapshot of the mediapipe hand landmarks of one camera frame
+
+    Built once in the camera thread and shared read-only by every consumer, so the protobuf results
+    are only walked once. Hands keep the mediapipe detection order, hand 0 is the first detected one.
+
+    coords: (MAX_HANDS, NUM_LANDMARKS, 3) float64 x, y, z normalized coordinates, zeros for missing hands
+    present: (MAX_HANDS,) bool, which hand slots hold a detected hand
+    is_right: (MAX_HANDS,) bool, whether mediapipe labeled the hand as "Right"
+    timestamp: time.perf_counter() of the moment the frame was grabbed
+    trace: the FrameTrace (see utils/tracing.py) of a camera frame, None for frames not traced
+    """
+
+    __slots__ = ("coords", "present", "is_right", "timestamp", "trace", "_wrist_relative", "_hand_scale")
+
+    def __init__(self, coords: np.ndarray, present: np.ndarray, is_right: np.ndarray, timestamp: float = 0.0):
+        self.coords = coords
+        self.present = present
+        self.is_right = is_right
+        self.timestamp = timestamp
+        self.trace = None
+
+        self._wrist_relative : np.ndarray | None = None
+        self._hand_scale : np.ndarray | None = None
+
+    @classmethod
+    def empty(cls, timestamp: float = 0.0) -> "LandmarkFrame":
+        """Frame without any detected hand."""
+
+        return cls(
+            np.zeros((MAX_HANDS, NUM_LANDMARKS, 3), dtype=np.float64),
+            np.zeros(MAX_HANDS, dtype=bool),
+            np.zeros(MAX_HANDS, dtype=bool),
+            timestamp,
+        )
+
+    @classmethod
+    def from_results(cls, results, timestamp: float = 0.0) -> "LandmarkFrame":
+        """
+        Converts a mediapipe hands results object, extra hands past MAX_HANDS are ignored
+
+        :param results: the object returned by mediapipe Hands.process()
+        :param timestamp: the moment the frame was grabbed
+
+        :return LandmarkFrame: the converted frame
+        """
+
+        frame = cls.empty(timestamp)
+        if not results.multi_hand_landmarks:
+            return frame
+
+        hands = zip(results.multi_hand_landmarks, results.multi_handedness)
+        for i, (hand_landmarks, handedness) in enumerate(hands):
+            if i >= MAX_HANDS:
+                break
+
+            frame.coords[i] = [(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark]
+            frame.present[i] = True
+            frame.is_right[i] = handedness.classification[0].label == "Right"
+
+        return frame
+
+    @property
+    def num_hands(self) -> int:
+        return int(np.count_nonzero(self.present))
+
+    @property
+    def has_hands(self) -> bool:
+        return bool(self.present[0])
+
+    def handedness(self, hand: int) -> str:
+        """Mediapipe label of the hand slot: "Right", "Left" or "" if the slot is empty."""
+
+        if not self.present[hand]:
+            return ""
+        return "Right" if self.is_right[hand] else "Left"
+
+    @property
+    def wrist_relative(self) -> np.ndarray:
+        """(MAX_HANDS, NUM_LANDMARKS, 2) x, y coordinates with the wrist of each hand as (0, 0), computed once."""
+
+        if self._wrist_relative is None:
+            xy = self.coords[:, :, :2]
+            self._wrist_relative = xy - xy[:, WRIST:WRIST + 1, :]
+        return self._wrist_relative
+
+    @property
+    def hand_scale(self) -> np.ndarray:
+        """(MAX_HANDS,) wrist to middle finger knuckle distance of each hand, computed once."""
+
+        if self._hand_scale is None:
+            palm = self.wrist_relative[:, MIDDLE_MCP, :]
+            self._hand_scale = np.sqrt(palm[:, 0] * palm[:, 0] + palm[:, 1] * palm[:, 1])
+        return self._hand_scale
@@ -1,65 +1,96 @@
-# have the wrist be the starting point, so the different positioning of the hand doesnt affect the prediction
-# takes the 42 raw mediapipe coordinates (each for each point) and subtracts the wrist to make it the reference point (0,0)
+import numpy as np
 
-def zero_wrist(hand_landmarks):
-    wrist_x = hand_landmarks.landmark[0].x
-    wrist_y = hand_landmarks.landmark[0].y
+from .landmark_frame import LandmarkFrame, MAX_HANDS, NUM_LANDMARKS
 
-    new_landmarks = []
+# x and y of every landmark of one hand, and of both hands
+FEATURES_PER_HAND = NUM_LANDMARKS * 2
+FEATURES_PER_FRAME = MAX_HANDS * FEATURES_PER_HAND
 
-    for crt_lm in hand_landmarks.landmark:
-        new_landmark_x = crt_lm.x - wrist_x
-        new_landmark_y = crt_lm.y - wrist_y
+# names the feature layout produced here, trained models store it and refuse to load under another one
+# change it whenever the preprocessing changes, so old models get retrained instead of silently mispredicting
+FEATURE_SCHEMA = "hand-xy-wrist-zeroed-max-normalized/right-left/v1"
 
-        new_landmarks.append([new_landmark_x, new_landmark_y])
+# every function works on a single hand (21, 2|3) as well as on any batch of hands (..., 21, 2|3)
 
-    return new_landmarks
+# have the wrist be the starting point, so the different positioning of the hand doesnt affect the prediction
+# takes the 21 raw mediapipe (x, y) coordinates of a hand and subtracts the wrist to make it the reference point (0,0)
+
+def zero_wrist(hand_landmarks):
+    hand_landmarks = np.asarray(hand_landmarks, dtype=np.float64)[..., :2]
+    return hand_landmarks - hand_landmarks[..., :1, :]
 
 # normalize all point values to be between -1 and 1, so the distance between the hand and the camera doesnt interfere
 # pick the maximum absolute value of the points and use that as one, dividing everything by that
 
 def normalize_size(landmarks):
-    # find absolute max
-    max_val = 0
-    result = []
-    for lm in landmarks:
-        if (abs(lm[0]) > max_val):
-            max_val = abs(lm[0])
-        if (abs(lm[1]) > max_val):
-            max_val = abs(lm[1])
-    if max_val == 0:
-        max_val = 1
-    for lm in landmarks:
-        result.append(lm[0] / max_val)
-        result.append(lm[1] / max_val)
-
-    return result
+    # find absolute max of each hand
+    max_val = np.abs(landmarks).max(axis=(-2, -1), keepdims=True)
+    max_val[max_val == 0] = 1
+
+    # flattened as x0, y0, x1, y1, ...
+    normalized = landmarks / max_val
+    return normalized.reshape(normalized.shape[:-2] + (FEATURES_PER_HAND,))
 
 # this will be called to ensure all the operations are done on the dataset before storing
-# returns a vector of 42 integers representing the processed x and y values of each point
+# returns a vector of 42 floats representing the processed x and y values of each point (per hand)
 
 def process_landmarks(hand_landmarks):
     landmarks = zero_wrist(hand_landmarks)
     processed_landmarks = normalize_size(landmarks)
     return processed_landmarks
 
+# batch version of process_dataset
+# coords: (N, 2, 21, 2|3) landmarks, present/is_right: (N, 2) hand masks, hands in mediapipe detection order
+# returns (N, 84): the hand mediapipe labels "Right" in the first 42 columns, the "Left" one in the last 42,
+# zeros for a missing hand
+
+def process_batch(coords, present, is_right):
+    coords = np.asarray(coords)
+    present = np.asarray(present, dtype=bool)
+    is_right = np.asarray(is_right, dtype=bool)
+
+    n = coords.shape[0]
+    processed = process_landmarks(coords)
+    features = np.zeros((n, MAX_HANDS, FEATURES_PER_HAND), dtype=np.float64)
+
+    # in detection order, so a later hand with the same label overwrites an earlier one
+    for hand in range(MAX_HANDS):
+        rows = np.flatnonzero(present[:, hand])
+        block = np.where(is_right[rows, hand], 0, 1)
+        features[rows, block] = processed[rows, hand]
+
+    return features.reshape(n, FEATURES_PER_FRAME)
+
+def stack_frames(frames):
+    """
+    Stacks landmark frames into the arrays process_batch takes
+
+    :return tuple: (N, 2, 21, 3) coords, (N, 2) present and (N, 2) is_right arrays
+    """
+
+    coords = np.stack([frame.coords for frame in frames])
+    present = np.stack([frame.present for frame in frames])
+    is_right = np.stack([frame.is_right for frame in frames])
+    return coords, present, is_right
+
+def process_frames(frames):
+    """Processes a sequence of landmark frames in one call, (N, 84) features."""
+
+    if len(frames) == 0:
+        return np.zeros((0, FEATURES_PER_FRAME), dtype=np.float64)
+    return process_batch(*stack_frames(frames))
+
 # allow processing for either or both of the hands as input in a frame
 # zeros out the missing hand(s)
 
-def process_dataset(results):
-    result = []
-    left_hand_data = [0.0] * 42
-    right_hand_data = [0.0] * 42
-
-    if results.multi_hand_landmarks:
-        for landmarks, handedness in zip(results.multi_hand_landmarks, results.multi_handedness):
-            crt_label = handedness.classification[0].label
-            flat_coords = process_landmarks(landmarks)
-            if crt_label == "Right":
-                left_hand_data = flat_coords
-            else:
-                right_hand_data = flat_coords
-
-    final_vector = left_hand_data + right_hand_data
-    return final_vector
-                
+def process_dataset(frame: LandmarkFrame):
+    # same vectorized math as a batch of one, starting from the wrist relative coordinates cached on the frame
+    processed = normalize_size(frame.wrist_relative)
+    final_vector = np.zeros((MAX_HANDS, FEATURES_PER_HAND), dtype=np.float64)
+
+    for hand in range(MAX_HANDS):
+        if frame.present[hand]:
+            # mediapipe labels are mirrored, a "Right" hand goes into the left half of the vector
+            final_vector[0 if frame.is_right[hand] else 1] = processed[hand]
+
+    return final_vector.reshape(FEATURES_PER_FRAME)
@@ -0,0 +1,168 @@
+import numpy as np
+
+from .landmark_preprocess import FEATURES_PER_FRAME, FEATURES_PER_HAND
+from .landmark_frame import MAX_HANDS, NUM_LANDMARKS
+
+# featurizers turn a dynamic window as recorded, (n, window * 84) processed frames one after the other,
+# into the input of the dynamic model. The recorded datasets always keep the raw windows, a model stores
+# the featurizer it was trained with (see CompiledForest), so it is applied the same way when predicting
+
+FEATURIZERS = ("raw", "temporal", "temporal+pca")
+
+class RawWindow:
+    """The window as recorded, every coordinate of every frame"""
+
+    name = "raw"
+
+    def __init__(self, window: int):
+        self.window = window
+
+    @property
+    def n_inputs(self) -> int:
+        return self.window * FEATURES_PER_FRAME
+
+    @property
+    def n_features(self) -> int:
+        return self.n_inputs
+
+    def fit(self, X):
+        return self
+
+    def transform(self, X) -> np.ndarray:
+        return np.asarray(X).reshape(-1, self.n_features)
+
+    def config(self) -> dict:
+        return {"name": self.name, "window": self.window}
+
+    def arrays(self) -> dict:
+        return {}
+
+class TemporalSummary:
+    """
+    Compact summary of a window: the mean pose over a few segments of it, the mean speed of every landmark,
+    the mean acceleration and the share of frames each hand is seen in.
+    Frames missing a hand are left out of that hand's means instead of counting as zeros
+
+    An optional PCA, fitted on the training windows, projects the summary onto its main components
+    """
+
+    def __init__(self, window: int, segments: int = 3, pca_components: int | None = None,
+                 pca_mean=None, pca_basis=None):
+        self.window = window
+        self.segments = segments
+        self.pca_components = pca_components
+        # (summary features,) and (components, summary features), set by fit() or loaded with the model
+        self.pca_mean = pca_mean
+        self.pca_basis = pca_basis
+
+    @property
+    def name(self) -> str:
+        return "temporal+pca" if self.pca_components else "temporal"
+
+    @property
+    def n_inputs(self) -> int:
+        return self.window * FEATURES_PER_FRAME
+
+    @property
+    def summary_features(self) -> int:
+        # poses, landmark speeds, hand accelerations and hand presence
+        return self.segments * FEATURES_PER_FRAME + MAX_HANDS * NUM_LANDMARKS + MAX_HANDS + MAX_HANDS
+
+    @property
+    def n_features(self) -> int:
+        if self.pca_basis is not None:
+            return len(self.pca_basis)
+        return self.summary_features
+
+    def _segment_starts(self) -> np.ndarray:
+        return np.array([rows[0] for rows in np.array_split(np.arange(self.window), self.segments)])
+
+    def summarize(self, X) -> np.ndarray:
+        """
+        :param X: (n, window * 84) raw windows
+
+        :return np.ndarray: (n, summary_features) summaries
+        """
+
+        frames = np.asarray(X, dtype=np.float64).reshape(-1, self.window, MAX_HANDS, FEATURES_PER_HAND)
+        n = len(frames)
+        # a missing hand is all zeros, a seen one at least has its fingers away from the wrist
+        present = np.any(frames != 0, axis=-1)
+
+        # per segment sums of the poses and of the frames seeing each hand
+        starts = self._segment_starts()
+        poses = np.add.reduceat(frames, starts, axis=1)
+        poses /= np.maximum(np.add.reduceat(present, starts, axis=1, dtype=np.float64), 1)[..., None]
+
+        # only between two frames seeing the hand, a hand appearing is no movement
+        moving = present[:, 1:] & present[:, :-1]
+        velocity = (frames[:, 1:] - frames[:, :-1]).reshape(n, self.window - 1, MAX_HANDS, NUM_LANDMARKS, 2)
+        speed = np.hypot(velocity[..., 0], velocity[..., 1]) * moving[..., None]
+        speeds = speed.sum(axis=1) / np.maximum(moving.sum(axis=1), 1)[..., None]
+
+        accelerating = moving[:, 1:] & moving[:, :-1]
+        change = velocity[:, 1:] - velocity[:, :-1]
+        acceleration = np.hypot(change[..., 0], change[..., 1]).mean(axis=-1) * accelerating
+        accelerations = acceleration.sum(axis=1) / np.maximum(accelerating.sum(axis=1), 1)
+
+        return np.concatenate([
+            poses.reshape(n, -1),
+            speeds.reshape(n, -1),
+            accelerations,
+            present.mean(axis=1),
+        ], axis=1)
+
+    def fit(self, X):
+        """Fits the PCA, if any, on the training windows X"""
+
+        if not self.pca_components:
+            return self
+
+        summaries = self.summarize(X)
+        self.pca_mean = summaries.mean(axis=0)
+        _, _, basis = np.linalg.svd(summaries - self.pca_mean, full_matrices=False)
+        self.pca_basis = basis[:self.pca_components]
+        return self
+
+    def transform(self, X) -> np.ndarray:
+        summaries = self.summarize(X)
+        if self.pca_basis is None:
+            return summaries
+        return (summaries - self.pca_mean) @ self.pca_basis.T
+
+    def config(self) -> dict:
+        return {"name": self.name, "window": self.window, "segments": self.segments,
+                "pca_components": self.pca_components}
+
+    def arrays(self) -> dict:
+        if self.pca_basis is None:
+            return {}
+        return {"pca_mean": self.pca_mean, "pca_basis": self.pca_basis}
+
+def make_featurizer(name: str, window: int, segments: int = 3, pca_components: int = 64):
+    """
+    Creates an unfitted featurizer
+
+    :param name: one of FEATURIZERS
+    :param window: frames per window
+    :param segments: segments the window pose is averaged over, "temporal" featurizers only
+    :param pca_components: components kept, "temporal+pca" only
+    """
+
+    if name == "raw":
+        return RawWindow(window)
+    if name == "temporal":
+        return TemporalSummary(window, segments)
+    if name == "temporal+pca":
+        return TemporalSummary(window, segments, pca_components)
+    raise ValueError(f"Unknown featurizer {name!r}, expected one of {FEATURIZERS}")
+
+def load_featurizer(config: dict, arrays: dict):
+    """Rebuilds the featurizer a model was saved with, from its config() and arrays()"""
+
+    if config["name"] == "raw":
+        return RawWindow(config["window"])
+    return TemporalSummary(
+        config["window"], config["segments"], config.get("pca_components"),
+        arrays.get("pca_mean"), arrays.get("pca_basis"),
+    )
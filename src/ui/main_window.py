@@ -40,17 +40,35 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
         self.labelFPS = QLabel("FPS: --")
         self.statusbar.addPermanentWidget(self.labelFPS)
+        self.labelDroppedFrames = QLabel("Dropped: --")
+        self.statusbar.addPermanentWidget(self.labelDroppedFrames)
+        self.labelInferenceCost = QLabel("Inference: --")
+        self.statusbar.addPermanentWidget(self.labelInferenceCost)
+        self.labelPredictorStats = QLabel("Predictor: --")
+        self.statusbar.addPermanentWidget(self.labelPredictorStats)
+        self.labelInputLatency = QLabel("Input: --")
+        self.statusbar.addPermanentWidget(self.labelInputLatency)
+        self.labelFrameLatency = QLabel("Latency: --")
+        self.statusbar.addPermanentWidget(self.labelFrameLatency)
+        self.labelPowerMode = QLabel("Power: --")
+        self.statusbar.addPermanentWidget(self.labelPowerMode)
+        self.labelRecorderStats = QLabel("Recorder: --")
+        self.statusbar.addPermanentWidget(self.labelRecorderStats)
         self.labelInterpreterStatus = QLabel("Interpreter: Offline")
         self.statusbar.addPermanentWidget(self.labelInterpreterStatus)
 
         self._last_fps_update_time = time.time()
         self.widgetCameraFeed.fps_signal.connect(self._update_fps)
+        self.widgetCameraFeed.stats_signal.connect(self._update_pipeline_stats)
 
         self.widgetCameraFeed.results_processed.connect(self._handle_frame_results)
+        self.widgetPredictions.stats_signal.connect(self._update_predictor_stats)
+        self.widgetPredictions.models_reloaded.connect(self._show_models_reloaded)
 
         self.widgetControlPanel.inference_toggle_requested.connect(self._toggle_inference)
         self.widgetControlPanel.collection_toggle_requested.connect(self._toggle_data_collection)
         self.widgetControlPanel.status_msg_signal.connect(self.statusbar.showMessage)
+        self.widgetControlPanel.recorder_stats_signal.connect(self._update_recorder_stats)
         self.widgetControlPanel.model_reload_requested.connect(
             self.widgetPredictions.reload_models
         )
@@ -80,6 +98,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             self.widgetControlPanel.buttonStartMIRA.setText("Start M.I.R.A.")
             self.labelInterpreterStatus.setText("Interpreter: Offline")
             self.labelFPS.setText("FPS: --")
+            self.labelDroppedFrames.setText("Dropped: --")
+            self.labelInferenceCost.setText("Inference: --")
             self.mode = AppMode.IDLE
     
     def _toggle_data_collection(self):
@@ -97,14 +117,19 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             self.widgetControlPanel.clear()
             self.widgetControlPanel.buttonStartTraining.setText("Start Data Collection")
             self.labelFPS.setText("FPS: --")
+            self.labelDroppedFrames.setText("Dropped: --")
+            self.labelInferenceCost.setText("Inference: --")
             self.mode = AppMode.IDLE
     
-    def _handle_frame_results(self, results):
+    def _handle_frame_results(self, frame):
         if self.mode == AppMode.PREDICTING:
-            self.widgetPredictions._predictor._classifier.update(results)
-            self.widgetPredictions.predict_and_display(results)
+            start = time.perf_counter()
+            self.widgetPredictions._predictor.update(frame)
+            self.widgetPredictions.predict_and_display(frame)
+            if frame.trace is not None:
+                frame.trace.span("recognition", start)
         elif self.mode == AppMode.COLLECTING:
-            self.widgetControlPanel.collect_frame(results)                
+            self.widgetControlPanel.collect_frame(frame)                
     
     def _update_fps(self, curr_fps : int):
         curr_time = time.time()
@@ -112,4 +137,68 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
         if elapsed_time >= 1.0:
             self.labelFPS.setText(f"FPS: {curr_fps}")
-            self._last_fps_update_time = curr_time
\ No newline at end of file
+            self._last_fps_update_time = curr_time
+
+    def _update_pipeline_stats(self, stats : dict):
+        self.labelDroppedFrames.setText(
+            f"Dropped: grab {stats['grab_dropped']} / GUI {stats['delivery_dropped']}"
+        )
+        width = f"{stats['inference_width']}px" if stats['inference_width'] else "full res"
+        text = f"Inference: {stats['inference_ms']:.1f} ms @ {width}"
+        if stats['roi_share'] is not None:
+            text += f", crop {stats['roi_share'] * 100:.0f}%"
+        self.labelInferenceCost.setText(text)
+        self.labelInputLatency.setText(
+            f"Input: {stats['input']['latency_ms']:.1f} ms, coalesced {stats['input']['coalesced']}"
+        )
+        self._update_latency_stats(stats['latency'])
+        if 'power' in stats:
+            self._update_power_stats(stats['power'])
+
+    def _update_latency_stats(self, stages : dict):
+        frame = stages['end_to_end']
+        self.labelFrameLatency.setText(
+            f"Latency: p50 {frame['p50_ms']:.1f} / p95 {frame['p95_ms']:.1f} / p99 {frame['p99_ms']:.1f} ms"
+        )
+        # per stage breakdown on hover
+        lines = [
+            f"{stage}: p50 {s['p50_ms']:.2f} / p95 {s['p95_ms']:.2f} / p99 {s['p99_ms']:.2f} ms, dropped {s['dropped']}"
+            for stage, s in stages.items() if s['count'] or s['dropped']
+        ]
+        self.labelFrameLatency.setToolTip("\n".join(lines))
+
+    def _update_power_stats(self, power : dict):
+        total_s = power['active_s'] + power['idle_s']
+        idle_share = power['idle_s'] / total_s * 100 if total_s > 0 else 0.0
+        self.labelPowerMode.setText(
+            f"Power: {power['mode']}, idle {idle_share:.0f}% of the time, CPU saved {power['cpu_saved_s']:.0f} s"
+        )
+        self.labelPowerMode.setToolTip(
+            f"active {power['active_s']:.0f} s at {power['active_cpu_pct']:.0f}% CPU\n"
+            f"idle {power['idle_s']:.0f} s at {power['idle_cpu_pct']:.0f}% CPU\n"
+            f"wake-ups {power['wakeups']}, frames skipped {power['skipped']}"
+        )
+
+    def _update_predictor_stats(self, stats : dict):
+        text = f"Predictor: {stats['inference_ms']:.1f} ms, queue {stats['queue_depth']}, dropped {stats['dropped']}"
+        models = stats['models']
+        if models['reloads']:
+            text += f", reload {models['reload_ms']:.1f} ms, gap {models['gap_ms']:.0f} ms"
+        self.labelPredictorStats.setText(text)
+
+    def _update_recorder_stats(self, stats : dict):
+        self.labelRecorderStats.setText(
+            f"Recorder: {stats['written']} saved, {stats['samples_per_s']:.1f}/s, backlog {stats['backlog']}"
+        )
+
+    def _show_models_reloaded(self, report : dict):
+        self.statusbar.showMessage(
+            f"Models reloaded in {report['reload_ms']:.1f} ms "
+            f"(static {report['static']}, dynamic {report['dynamic']})", 5000
+        )
+
+    def closeEvent(self, event):
+        self.widgetCameraFeed.shutdown()
+        self.widgetPredictions.shutdown()
+        self.widgetControlPanel.shutdown()
+        super().closeEvent(event)
@@ -21,7 +21,7 @@ class Ui_widgetCameraFeed(object):
         self.frameCameraFeed.setObjectName("frameCameraFeed")
         self.verticalLayout_2 = QtWidgets.QVBoxLayout(self.frameCameraFeed)
         self.verticalLayout_2.setObjectName("verticalLayout_2")
-        self.labelCameraFeed = QtWidgets.QLabel(parent=self.frameCameraFeed)
+        self.labelCameraFeed = FrameView(parent=self.frameCameraFeed)
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Expanding)
         sizePolicy.setHorizontalStretch(0)
         sizePolicy.setVerticalStretch(0)
@@ -38,3 +38,4 @@ class Ui_widgetCameraFeed(object):
         _translate = QtCore.QCoreApplication.translate
         widgetCameraFeed.setWindowTitle(_translate("widgetCameraFeed", "Form"))
         self.labelCameraFeed.setText(_translate("widgetCameraFeed", "Camera offline"))
+from ui.widgets.frame_view import FrameView
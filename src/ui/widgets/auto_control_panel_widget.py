@@ -77,6 +77,9 @@ class Ui_widgetControlPanel(object):
         self.buttonRunTraining.setSizePolicy(sizePolicy)
         self.buttonRunTraining.setObjectName("buttonRunTraining")
         self.verticalLayout.addWidget(self.buttonRunTraining, 0, QtCore.Qt.AlignmentFlag.AlignHCenter|QtCore.Qt.AlignmentFlag.AlignTop)
+        self.checkBoxFullRetrain = QtWidgets.QCheckBox(parent=widgetControlPanel)
+        self.checkBoxFullRetrain.setObjectName("checkBoxFullRetrain")
+        self.verticalLayout.addWidget(self.checkBoxFullRetrain, 0, QtCore.Qt.AlignmentFlag.AlignHCenter|QtCore.Qt.AlignmentFlag.AlignTop)
         spacerItem = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Policy.Minimum, QtWidgets.QSizePolicy.Policy.Expanding)
         self.verticalLayout.addItem(spacerItem)
         self.lineTrainingSeparator = QtWidgets.QFrame(parent=widgetControlPanel)
@@ -101,3 +104,5 @@ class Ui_widgetControlPanel(object):
         self.buttonSaveRecord.setText(_translate("widgetControlPanel", "Record"))
         self.buttonStartTraining.setText(_translate("widgetControlPanel", "Start Data Collection"))
         self.buttonRunTraining.setText(_translate("widgetControlPanel", "Run Training"))
+        self.checkBoxFullRetrain.setToolTip(_translate("widgetControlPanel", "Retrain the models from scratch instead of adding trees for the new samples"))
+        self.checkBoxFullRetrain.setText(_translate("widgetControlPanel", "Full retrain"))
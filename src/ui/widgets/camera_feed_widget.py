@@ -1,43 +1,70 @@
 import time
-import numpy as np
 from PyQt6.QtWidgets import QWidget
 from PyQt6.QtCore import pyqtSignal, Qt
 
-from capture import Camera
-from utils import convert_cv_to_pixmap
+from capture import Camera, FrameSlot
+from preprocess import LandmarkFrame
+from utils import Tracer, startup_timer
+from utils.frame import wrap_frame_as_qimage
 from .auto_camera_feed_widget import Ui_widgetCameraFeed
 from commands.mapper import CommandMapper
 
 class CameraFeedWidget(QWidget, Ui_widgetCameraFeed):
     results_processed = pyqtSignal(object) 
     fps_signal = pyqtSignal(int)
+    stats_signal = pyqtSignal(dict)
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setupUi(self)
 
-        self.labelCameraFeed.setScaledContents(True)
-
         self._camera_thread : Camera | None = None
 
+        # pool buffer currently painted by the preview, handed back to the camera once replaced
+        self._displayed_slot : FrameSlot | None = None
+
         self._command_mapper = CommandMapper()
 
+        # where the frames come from and go to, see configure_capture()
+        self._capture_options = {}
+
+        # stage latencies of every frame since the app started, across camera restarts
+        self.tracer = Tracer()
+
         self.prev_time = 0.0
+        # time.perf_counter() of the camera start, until its first frame is handled
+        self._camera_start_time : float | None = None
+
+    def configure_capture(self, replay_path: str | None = None, replay_speed: str = "realtime",
+                          record_path: str | None = None):
+        """
+        Picks the frame source of the next camera start
+
+        :param replay_path: a recorded session played instead of the webcam
+        :param replay_speed: "realtime", "fast" or "landmarks" (see capture/session.py)
+        :param record_path: session directory the processed frames are recorded to
+        """
+
+        self._capture_options = {"replay_path": replay_path, "replay_speed": replay_speed, "record_path": record_path}
 
     def clear(self):
         self.labelCameraFeed.clear()
         self.labelCameraFeed.setText("Camera offline")
+        self._show_slot(None)
 
     def start_camera(self):
         if not self._camera_thread:
-            self._camera_thread = Camera()
+            self._camera_start_time = time.perf_counter()
+            self._camera_thread = Camera(**self._capture_options, tracer=self.tracer)
             self._camera_thread.frame_captured.connect(self._update_camera_feed)
+            self._camera_thread.stats_updated.connect(self._forward_stats)
             self._camera_thread.start()
 
     def stop_camera(self):
         if self._camera_thread:
             try:
                 self._camera_thread.frame_captured.disconnect(self._update_camera_feed)
+                self._camera_thread.stats_updated.disconnect(self._forward_stats)
             except TypeError:
                 pass
                 
@@ -46,16 +73,69 @@ class CameraFeedWidget(QWidget, Ui_widgetCameraFeed):
 
         self.clear()
 
-    def _update_camera_feed(self, final_frame: np.ndarray, results: object):
+    def shutdown(self):
+        """Stops the camera and the OS input dispatcher."""
+        self.stop_camera()
+        self._command_mapper.shutdown()
+
+    def export_trace(self, path: str):
+        """Writes the traced frame stages to a Chrome trace JSON file (chrome://tracing, Perfetto)."""
+        try:
+            count = self.tracer.export_chrome_trace(path)
+            print(f"INFO: Wrote {count} trace events to {path}")
+        except OSError as e:
+            print(f"ERROR: Could not write the trace to {path}: {e}")
+
+    def _forward_stats(self, stats: dict):
+        stats["input"] = self._command_mapper.executor.stats()
+        stats["latency"] = self.tracer.stats()
+        self.stats_signal.emit(stats)
+
+    def _show_slot(self, slot: FrameSlot | None):
+        """Displays the slot's frame without copying it and gives the previously shown buffer back to the pool."""
+
+        if slot is not None:
+            self.labelCameraFeed.set_frame(wrap_frame_as_qimage(slot.image))
+
+        if self._displayed_slot is not None:
+            self._displayed_slot.release()
+        self._displayed_slot = slot
+
+    def _update_camera_feed(self, slot: FrameSlot, landmarks: LandmarkFrame):
         """
         Now this function is LIGHTWEIGHT. It just draws the image.
+        The camera is told once the frame is handled, until then it drops the frames it produces.
         """
-        self.results_processed.emit(results)
-
-        self._command_mapper.process_results(results)
-
-        pixmap = convert_cv_to_pixmap(final_frame)
-        self.labelCameraFeed.setPixmap(pixmap)
+        try:
+            self._handle_frame(slot, landmarks)
+        finally:
+            if self._camera_thread:
+                self._camera_thread.frame_consumed()
+
+    def _report_first_frame(self):
+        camera_ms = (time.perf_counter() - self._camera_start_time) * 1000
+        self._camera_start_time = None
+        camera = self._camera_thread
+        startup_timer.first_frame(camera_ms, {"MediaPipe load": camera.vision_load_ms, "source open": camera.open_ms})
+
+    def _handle_frame(self, slot: FrameSlot, landmarks: LandmarkFrame):
+        trace = landmarks.trace
+        if trace is not None:
+            trace.end("delivery")
+
+        if self._camera_start_time is not None:
+            self._report_first_frame()
+
+        self._show_slot(slot)
+
+        self.results_processed.emit(landmarks)
+
+        mapper_start = time.perf_counter()
+        self._command_mapper.process_results(landmarks)
+        if trace is not None:
+            trace.span("mapper", mapper_start)
+            # the GUI is done, the frame's prediction and OS input finish it on their threads
+            trace.finish()
 
         curr_time = time.time()
         elapsed_time = curr_time - self.prev_time
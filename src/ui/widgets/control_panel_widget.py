@@ -1,7 +1,9 @@
+import time
+
 from PyQt6.QtWidgets import QWidget
 from PyQt6.QtCore import pyqtSignal
 
-from ml.train import Recorder, RecordingType, train_models
+from ml.train import Recorder, RecordingType, TrainingJob
 from ml import Classifier
 
 from .auto_control_panel_widget import Ui_widgetControlPanel
@@ -11,14 +13,29 @@ class ControlPanelWidget(QWidget, Ui_widgetControlPanel):
     collection_toggle_requested = pyqtSignal()
     status_msg_signal = pyqtSignal(str, int)
     model_reload_requested = pyqtSignal()
+    recorder_stats_signal = pyqtSignal(dict)
+    # model kind, fraction done, current step, emitted from the training job thread
+    training_progress = pyqtSignal(str, float, str)
+    # success, summary, emitted from the training job thread
+    training_finished = pyqtSignal(bool, str)
+
+    # seconds between two recorder stats updates
+    _STATS_INTERVAL = 1.0
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setupUi(self)
 
         self._recorder = Recorder()
+        self._last_stats_time = 0.0
         self._classifier = Classifier()
 
+        self._training_job : TrainingJob | None = None
+        self._training_progress = {}
+        self._run_training_text = self.buttonRunTraining.text()
+        self.training_progress.connect(self._show_training_progress)
+        self.training_finished.connect(self._training_done)
+
         self.buttonStartMIRA.clicked.connect(self.inference_toggle_requested.emit)
         self.buttonStartTraining.clicked.connect(self.collection_toggle_requested.emit)
         self.comboBoxGestureType.currentIndexChanged.connect(self._pick_recording_type)
@@ -32,14 +49,27 @@ class ControlPanelWidget(QWidget, Ui_widgetControlPanel):
         self.comboBoxGestureType.setCurrentIndex(0)
         self.lineEditGestureLabel.clear()
     
-    def collect_frame(self, results):
+    def collect_frame(self, frame):
         """
-        Passes a frame's landmark results to the recorder
+        Passes a frame's landmarks to the recorder
 
-        :param results: The processed landmark results from the vision module
+        :param frame: The hand landmarks of the frame from the vision module
         """
 
-        self._recorder.add_frame(results)
+        self._recorder.add_frame(frame)
+
+        current_time = time.perf_counter()
+        if current_time - self._last_stats_time >= self._STATS_INTERVAL:
+            self._last_stats_time = current_time
+            stats = self._recorder.stats()
+            if stats is not None:
+                self.recorder_stats_signal.emit(stats)
+
+    def shutdown(self):
+        """Cancels a running training and writes the recorded samples still queued."""
+        if self._training_job is not None:
+            self._training_job.cancel()
+        self._recorder.close()
     
     def _pick_recording_type(self):
         """
@@ -61,10 +91,38 @@ class ControlPanelWidget(QWidget, Ui_widgetControlPanel):
     
     def _run_training(self):
         """
-        Triggers the training of the machine learning models and reloads them upon completion
+        Starts training the machine learning models in background processes, or cancels the running training
+        The models are reloaded upon completion
         """
 
+        if self._training_job is not None:
+            self._training_job.cancel()
+            self.status_msg_signal.emit("Cancelling training...", 2000)
+            return
+
+        # the samples recorded last may still wait for the writer
+        self._recorder.flush()
+
+        self._training_progress = {}
+        self._training_job = TrainingJob(
+            self.training_progress.emit, self.training_finished.emit, full=self.checkBoxFullRetrain.isChecked()
+        )
+        self._training_job.start()
+
+        self.buttonRunTraining.setText("Cancel Training")
         self.status_msg_signal.emit("Training models...", 5000)
-        train_models()
+
+    def _show_training_progress(self, kind : str, fraction : float, step : str):
+        self._training_progress[kind] = f"{kind} {fraction * 100:.0f}% ({step})"
+        self.status_msg_signal.emit("Training: " + ", ".join(self._training_progress.values()), 0)
+
+    def _training_done(self, ok : bool, summary : str):
+        self._training_job = None
+        self.buttonRunTraining.setText(self._run_training_text)
+
+        # also when stopped, a model that finished before the others is already saved
         self.model_reload_requested.emit()
-        self.status_msg_signal.emit("Model training completed!", 5000)
+        if ok:
+            self.status_msg_signal.emit(f"Model training completed! {summary}", 5000)
+        else:
+            self.status_msg_signal.emit(f"Model training stopped: {summary}", 5000)
@@ -0,0 +1,45 @@
+from PyQt6.QtWidgets import QLabel
+from PyQt6.QtCore import QRectF
+from PyQt6.QtGui import QImage, QPainter
+
+class FrameView(QLabel):
+    """
+    Label that paints camera frames directly, scaled to fit and mirrored horizontally in the paint step
+    Shows its text (e.g. "Camera offline") whenever no frame is set
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._image : QImage | None = None
+
+    def set_frame(self, image: QImage):
+        """
+        Schedules a repaint with the given image, the image is painted as is (no copy or conversion)
+
+        :param image: the frame to show, must stay valid until the next set_frame()/clear()
+        """
+
+        self._image = image
+        self.update()
+
+    def clear(self):
+        self._image = None
+        super().clear()
+
+    def paintEvent(self, event):
+        if self._image is None:
+            super().paintEvent(event)
+            return
+
+        img_w, img_h = self._image.width(), self._image.height()
+        scale = min(self.width() / img_w, self.height() / img_h)
+        target_w, target_h = img_w * scale, img_h * scale
+
+        painter = QPainter(self)
+
+        # mirror around the vertical axis of the centered target rectangle
+        painter.translate((self.width() + target_w) / 2, (self.height() - target_h) / 2)
+        painter.scale(-1, 1)
+        painter.drawImage(QRectF(0, 0, target_w, target_h), self._image)
+
+        painter.end()
@@ -1,12 +1,12 @@
 import time
-import traceback
 
 # ADDED: QScrollArea
 from PyQt6.QtWidgets import (QWidget, QListWidgetItem, QDialog, QVBoxLayout, 
                              QLabel, QPushButton, QTabWidget, QScrollArea)
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, pyqtSignal
 
-from ml import Predictor
+from ml import Predictor, InferenceWorker, InferenceJob, ModelManager
+from preprocess import LandmarkFrame
 from .auto_predictions_widget import Ui_widgetPredictions
 from utils import STATIC_MODEL_PATH, DYNAMIC_MODEL_PATH
 
@@ -99,17 +99,39 @@ class HelpDialog(QDialog):
         self.setLayout(layout)
 
 class PredictionsWidget(QWidget, Ui_widgetPredictions):
+    """
+    Shows the gesture predictions, the models run on an InferenceWorker thread
+    and only the resulting labels are rendered on the GUI thread.
+    New models are loaded and swapped in by a ModelManager thread
+    """
     _MAX_PREDICTIONS_PER_SECOND = 2
     _MAX_PREDICTIONS_IN_LOG = 20
 
+    # label, window timestamp, inference time in ms, emitted from the worker thread
+    prediction_ready = pyqtSignal(object, float, float)
+    stats_signal = pyqtSignal(dict)
+    # reload report of the model manager, emitted from its thread
+    models_reloaded = pyqtSignal(dict)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setupUi(self)
 
         self._predictor = Predictor(STATIC_MODEL_PATH, DYNAMIC_MODEL_PATH)
 
+        self.prediction_ready.connect(self._display_prediction)
+        self._worker = InferenceWorker(self._predictor, self.prediction_ready.emit)
+        self._worker.start()
+
+        self._model_manager = ModelManager(
+            self._predictor, STATIC_MODEL_PATH, DYNAMIC_MODEL_PATH, self.models_reloaded.emit
+        )
+        self._model_manager.start()
+
         self._last_prediction_time = 0.0
         self._last_gesture = ""
+        # results of windows older than this are stale and not displayed anymore
+        self._last_window_timestamp = 0.0
 
     def show_help_dialog(self):
         """Opens the user manual popup. Called by Main Window."""
@@ -122,28 +144,45 @@ class PredictionsWidget(QWidget, Ui_widgetPredictions):
         self._last_gesture = ""
         self._last_prediction_time = 0.0
     
+    def shutdown(self):
+        """Stops the model manager and inference worker threads."""
+        self._model_manager.stop()
+        self._worker.stop()
+
     def reload_models(self):
-        try:
-            self._predictor = Predictor(STATIC_MODEL_PATH, DYNAMIC_MODEL_PATH)
-            print("INFO: reloaded models")
-        except Exception as e:
-            print(f"Error reloading models: {e}")
-            traceback.print_exc()
-
-    def predict_and_display(self, results):
-        if not results.multi_hand_landmarks:
+        """Loads the models again in the background, predictions go on with the current ones meanwhile."""
+        self._model_manager.request_reload()
+
+    def predict_and_display(self, frame: LandmarkFrame):
+        if not frame.has_hands:
             self.labelCurrentPrediction.setText("No Hand")
             self._last_gesture = ""
+            self._last_window_timestamp = frame.timestamp
             return
 
-        current_gesture = "noise"
         current_time = time.time()
         if current_time - self._last_prediction_time < 1.0 / self._MAX_PREDICTIONS_PER_SECOND:
             return
+        self._last_prediction_time = current_time
+
+        job = self._predictor.prepare(frame.timestamp)
+        if isinstance(job, InferenceJob):
+            job.trace = frame.trace
+            # the label comes back through prediction_ready once the worker is done
+            self._worker.submit(job)
+        else:
+            self._display_prediction(job, frame.timestamp, 0.0)
+
+    def _display_prediction(self, gesture_id, window_timestamp: float, inference_ms: float):
+        stats = self._worker.stats()
+        stats["models"] = self._model_manager.stats()
+        self.stats_signal.emit(stats)
+
+        if window_timestamp < self._last_window_timestamp:
+            return
+        self._last_window_timestamp = window_timestamp
 
-        gesture_id = self._predictor.predict(results)
-        if current_gesture != gesture_id:
-            current_gesture = str(gesture_id)
+        current_gesture = str(gesture_id)
 
         self.labelCurrentPrediction.setText(current_gesture)
 
@@ -156,4 +195,3 @@ class PredictionsWidget(QWidget, Ui_widgetPredictions):
                 self.listPredictionLog.takeItem(self._MAX_PREDICTIONS_IN_LOG)
         
         self._last_gesture = current_gesture
-        self._last_prediction_time = current_time
\ No newline at end of file
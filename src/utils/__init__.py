@@ -1,2 +1,4 @@
-from .frame import *
-from .config import *
\ No newline at end of file
+from .config import *
+from .buffers import *
+from .tracing import *
+from .startup import *
@@ -0,0 +1,90 @@
+import threading
+
+class LatestBuffer:
+    """
+    Single-slot hand-off between a producer and a consumer thread where the newest item always wins.
+    Putting a new item while the previous one was not taken yet replaces it and counts it as dropped
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._item = None
+        self._closed = False
+
+        self.put_count = 0
+        self.drop_count = 0
+
+    def put(self, item):
+        """
+        Stores the item, replacing any item that was not taken yet
+
+        :param item: the item to hand off, must not be None
+
+        :return: the replaced item (so the caller can recycle it) or None
+        """
+
+        with self._condition:
+            replaced = self._item
+            self._item = item
+            self.put_count += 1
+            if replaced is not None:
+                self.drop_count += 1
+            self._condition.notify_all()
+
+        return replaced
+
+    def get(self, timeout: float | None = None):
+        """
+        Waits for an item and takes it out of the buffer
+
+        :param timeout: maximum number of seconds to wait, None waits until an item arrives or the buffer is closed
+
+        :return: the newest item or None on timeout/close
+        """
+
+        with self._condition:
+            if self._item is None and not self._closed:
+                self._condition.wait(timeout)
+
+            item = self._item
+            self._item = None
+            self._condition.notify_all()
+            return item
+
+    def wait_taken(self, timeout: float | None = None) -> bool:
+        """
+        Waits until the pending item was taken, for a producer that must not drop anything
+
+        :return bool: whether the buffer is empty (False on timeout or when the buffer was closed with an item)
+        """
+
+        with self._condition:
+            if self._item is not None and not self._closed:
+                self._condition.wait(timeout)
+            return self._item is None
+
+    @property
+    def pending(self) -> int:
+        """Number of items waiting to be taken, 0 or 1"""
+
+        with self._condition:
+            return int(self._item is not None)
+
+    def clear(self):
+        """
+        Drops the pending item without counting it
+
+        :return: the pending item or None
+        """
+
+        with self._condition:
+            item = self._item
+            self._item = None
+            return item
+
+    def close(self):
+        """Wakes up any waiting consumer, further gets return immediately"""
+
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
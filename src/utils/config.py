@@ -8,10 +8,86 @@ STYLESHEET_PATH = os.path.join(UI_DIR, "style.qss")
 WIDGETS_DIR = os.path.join(UI_DIR, "widgets")
 
 ML_DIR = os.path.join(SRC_DIR, "ml")
-STATIC_MODEL_PATH = os.path.join(ML_DIR, "static_model.p")
-DYNAMIC_MODEL_PATH = os.path.join(ML_DIR, "dynamic_model.p")
+# memory-mapped model artifacts (see ml/artifact.py), models pickled by older versions sit next to them as .p
+STATIC_MODEL_PATH = os.path.join(ML_DIR, "static_model.mira")
+DYNAMIC_MODEL_PATH = os.path.join(ML_DIR, "dynamic_model.mira")
 
 TRAIN_DIR = os.path.join(ML_DIR, "train")
 DATA_DIR = os.path.join(TRAIN_DIR, "data")
-STATIC_GESTURE_TRAINING_DATA_PATH = os.path.join(DATA_DIR, "static_gestures_training_data.csv")
-DYNAMIC_GESTURE_TRAINING_DATA_PATH = os.path.join(DATA_DIR, "dynamic_gestures_training_data.csv")
\ No newline at end of file
+# binary training datasets (see ml/train/dataset.py), a CSV older versions recorded next to one (same name + .csv)
+# is only read while the dataset doesn't exist, the recorder converts it on its first use
+STATIC_GESTURE_TRAINING_DATA_PATH = os.path.join(DATA_DIR, "static_gestures_training_data")
+DYNAMIC_GESTURE_TRAINING_DATA_PATH = os.path.join(DATA_DIR, "dynamic_gestures_training_data")
+
+# longest time (seconds) a recorded sample waits in memory before the recorder writes it to its dataset
+RECORDER_FLUSH_INTERVAL = 0.5
+
+# frames making up one static gesture sample
+STATIC_WINDOW = 1
+# frames making up one dynamic gesture, fixed by the recorded training data
+GESTURE_WINDOW = 30
+# frames the classifier analyzes to tell noise, static and dynamic movement apart
+# the movement thresholds were tuned on 30 frames, longer windows help slower gestures
+CLASSIFIER_WINDOW = GESTURE_WINDOW
+
+CAPTURE_WIDTH = 1280
+CAPTURE_HEIGHT = 720
+
+# width of the downscaled copy MediaPipe runs on, the preview keeps the capture resolution
+# lower values trade landmark accuracy for CPU time (e.g. 320, 480, 640), None runs on the full frame
+INFERENCE_WIDTH = 480
+
+# how many processed frames may wait for the GUI before new ones get dropped
+MAX_FRAMES_IN_FLIGHT = 1
+
+# preallocated camera frame buffers: one being grabbed, one waiting, one in inference,
+# the ones in flight to the GUI and the one currently displayed
+FRAME_POOL_SIZE = MAX_FRAMES_IN_FLIGHT + 4
+
+# training runs in background processes, one per model, so live recognition keeps running meanwhile
+# trees trained in parallel inside each forest (scikit-learn n_jobs), -1 uses every core the training may use
+TRAINING_N_JOBS = 1
+# niceness added to the training processes, higher leaves more CPU to the camera and the GUI (Unix only)
+TRAINING_NICENESS = 10
+# cores the training processes are pinned to (Linux only), None leaves one core free for live recognition
+TRAINING_MAX_CORES = None
+
+# training only adds trees for the samples recorded since the last training, unless the forest would grow past
+# INCREMENTAL_MAX_TREES, the added trees would outnumber the fully trained ones or it predicts the new samples
+# worse than its accuracy so far minus this tolerance (drift)
+INCREMENTAL_DRIFT_TOLERANCE = 0.15
+INCREMENTAL_MAX_TREES = 300
+
+# how the dynamic model sees a recorded window (see preprocess/temporal_features.py), used when it is fully retrained:
+# "raw" every coordinate of every frame (GESTURE_WINDOW * 84 features), "temporal" a compact summary
+# (segment poses, landmark speeds, accelerations), "temporal+pca" that summary projected on its main components
+# a model keeps the featurizer it was trained with, changing it here retrains the dynamic model from scratch
+DYNAMIC_FEATURIZER = "raw"
+DYNAMIC_FEATURE_SEGMENTS = 3
+DYNAMIC_PCA_COMPONENTS = 64
+
+# session recording (see capture/session.py): every processed camera frame with its landmarks and grab time
+# image encoding of the recorded frames: "jpg", "png" (lossless), "raw" or None to record the landmarks only
+SESSION_IMAGE_FORMAT = "jpg"
+SESSION_JPEG_QUALITY = 90
+# frames waiting for the session writer before the images of new ones are dropped, their landmarks are kept
+SESSION_MAX_BACKLOG = 30
+
+# latency tracing (see utils/tracing.py): stage spans kept in memory for the Chrome trace export (python main.py --trace FILE),
+# the per stage histograms cover the whole run whatever this is
+TRACE_MAX_SPANS = 200_000
+
+# idle power mode (see capture/idle.py): after this many processed frames without a hand, only IDLE_FPS frames per second
+# are decoded and run through MediaPipe, on an image IDLE_INFERENCE_WIDTH wide. A hand brings back the full rate at once
+# None never idles, replays processing every frame (fast, landmarks) never idle either
+IDLE_AFTER_FRAMES = 90
+IDLE_FPS = 5
+IDLE_INFERENCE_WIDTH = 256
+
+# region of interest tracking (see capture/vision.py): once hands are found, MediaPipe runs on a crop around them,
+# padded by ROI_PADDING times the hand box size on every side. The whole frame is searched again when the hands
+# leave the crop, and every ROI_FULL_FRAME_INTERVAL frames while a second hand could still enter the view
+# compare both modes on a recorded session before turning it on: python -m benchmarks.bench_roi SESSION
+ROI_TRACKING = False
+ROI_PADDING = 0.5
+ROI_FULL_FRAME_INTERVAL = 10
@@ -1,18 +1,17 @@
-import cv2
 import numpy as np
-from PyQt6.QtGui import QImage, QPixmap
+from PyQt6.QtGui import QImage
 
-def convert_cv_to_pixmap(frame: np.ndarray) -> QPixmap:
+def wrap_frame_as_qimage(frame: np.ndarray) -> QImage:
         """
-        Converts an openCV frame (bgr) to a QPixmap(rgb) for better performance with the GUI
+        Wraps an openCV frame (bgr) in a QImage without converting or copying the pixels
 
-        :param frame: the frame to convert, in openCV format (bgr)
+        The QImage reads straight from the numpy buffer, so the buffer must stay untouched
+        for as long as the image is in use
 
-        :return QPixmap: the converted frame in QPixmap format
+        :param frame: the frame to wrap, in openCV format (bgr, uint8, contiguous rows)
+
+        :return QImage: a BGR888 image sharing the frame memory
         """
 
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        h, w, ch = frame_rgb.shape
-        q_img = QImage(frame_rgb.data, w, h, ch * w, QImage.Format.Format_RGB888)
-        
-        return QPixmap.fromImage(q_img)
\ No newline at end of file
+        h, w, ch = frame.shape
+        return QImage(frame.data, w, h, frame.strides[0], QImage.Format.Format_BGR888)
@@ -0,0 +1,82 @@
+import importlib
+import threading
+import time
+
+class StartupTimer:
+    """
+    Times the startup of the app, from the first line of main.py to the first camera frame handled by the GUI
+
+    The startup is split in phases marked one after the other on the main thread, each lasting from the previous mark.
+    Heavy modules the GUI doesn't need to show up are imported by preload() on a background thread, timed on their own
+    """
+
+    def __init__(self):
+        self._origin = time.perf_counter()
+        self._last_mark = self._origin
+        self._lock = threading.Lock()
+
+        # (phase, ms) in startup order
+        self.phases = []
+        # (module, ms) of the preloaded modules
+        self.preloaded = []
+        self.first_frame_ms : float | None = None
+
+    def elapsed_ms(self) -> float:
+        """Milliseconds since the startup began"""
+
+        return (time.perf_counter() - self._origin) * 1000
+
+    def mark(self, phase: str):
+        """Ends a startup phase, it began with the previous mark"""
+
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self._last_mark) * 1000))
+        self._last_mark = now
+
+    def preload(self, modules: list):
+        """Imports the modules on a background thread, a later import of one of them waits for it instead of repeating it"""
+
+        threading.Thread(target=self._preload, args=(modules,), name="Preload", daemon=True).start()
+
+    def _preload(self, modules: list):
+        for module in modules:
+            start = time.perf_counter()
+            try:
+                importlib.import_module(module)
+            except Exception as e:
+                print(f"ERROR: Could not preload {module}: {e}")
+                continue
+            with self._lock:
+                self.preloaded.append((module, (time.perf_counter() - start) * 1000))
+
+        with self._lock:
+            loads = ", ".join(f"{module} {ms:.0f} ms" for module, ms in self.preloaded)
+        print(f"INFO: Startup: preloaded in the background: {loads or 'nothing'}")
+
+    def print_phases(self):
+        phases = ", ".join(f"{phase} {ms:.0f} ms" for phase, ms in self.phases)
+        print(f"INFO: Startup: window shown after {self.elapsed_ms():.0f} ms ({phases})")
+
+    def first_frame(self, camera_ms: float, details: dict):
+        """
+        Reports the first camera frame handled since the app started, later calls do nothing
+
+        :param camera_ms: time from the camera start request to the frame
+        :param details: ms of the camera startup steps, by name
+        """
+
+        if self.first_frame_ms is not None:
+            return
+
+        self.first_frame_ms = self.elapsed_ms()
+        steps = ", ".join(f"{step} {ms:.0f} ms" for step, ms in details.items())
+        print(f"INFO: Startup: first frame {self.first_frame_ms:.0f} ms after launch, "
+              f"{camera_ms:.0f} ms after the camera start ({steps})")
+
+    def report(self) -> dict:
+        with self._lock:
+            preloaded = dict(self.preloaded)
+        return {"phases": dict(self.phases), "preloaded": preloaded, "first_frame_ms": self.first_frame_ms}
+
+# the app's startup, its clock starts when utils is first imported
+startup_timer = StartupTimer()
@@ -0,0 +1,233 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+
+from .config import TRACE_MAX_SPANS
+
+# the stages a frame goes through, with the thread each one runs on
+# None marks a wait between two threads (buffers, signal, dispatcher queue) or the whole frame, those overlap
+# from one frame to the next and are exported as async spans instead of slices of a thread
+TRACE_STAGES = {
+    "grab": "CameraGrab",
+    "grab_queue": None,
+    "mediapipe": "Camera",
+    "delivery": None,
+    # Predictor.update() and prepare(): classifier window, feature cache and movement type (the GUI adds the label)
+    "recognition": "GUI",
+    "mapper": "GUI",
+    "predictor": "InferenceWorker",
+    "os_dispatch": None,
+    "end_to_end": None,
+}
+
+class LatencyHistogram:
+    """
+    Latency histogram with logarithmic buckets from 1 us to about 16 s, its size doesn't grow with the samples
+    Percentiles are accurate to the bucket width, about 4%
+    """
+
+    _BUCKETS_PER_DOUBLING = 16
+    _DOUBLINGS = 24
+
+    def __init__(self):
+        self.counts = [0] * (self._BUCKETS_PER_DOUBLING * self._DOUBLINGS + 1)
+        self.count = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+
+    def record(self, seconds: float):
+        us = seconds * 1e6
+        index = 0 if us <= 1.0 else min(int(math.log2(us) * self._BUCKETS_PER_DOUBLING) + 1, len(self.counts) - 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total_s += seconds
+        self.max_s = max(self.max_s, seconds)
+
+    def percentile(self, q: float) -> float:
+        """
+        :param q: percentile, 0 to 100
+
+        :return float: the latency in seconds, the middle of the bucket holding the percentile, 0 without samples
+        """
+
+        if not self.count:
+            return 0.0
+
+        rank = q / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                break
+        if index == 0:
+            return min(1e-6, self.max_s)
+        # geometric middle of the bucket, never above the slowest sample
+        return min(2 ** ((index - 0.5) / self._BUCKETS_PER_DOUBLING) / 1e6, self.max_s)
+
+class FrameTrace:
+    """
+    Timeline of one camera frame, carried along with it from the grab to the OS input
+    Stages record their span here as they finish, it goes straight to the tracer's histograms.
+    A stage crossing threads is opened with start() and closed with end() by the receiving side
+
+    The frame is done once the capture side and every later stage it was handed to (a prediction job,
+    queued OS input) called finish(), the end to end latency runs from the grab to the last of them
+    """
+
+    __slots__ = ("frame_id", "grab_time", "spans", "_tracer", "_holders")
+
+    def __init__(self, tracer, frame_id: int, grab_time: float):
+        self._tracer = tracer
+        self.frame_id = frame_id
+        # time.perf_counter() of the moment the camera started reading the frame
+        self.grab_time = grab_time
+        # stage -> (start, end) of the finished stages, (start, None) while a stage is open
+        self.spans = {}
+        # the capture side and the later stages that took the frame along, see hold()
+        self._holders = 1
+
+    def span(self, stage: str, start: float, end: float | None = None):
+        """Records a stage that ran from start to end (now by default)"""
+
+        if end is None:
+            end = time.perf_counter()
+        self.spans[stage] = (start, end)
+        self._tracer.record(stage, self.frame_id, start, end)
+
+    def start(self, stage: str):
+        self.spans[stage] = (time.perf_counter(), None)
+
+    def end(self, stage: str):
+        start, end = self.spans.get(stage, (None, None))
+        if start is not None and end is None:
+            self.span(stage, start)
+
+    def drop(self, stage: str):
+        """The frame was dropped at this stage"""
+
+        self._tracer.drop(stage, self.frame_id)
+
+    def hold(self):
+        """A later stage on another thread takes the frame along, it calls finish() once done or dropped"""
+
+        with self._tracer._lock:
+            self._holders += 1
+
+    def finish(self):
+        """The caller is done with the frame, the last one records the frame's latency from the grab"""
+
+        with self._tracer._lock:
+            self._holders -= 1
+            if self._holders:
+                return
+        self.span("end_to_end", self.grab_time)
+
+class Tracer:
+    """
+    Collects the stage spans of the traced frames, from any thread
+
+    Every stage keeps a LatencyHistogram and a drop count over the whole run, the latest max_spans spans and drops
+    are kept for export_chrome_trace(), a trace viewable in chrome://tracing or Perfetto
+    """
+
+    def __init__(self, max_spans: int = TRACE_MAX_SPANS):
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._next_frame_id = 0
+
+        self.histograms = {stage: LatencyHistogram() for stage in TRACE_STAGES}
+        self.drops = dict.fromkeys(TRACE_STAGES, 0)
+        # (stage, frame id, start, end), end is None for a drop
+        self._spans = deque(maxlen=max_spans)
+
+    def begin(self, grab_start: float, grab_end: float) -> FrameTrace:
+        """
+        Starts the trace of a newly grabbed frame
+
+        :param grab_start: time.perf_counter() before the camera read
+        :param grab_end: time.perf_counter() once the frame was read
+        """
+
+        with self._lock:
+            frame_id = self._next_frame_id
+            self._next_frame_id += 1
+
+        trace = FrameTrace(self, frame_id, grab_start)
+        trace.span("grab", grab_start, grab_end)
+        return trace
+
+    def record(self, stage: str, frame_id: int, start: float, end: float):
+        with self._lock:
+            self.histograms[stage].record(end - start)
+            self._spans.append((stage, frame_id, start, end))
+
+    def drop(self, stage: str, frame_id: int | None = None):
+        """Counts a frame dropped at the stage, frame_id is None when the frame was never read"""
+
+        with self._lock:
+            self.drops[stage] += 1
+            self._spans.append((stage, frame_id, time.perf_counter(), None))
+
+    def stats(self) -> dict:
+        """
+        Returns the latency percentiles of every stage
+
+        :return dict: stage -> count, dropped, mean/p50/p95/p99/max in ms
+        """
+
+        with self._lock:
+            stats = {}
+            for stage, histogram in self.histograms.items():
+                stats[stage] = {
+                    "count": histogram.count,
+                    "dropped": self.drops[stage],
+                    "mean_ms": histogram.total_s / histogram.count * 1000 if histogram.count else 0.0,
+                    "p50_ms": histogram.percentile(50) * 1000,
+                    "p95_ms": histogram.percentile(95) * 1000,
+                    "p99_ms": histogram.percentile(99) * 1000,
+                    "max_ms": histogram.max_s * 1000,
+                }
+            return stats
+
+    def export_chrome_trace(self, path: str) -> int:
+        """
+        Writes the kept spans as a Chrome trace (JSON object format), the stage statistics go along in otherData
+
+        :return int: the number of trace events written
+        """
+
+        with self._lock:
+            spans = list(self._spans)
+
+        pid = os.getpid()
+        threads = [name for name in dict.fromkeys(TRACE_STAGES.values()) if name is not None]
+        tids = {name: tid for tid, name in enumerate(threads, start=1)}
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for name, tid in tids.items()
+        ]
+        # trace timestamps are microseconds
+        us = lambda t: round((t - self._origin) * 1e6, 1)
+
+        for span_id, (stage, frame_id, start, end) in enumerate(spans):
+            thread = TRACE_STAGES[stage]
+            tid = tids.get(thread, 0)
+            args = {"frame": frame_id}
+            if end is None:
+                events.append({"name": f"{stage} dropped", "cat": "drop", "ph": "i", "s": "p",
+                               "ts": us(start), "pid": pid, "tid": tid, "args": args})
+            elif thread is not None:
+                events.append({"name": stage, "cat": "stage", "ph": "X", "ts": us(start),
+                               "dur": us(end) - us(start), "pid": pid, "tid": tid, "args": args})
+            else:
+                events.append({"name": stage, "cat": "wait", "ph": "b", "id": span_id, "ts": us(start),
+                               "pid": pid, "tid": tid, "args": args})
+                events.append({"name": stage, "cat": "wait", "ph": "e", "id": span_id, "ts": us(end),
+                               "pid": pid, "tid": tid})
+
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"stages": self.stats()}}, f)
+        return len(events)
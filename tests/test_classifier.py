@@ -0,0 +1,90 @@
+import math
+
+import numpy as np
+import pytest
+
+from ml.classifier import Classifier, FINGERTIPS, TRACKED_POINTS
+from preprocess import LandmarkFrame
+
+# ---- full recompute over the window, as the classifier did before the ring buffers ----
+
+def _reference_translation(window, point):
+    total = 0.0
+    for current, following in zip(window, window[1:]):
+        if not (current.has_hands and following.has_hands):
+            continue
+        a, b = current.coords[0, point], following.coords[0, point]
+        total += math.sqrt((b[0] - a[0]) ** 2 + (b[1] - a[1]) ** 2)
+    return total
+
+def _reference_finger_movement(window):
+    distances = []
+    for frame in window:
+        if not frame.has_hands:
+            continue
+        lm = frame.coords[0]
+        distances.append([math.sqrt((lm[tip, 0] - lm[0, 0]) ** 2 + (lm[tip, 1] - lm[0, 1]) ** 2) for tip in FINGERTIPS])
+    if not distances:
+        return 0.0
+
+    averages = [sum(row[i] for row in distances) / len(distances) for i in range(len(FINGERTIPS))]
+    return sum((row[i] - averages[i]) ** 2 for row in distances for i in range(len(FINGERTIPS))) / len(distances)
+
+def _frames(rng, n, move=0.0, jitter=0.01, missing=0.2):
+    """A hand drifting by move per frame with jittering landmarks, missing from a share of the frames"""
+
+    base = rng.random((21, 3)) * 0.2 + 0.4
+    frames = []
+    for i in range(n):
+        frame = LandmarkFrame.empty(float(i))
+        if rng.random() >= missing:
+            frame.coords[0] = base + rng.normal(0, jitter, (21, 3))
+            frame.coords[0, :, 0] += move * i
+            frame.present[0] = True
+        frames.append(frame)
+    return frames
+
+@pytest.mark.parametrize("window_size", [5, 30, 45])
+@pytest.mark.parametrize("move, jitter", [(0.0, 0.001), (0.0, 0.03), (0.01, 0.001)])
+def test_matches_full_recompute(window_size, move, jitter):
+    rng = np.random.default_rng(window_size)
+    frames = _frames(rng, 4 * window_size + 7, move, jitter)
+    classifier = Classifier(window_size)
+
+    for i, frame in enumerate(frames):
+        classifier.update(frame)
+        window = frames[max(0, i + 1 - window_size):i + 1]
+
+        assert classifier.window() == window
+        assert classifier.latest() is frame
+        if not classifier.is_full:
+            assert classifier.calculate_movement_type() == "noise"
+            continue
+
+        for point in TRACKED_POINTS:
+            assert classifier.translation(point) == pytest.approx(_reference_translation(window, point), abs=1e-12)
+        assert classifier.finger_movement() == pytest.approx(_reference_finger_movement(window), abs=1e-12)
+
+def test_movement_types():
+    rng = np.random.default_rng(0)
+
+    # a steady hand with wiggling fingers
+    wiggling = _frames(rng, 30, missing=0.0, jitter=0.0005)
+    for frame in wiggling:
+        frame.coords[0, FINGERTIPS, :2] += rng.normal(0, 0.05, (len(FINGERTIPS), 2))
+
+    for frames, expected in [
+        (_frames(rng, 30, missing=0.0, jitter=0.0005), "static"),
+        (_frames(rng, 30, move=0.02, missing=0.0, jitter=0.0005), "dynamic"),
+        (wiggling, "noise"),
+    ]:
+        classifier = Classifier(30)
+        for frame in frames:
+            classifier.update(frame)
+        assert classifier.calculate_movement_type() == expected
+
+def test_latest_frame_without_hand_is_noise():
+    classifier = Classifier(5)
+    for frame in _frames(np.random.default_rng(1), 4, missing=0.0) + [LandmarkFrame.empty()]:
+        classifier.update(frame)
+    assert classifier.calculate_movement_type() == "noise"
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from ml.train import dataset as dataset_module
+from ml.train.dataset import (
+    GestureDataset,
+    static_columns,
+    csv_to_dataset,
+    dataset_to_csv,
+    load_training_data,
+    training_data_fingerprint,
+)
+
+class _Killed(Exception):
+    pass
+
+class _DyingFile:
+    """Label file of a process killed once its features are on disk, before the label ids"""
+
+    def __init__(self, f):
+        self._f = f
+
+    def write(self, data):
+        self._f.close()
+        raise _Killed()
+
+def _rows(start: int, n: int) -> tuple[list, np.ndarray]:
+    # every row holds its id, its label follows from it
+    ids = np.arange(start, start + n)
+    features = np.repeat(ids[:, None], len(static_columns()), axis=1).astype(np.float32)
+    return [f"gesture_{i % 3}" for i in ids], features
+
+def _check_aligned(dataset: GestureDataset):
+    ids = dataset.features()[:, 0].astype(int)
+    assert np.array_equal(ids, np.arange(len(dataset)))
+    assert dataset.labels().tolist() == [f"gesture_{i % 3}" for i in ids]
+
+@pytest.mark.parametrize("written, interrupted", [(5, 6), (8, 3), (3, 20)])
+def test_interrupted_append_across_chunks(monkeypatch, tmp_path, written, interrupted):
+    monkeypatch.setattr(dataset_module, "CHUNK_ROWS", 8)
+    path = str(tmp_path / "data")
+
+    dataset = GestureDataset.create(path, static_columns())
+    dataset.append_rows(*_rows(0, written))
+    dataset._labels_file = _DyingFile(dataset._labels_file)
+    with pytest.raises(_Killed):
+        dataset.append_rows(*_rows(written, interrupted))
+    dataset._features_file.close()
+
+    # the next session appends after the complete rows only
+    dataset = GestureDataset(path)
+    assert len(dataset) == written
+    dataset.append_rows(*_rows(written, 30))
+    dataset.close()
+
+    _check_aligned(GestureDataset(path))
+
+def test_csv_round_trip(tmp_path):
+    labels, features = _rows(0, 50)
+    # float32 values, as the dataset stores them, survive the round trip exactly
+    features += np.random.default_rng(0).normal(0, 1, features.shape).astype(np.float32)
+    csv_path = str(tmp_path / "data.csv")
+    with open(csv_path, "w") as f:
+        f.write(",".join(["label"] + static_columns()) + "\n")
+        for label, row in zip(labels, features.astype(np.float64).tolist()):
+            f.write(",".join([label] + [repr(value) for value in row]) + "\n")
+
+    dataset = csv_to_dataset(csv_path, str(tmp_path / "data"))
+    assert dataset.columns == static_columns()
+    assert dataset.labels().tolist() == labels
+    assert np.array_equal(dataset.features(), features)
+
+    dataset_to_csv(dataset.path, str(tmp_path / "export.csv"))
+    back = csv_to_dataset(str(tmp_path / "export.csv"), str(tmp_path / "back"))
+    assert back.labels().tolist() == labels
+    assert np.array_equal(back.features(), features)
+    assert back.fingerprint() == dataset.fingerprint()
+
+def test_load_and_fingerprint_while_appending(tmp_path):
+    path = str(tmp_path / "data")
+    dataset = GestureDataset.create(path, static_columns())
+    dataset.append_rows(*_rows(0, 20))
+    dataset.sync()
+
+    X, y, fingerprint = load_training_data(path)
+    assert X.shape == (20, len(static_columns()))
+    assert y.tolist() == _rows(0, 20)[0]
+    assert fingerprint == dataset.fingerprint()
+
+    # appended rows don't change the fingerprint of the first ones
+    dataset.append_rows(*_rows(20, 5))
+    dataset.close()
+    assert training_data_fingerprint(path, 20) == fingerprint
+    assert training_data_fingerprint(path, 26) is None
+    _check_aligned(dataset)
@@ -0,0 +1,157 @@
+import shutil
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from ml.artifact import read_metadata
+from ml.forest import CompiledForest
+from ml.train.dataset import GestureDataset, static_columns
+from ml.train.train import fit_model, N_ESTIMATORS
+
+@pytest.fixture(scope="module")
+def forest_data():
+    # string labels like the gesture names, classes separated by their mean on a few features
+    rng = np.random.default_rng(0)
+    labels = np.array(["fist", "palm", "peace", "thumbs_up"])
+    y = labels[rng.integers(0, len(labels), 600)]
+    X = rng.normal(0, 1, (600, 84))
+    X[:, :8] += np.searchsorted(labels, y)[:, None]
+
+    model = RandomForestClassifier(n_estimators=25, random_state=0).fit(X, y)
+    # training rows, jittered training rows and uniform noise
+    samples = np.concatenate([X, X + rng.normal(0, 0.3, X.shape), rng.uniform(-3, 6, (300, 84))])
+    return model, samples
+
+def test_same_output_as_sklearn(forest_data):
+    model, samples = forest_data
+    compiled = CompiledForest.from_sklearn(model)
+
+    assert np.array_equal(compiled.predict_proba(samples), model.predict_proba(samples))
+    assert np.array_equal(compiled.predict(samples), model.predict(samples).astype(str))
+    # one sample at a time, as the predictor calls it
+    for sample in samples[:50]:
+        assert np.array_equal(compiled.predict_proba(sample[np.newaxis]), model.predict_proba(sample[np.newaxis]))
+
+def test_saved_artifact_predicts_the_same(forest_data, tmp_path):
+    model, samples = forest_data
+    compiled = CompiledForest.from_sklearn(model)
+
+    path = str(tmp_path / "model.mira")
+    compiled.save(path, {"kind": "static"})
+    loaded, metadata = CompiledForest.load(path)
+
+    assert metadata["labels"] == model.classes_.tolist()
+    assert np.array_equal(loaded.predict_proba(samples), model.predict_proba(samples))
+
+def test_rejects_wrong_input_size(forest_data):
+    model, _ = forest_data
+    with pytest.raises(ValueError):
+        CompiledForest.from_sklearn(model).predict(np.zeros((1, 83)))
+
+def test_merge_averages_over_all_trees():
+    rng = np.random.default_rng(1)
+    X = rng.normal(0, 1, (300, 84))
+    # the second forest never saw "fist" and knows "wave" the first one doesn't
+    y_first = np.array(["fist", "palm", "peace"])[rng.integers(0, 3, 300)]
+    y_second = np.array(["wave", "palm", "peace"])[rng.integers(0, 3, 300)]
+    first = CompiledForest.from_sklearn(RandomForestClassifier(n_estimators=15, random_state=0).fit(X, y_first))
+    second = CompiledForest.from_sklearn(RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y_second))
+
+    merged = CompiledForest.merge([first, second])
+    assert merged.classes.tolist() == ["fist", "palm", "peace", "wave"]
+    assert merged.n_trees == 20
+
+    samples = rng.normal(0, 1.5, (200, 84))
+    expected = np.zeros((len(samples), 4))
+    for forest in (first, second):
+        columns = [merged.classes.tolist().index(label) for label in forest.classes]
+        expected[:, columns] += forest.predict_proba(samples) * forest.n_trees
+    expected /= merged.n_trees
+    assert np.allclose(merged.predict_proba(samples), expected, rtol=0, atol=1e-12)
+
+    # an explicit class order, e.g. the one of the model being updated
+    reordered = CompiledForest.merge([first, second], ["wave", "peace", "palm", "fist"])
+    assert np.allclose(reordered.predict_proba(samples), expected[:, ::-1], rtol=0, atol=1e-12)
+
+# ---- incremental training ----
+
+_LABELS = ["fist", "palm", "peace", "thumbs_up"]
+_CENTERS = np.random.default_rng(2).normal(0, 10, (len(_LABELS), len(static_columns())))
+
+def _samples(rng, n, labels=_LABELS):
+    # well separated gestures, every model predicts them right and no update looks like drift
+    label_ids = rng.integers(len(labels), size=n)
+    centers = np.array([_CENTERS[_LABELS.index(label)] if label in _LABELS else np.full(_CENTERS.shape[1], 30.0)
+                        for label in labels])
+    return [labels[i] for i in label_ids], centers[label_ids] + rng.normal(0, 0.1, (n, _CENTERS.shape[1]))
+
+@pytest.fixture
+def trained(tmp_path):
+    rng = np.random.default_rng(3)
+    data_path, model_path = str(tmp_path / "static"), str(tmp_path / "static.mira")
+    dataset = GestureDataset.create(data_path, static_columns())
+    dataset.append_rows(*_samples(rng, 200))
+    dataset.sync()
+    fit_model(model_path, data_path, "static", 1, full=True)
+    return rng, dataset, model_path
+
+def _fit(dataset, model_path):
+    dataset.sync()
+    fit_model(model_path, dataset.path, "static", 1)
+    return read_metadata(model_path)
+
+def test_appended_rows_update_the_model(trained, capsys):
+    rng, dataset, model_path = trained
+    dataset.append_rows(*_samples(rng, 10))
+    metadata = _fit(dataset, model_path)
+
+    assert metadata["updates"] == 1
+    assert metadata["n_trees"] == N_ESTIMATORS + metadata["added_trees"]
+    assert metadata["training_data"]["rows"] == 210
+    # the new rows were scored before being trained on and count in the accuracy
+    assert metadata["tested_rows"] == 40 + 10
+    assert metadata["accuracy"] == 1.0
+
+    # nothing new, nothing to do
+    assert _fit(dataset, model_path)["updates"] == 1
+    assert "up to date" in capsys.readouterr().out
+
+def test_changed_rows_retrain_the_model(trained, capsys):
+    rng, dataset, model_path = trained
+    labels, features = dataset.labels().tolist(), dataset.features()
+    dataset.close()
+    shutil.rmtree(dataset.path)
+
+    # the same number of rows, the first one relabelled, then new rows
+    labels[0] = "palm" if labels[0] != "palm" else "fist"
+    dataset = GestureDataset.create(dataset.path, static_columns())
+    dataset.append_rows(labels, features)
+    dataset.append_rows(*_samples(rng, 10))
+    metadata = _fit(dataset, model_path)
+
+    assert metadata["updates"] == 0
+    assert metadata["n_trees"] == N_ESTIMATORS
+    assert "the training data changed" in capsys.readouterr().out
+
+def test_new_gesture_retrains_the_model(trained, capsys):
+    rng, dataset, model_path = trained
+    dataset.append_rows(*_samples(rng, 10, ["fist", "wave"]))
+    metadata = _fit(dataset, model_path)
+
+    assert metadata["updates"] == 0
+    assert "wave" in metadata["labels"]
+    assert "new gestures ['wave']" in capsys.readouterr().out
+
+def test_added_trees_never_outnumber_the_trained_ones(trained, capsys):
+    rng, dataset, model_path = trained
+    # every small update adds its minimum of trees, until they would outnumber the fully trained forest
+    updates = []
+    for _ in range(N_ESTIMATORS // 10 + 1):
+        dataset.append_rows(*_samples(rng, 2))
+        metadata = _fit(dataset, model_path)
+        updates.append(metadata["updates"])
+        assert metadata["added_trees"] <= metadata["n_trees"] - metadata["added_trees"]
+
+    assert updates == list(range(1, N_ESTIMATORS // 10 + 1)) + [0]
+    assert "fully trained ones" in capsys.readouterr().out
@@ -0,0 +1,51 @@
+import numpy as np
+
+from benchmarks.landmarks import random_batch
+from preprocess import process_dataset, process_batch, process_frames, LandmarkFrame, FEATURES_PER_FRAME
+
+# ---- original per hand implementation on plain lists ----
+
+def _reference_process_hand(landmarks):
+    wrist_x, wrist_y = landmarks[0][0], landmarks[0][1]
+    zeroed = [[x - wrist_x, y - wrist_y] for x, y, _ in landmarks]
+    max_val = max(max(abs(x), abs(y)) for x, y in zeroed) or 1
+    return [value / max_val for point in zeroed for value in point]
+
+def _reference_process_dataset(coords, present, is_right):
+    left_hand_data = [0.0] * 42
+    right_hand_data = [0.0] * 42
+    for hand in range(2):
+        if not present[hand]:
+            continue
+        if is_right[hand]:
+            left_hand_data = _reference_process_hand(coords[hand].tolist())
+        else:
+            right_hand_data = _reference_process_hand(coords[hand].tolist())
+    return left_hand_data + right_hand_data
+
+def test_batch_matches_per_row_path():
+    coords, present, is_right = random_batch(np.random.default_rng(0), 500)
+    batch = process_batch(coords, present, is_right)
+
+    assert batch.shape == (500, FEATURES_PER_FRAME)
+    for i in range(len(coords)):
+        frame = LandmarkFrame(coords[i], present[i], is_right[i])
+        assert np.array_equal(batch[i], process_dataset(frame))
+        assert np.array_equal(batch[i], _reference_process_dataset(coords[i], present[i], is_right[i]))
+
+def test_same_handedness_keeps_the_later_hand():
+    coords, present, _ = random_batch(np.random.default_rng(1), 50)
+    present[:] = True
+    is_right = np.ones((50, 2), dtype=bool)
+
+    batch = process_batch(coords, present, is_right)
+    for i in range(len(coords)):
+        assert np.array_equal(batch[i, :42], _reference_process_hand(coords[i, 1].tolist()))
+    assert not batch[:, 42:].any()
+
+def test_process_frames():
+    coords, present, is_right = random_batch(np.random.default_rng(2), 30)
+    frames = [LandmarkFrame(coords[i], present[i], is_right[i]) for i in range(30)]
+
+    assert np.array_equal(process_frames(frames), process_batch(coords, present, is_right))
+    assert process_frames([]).shape == (0, FEATURES_PER_FRAME)
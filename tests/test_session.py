@@ -0,0 +1,101 @@
+import os
+
+import numpy as np
+import pytest
+
+from capture import session as session_module
+from capture.session import SessionWriter, SessionReader, ReplaySource, FRAME_DTYPE
+from preprocess import LandmarkFrame
+
+FRAME_SHAPE = (48, 64, 3)
+
+def _record(path, image_format, n=12, start=100.0):
+    """
+    Records n frames, every third one without its image
+
+    :return tuple: (the recorded LandmarkFrames, the images, None for the frames without)
+    """
+
+    rng = np.random.default_rng(0)
+    frames, images = [], []
+    writer = SessionWriter(path, FRAME_SHAPE, image_format)
+    writer.start()
+    for i in range(n):
+        # float32 landmarks like MediaPipe gives them, no, one or two hands
+        coords = rng.random((2, 21, 3)).astype(np.float32).astype(np.float64)
+        present = np.arange(2) < i % 3
+        coords[~present] = 0.0
+        frame = LandmarkFrame(coords, present, rng.random(2) < 0.5, start + i / 30)
+        image = rng.integers(0, 256, FRAME_SHAPE, dtype=np.uint8) if i % 3 else None
+
+        writer.submit(frame, image)
+        frames.append(frame)
+        images.append(image)
+    writer.stop()
+    return frames, images
+
+def _assert_same_landmarks(replayed, recorded):
+    assert np.array_equal(replayed.coords, recorded.coords)
+    assert np.array_equal(replayed.present, recorded.present)
+    assert np.array_equal(replayed.is_right, recorded.is_right)
+
+@pytest.mark.parametrize("image_format", ["raw", "png"])
+def test_round_trip(tmp_path, image_format):
+    path = str(tmp_path / "session")
+    frames, images = _record(path, image_format)
+
+    reader = SessionReader(path)
+    assert len(reader) == len(frames)
+    assert reader.frame_shape == FRAME_SHAPE
+    for i, (frame, image) in enumerate(zip(frames, images)):
+        _assert_same_landmarks(reader.landmarks(i), frame)
+        # timestamps count from the first frame
+        assert reader.landmarks(i).timestamp == pytest.approx(frame.timestamp - frames[0].timestamp)
+        if image is None:
+            assert reader.image(i) is None
+        else:
+            # both formats are lossless
+            assert np.array_equal(reader.image(i), image)
+
+    source = ReplaySource(path, "fast")
+    buffer = np.full(FRAME_SHAPE, 255, dtype=np.uint8)
+    for frame, image in zip(frames, images):
+        ret, replayed = source.read(buffer)
+        assert ret
+        _assert_same_landmarks(source.last_landmarks, frame)
+        # a frame recorded without its image replays black
+        assert np.array_equal(replayed, image if image is not None else np.zeros(FRAME_SHAPE, dtype=np.uint8))
+    assert source.read(buffer) == (False, None)
+
+def test_torn_record_is_ignored(tmp_path):
+    path = str(tmp_path / "session")
+    frames, _ = _record(path, "raw")
+
+    # a crash in the middle of the next record
+    with open(os.path.join(path, "frames.rec"), "ab") as f:
+        f.write(b"\1" * (FRAME_DTYPE.itemsize // 2))
+
+    reader = SessionReader(path)
+    assert len(reader) == len(frames)
+    _assert_same_landmarks(reader.landmarks(len(frames) - 1), frames[-1])
+
+    source = ReplaySource(path, "fast")
+    assert sum(source.read()[0] for _ in range(len(frames) + 1)) == len(frames)
+
+def test_landmarks_speed_never_decodes(tmp_path, monkeypatch):
+    path = str(tmp_path / "session")
+    frames, _ = _record(path, "png")
+
+    def decode(*args, **kwargs):
+        raise AssertionError("a landmarks replay decoded an image")
+
+    monkeypatch.setattr(session_module.cv2, "imdecode", decode)
+    monkeypatch.setattr(SessionReader, "image", decode)
+
+    source = ReplaySource(path, "landmarks")
+    assert source.lossless and source.landmarks_only
+    for frame in frames:
+        ret, image = source.read()
+        assert ret and image.shape == FRAME_SHAPE
+        _assert_same_landmarks(source.last_landmarks, frame)
+    assert not source.read()[0]
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from ml.artifact import load_artifact
+from ml.forest import CompiledForest
+from preprocess import make_featurizer, load_featurizer, FEATURIZERS, FEATURES_PER_FRAME
+from preprocess.landmark_frame import MAX_HANDS, NUM_LANDMARKS
+
+WINDOW = 30
+
+def _windows(rng, n):
+    """(n, WINDOW * 84) raw windows, the second hand missing from some frames"""
+
+    frames = rng.uniform(-1, 1, (n, WINDOW, MAX_HANDS, NUM_LANDMARKS * 2))
+    frames[:, ::4, 1] = 0.0
+    return frames.reshape(n, WINDOW * FEATURES_PER_FRAME)
+
+@pytest.mark.parametrize("name, n_features", [
+    ("raw", WINDOW * FEATURES_PER_FRAME),
+    # 3 segment poses, a speed per landmark, an acceleration and a presence share per hand
+    ("temporal", 3 * FEATURES_PER_FRAME + MAX_HANDS * NUM_LANDMARKS + 2 * MAX_HANDS),
+    ("temporal+pca", 16),
+])
+def test_shapes(name, n_features):
+    X = _windows(np.random.default_rng(0), 40)
+    featurizer = make_featurizer(name, WINDOW, segments=3, pca_components=16).fit(X)
+
+    assert featurizer.n_inputs == WINDOW * FEATURES_PER_FRAME
+    assert featurizer.n_features == n_features
+    assert featurizer.transform(X).shape == (40, n_features)
+    assert featurizer.transform(X[0]).shape == (1, n_features)
+
+def test_missing_hand_is_left_out_of_the_means():
+    X = _windows(np.random.default_rng(1), 5)
+    summaries = make_featurizer("temporal", WINDOW, segments=3).transform(X)
+
+    frames = X.reshape(5, WINDOW, MAX_HANDS, NUM_LANDMARKS * 2)
+    first_segment = frames[:, :10, 1]
+    seen = first_segment.any(axis=-1)
+    expected = first_segment.sum(axis=1) / seen.sum(axis=1)[:, None]
+    assert np.allclose(summaries[:, FEATURES_PER_FRAME // 2:FEATURES_PER_FRAME], expected)
+    # presence share of each hand in the last columns, frames 0, 4, ..., 28 miss the second hand
+    assert np.allclose(summaries[:, -2:], [1.0, (WINDOW - 8) / WINDOW])
+
+@pytest.mark.parametrize("name", FEATURIZERS)
+def test_saved_forest_keeps_its_featurizer(name, tmp_path):
+    rng = np.random.default_rng(2)
+    X, y = _windows(rng, 60), np.repeat(["swipe", "circle", "wave"], 20)
+
+    featurizer = make_featurizer(name, WINDOW, segments=3, pca_components=16).fit(X)
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(featurizer.transform(X), y)
+    compiled = CompiledForest.from_sklearn(model, featurizer)
+
+    path = str(tmp_path / "dynamic.mira")
+    compiled.save(path, {"kind": "dynamic"})
+    loaded, metadata = CompiledForest.load(path)
+
+    assert metadata["featurizer"] == featurizer.config()
+    rebuilt = load_featurizer(featurizer.config(), featurizer.arrays())
+    assert np.array_equal(rebuilt.transform(X), featurizer.transform(X))
+    # the raw windows go in, as the predictor hands them over
+    assert np.array_equal(loaded.predict_proba(X), model.predict_proba(featurizer.transform(X)))
+    # the size the search and the benchmark report counts the featurizer arrays too
+    arrays, _ = load_artifact(path)
+    assert compiled.nbytes == loaded.nbytes == sum(array.nbytes for array in arrays.values())
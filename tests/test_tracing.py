@@ -0,0 +1,97 @@
+import threading
+import time
+
+from commands.dispatcher import CommandDispatcher
+from ml.inference_worker import InferenceWorker, InferenceJob
+from utils import Tracer
+
+class _SlowExecutor:
+    """OS input taking delay seconds per command, records the order they come in"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.sent = []
+
+    def move_mouse(self, x_ratio, y_ratio):
+        time.sleep(self.delay)
+        self.sent.append(("move_mouse", x_ratio, y_ratio))
+
+    def left_click(self):
+        time.sleep(self.delay)
+        self.sent.append(("left_click",))
+
+def _end_to_end(tracer: Tracer) -> list:
+    return [(frame_id, start, end) for stage, frame_id, start, end in tracer._spans if stage == "end_to_end"]
+
+def test_finish_waits_for_every_holder():
+    tracer = Tracer()
+    trace = tracer.begin(time.perf_counter(), time.perf_counter())
+    trace.hold()
+    trace.hold()
+
+    trace.finish()
+    trace.finish()
+    assert tracer.histograms["end_to_end"].count == 0
+    trace.finish()
+    assert tracer.histograms["end_to_end"].count == 1
+
+def test_end_to_end_includes_os_dispatch():
+    tracer = Tracer()
+    executor = _SlowExecutor(0.02)
+    dispatcher = CommandDispatcher(executor)
+    dispatcher.start()
+
+    trace = tracer.begin(time.perf_counter(), time.perf_counter())
+    dispatcher.trace = trace
+    dispatcher.left_click()
+    # the GUI side is done long before the click reaches the OS
+    trace.finish()
+    dispatcher.stop()
+
+    [(_, start, end)] = _end_to_end(tracer)
+    assert start == trace.grab_time
+    assert end >= trace.spans["os_dispatch"][1]
+    assert end - start >= 0.02
+
+def test_coalesced_move_finishes_the_replaced_frame():
+    tracer = Tracer()
+    executor = _SlowExecutor(0.05)
+    dispatcher = CommandDispatcher(executor)
+    dispatcher.start()
+
+    # the first click keeps the dispatcher busy while the moves of the next frames queue up
+    traces = [tracer.begin(time.perf_counter(), time.perf_counter()) for _ in range(3)]
+    dispatcher.trace = traces[0]
+    dispatcher.left_click()
+    time.sleep(0.01)
+    for i, trace in enumerate(traces[1:], 1):
+        dispatcher.trace = trace
+        dispatcher.move_mouse(i / 10, i / 10)
+    for trace in traces:
+        trace.finish()
+    dispatcher.stop()
+
+    assert executor.sent == [("left_click",), ("move_mouse", 0.2, 0.2)]
+    assert tracer.drops["os_dispatch"] == 1
+    assert sorted(frame_id for frame_id, _, _ in _end_to_end(tracer)) == [trace.frame_id for trace in traces]
+
+def test_end_to_end_includes_the_prediction():
+    class SlowPredictor:
+        def run_job(self, job):
+            time.sleep(0.02)
+            return "fist"
+
+    done = threading.Event()
+    tracer = Tracer()
+    worker = InferenceWorker(SlowPredictor(), lambda label, timestamp, inference_ms: done.set())
+    worker.start()
+
+    trace = tracer.begin(time.perf_counter(), time.perf_counter())
+    worker.submit(InferenceJob(None, None, 0.0, trace))
+    trace.finish()
+    assert done.wait(5)
+    worker.stop()
+
+    [(_, start, end)] = _end_to_end(tracer)
+    assert end >= trace.spans["predictor"][1]
+    assert end - start >= 0.02
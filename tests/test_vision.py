@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from capture.vision import Vision
+from preprocess import LandmarkFrame
+
+FRAME_SHAPE = (480, 640, 3)
+
+def _tracker(roi=None, padding=0.5) -> Vision:
+    # only the crop selection state, without loading MediaPipe
+    vision = Vision.__new__(Vision)
+    vision.roi_padding = padding
+    vision._roi = roi
+    vision._roi_hand_count = 0
+    return vision
+
+def _hand_at(left, top, right, bottom) -> LandmarkFrame:
+    """A hand whose landmarks span the pixel box, in normalized frame coordinates"""
+
+    height, width = FRAME_SHAPE[:2]
+    frame = LandmarkFrame.empty(0.0)
+    t = np.linspace(0, 1, 21)
+    frame.coords[0, :, 0] = (left + t * (right - left)) / width
+    frame.coords[0, :, 1] = (top + t[::-1] * (bottom - top)) / height
+    frame.present[0] = True
+    return frame
+
+def test_crop_coordinates_map_back_onto_the_frame():
+    box = (100, 60, 420, 300)
+    rng = np.random.default_rng(0)
+    frame = LandmarkFrame.empty(0.0)
+    frame.coords[0] = rng.random((21, 3))
+    frame.present[0] = True
+    in_crop = frame.coords.copy()
+
+    Vision._to_frame_coordinates(frame, box, FRAME_SHAPE)
+
+    # the same points in pixels of the frame, and back to the crop
+    x0, y0, x1, y1 = box
+    pixels = frame.coords[0, :, :2] * (FRAME_SHAPE[1], FRAME_SHAPE[0])
+    assert np.allclose(pixels, (x0, y0) + in_crop[0, :, :2] * (x1 - x0, y1 - y0))
+    assert np.allclose((pixels - (x0, y0)) / (x1 - x0, y1 - y0), in_crop[0, :, :2])
+    # depth keeps the scale of x
+    assert np.allclose(frame.coords[0, :, 2], in_crop[0, :, 2] * (x1 - x0) / FRAME_SHAPE[1])
+    # the missing hand stays zeros
+    assert not frame.coords[1].any()
+
+def test_crop_around_the_hand():
+    box = _tracker()._track(_hand_at(200, 150, 300, 250), FRAME_SHAPE)
+
+    # padded by half the hand size on every side, to the pixel the normalized coordinates round to
+    assert np.allclose(box, (150, 100, 350, 300), atol=1)
+
+def test_crop_is_clamped_to_the_frame():
+    x0, y0, x1, y1 = _tracker()._track(_hand_at(560, 400, 630, 470), FRAME_SHAPE)
+
+    assert 0 <= x0 < x1 <= FRAME_SHAPE[1] and 0 <= y0 < y1 <= FRAME_SHAPE[0]
+    assert (x1, y1) == (FRAME_SHAPE[1], FRAME_SHAPE[0])
+    # the crop still covers the hand
+    assert x0 <= 560 and y0 <= 400
+
+def test_small_hand_gets_the_minimum_crop():
+    x0, y0, x1, y1 = _tracker()._track(_hand_at(300, 200, 310, 210), FRAME_SHAPE)
+
+    assert x1 - x0 == y1 - y0 == Vision._ROI_MIN_SIZE
+
+@pytest.mark.parametrize("box", [(20, 20, 620, 460), (150, 50, 500, 430)])
+def test_large_crop_uses_the_full_frame(box):
+    tracker = _tracker()
+    x0, y0, x1, y1 = box
+    padding = max(x1 - x0, y1 - y0) * tracker.roi_padding
+    crop_area = (min(x1 + padding, 640) - max(x0 - padding, 0)) * (min(y1 + padding, 480) - max(y0 - padding, 0))
+    assert crop_area > Vision._ROI_MAX_AREA * 640 * 480
+
+    assert tracker._track(_hand_at(*box), FRAME_SHAPE) is None
+
+def test_no_hand_uses_the_full_frame():
+    assert _tracker()._track(LandmarkFrame.empty(0.0), FRAME_SHAPE) is None
+
+def test_crop_is_kept_while_the_hand_stays_inside():
+    tracker = _tracker(roi=(150, 100, 350, 300))
+    assert tracker._track(_hand_at(205, 155, 305, 255), FRAME_SHAPE) == (150, 100, 350, 300)
+    # near the border it moves along
+    assert tracker._track(_hand_at(245, 155, 345, 255), FRAME_SHAPE) != (150, 100, 350, 300)